@@ -0,0 +1,159 @@
+import csv
+import json
+import time
+import random
+import resource
+import tracemalloc
+import multiprocessing
+from io import StringIO
+from django.core.management.base import BaseCommand
+
+DEFAULT_SIZES = (5000, 20000, 50000)
+
+
+def _synthetic_lots(count):
+    """Yields assembled lots shaped like the formatter's old per-record dicts"""
+    rng = random.Random(count)
+    for i in range(count):
+        msrp = round(rng.uniform(5, 900), 2)
+        lot = {
+            'EventID': '12345', 'LotNumber': f'M{i}', 'Lot Number': str(i), 'Seller': '702Auctions',
+            'ConsignorNumber': '', 'Category_not_formatted': 'Home & Kitchen', 'Category': 162703,
+            'Region': '88850842', 'ListingType': 'Auction', 'Currency': 'USD',
+            'Title': f'Synthetic product {i % 500} with a reasonably long title',
+            'Subtitle': f'MSRP: ${msrp} -- NOTES: box damaged' if i % 7 == 0 else f'MSRP: ${msrp} -',
+            'Description': '<b>Description</b>: Synthetic product<br>' * 4,
+            'Price': rng.choice(['5.00', '2.50', '1.00']), 'Quantity': '1', 'IsTaxable': 'TRUE',
+            'YouTubeID': '', 'PdfAttachments': '', 'Bold': 'false', 'Badge': '', 'Highlight': 'false',
+            'ShippingOptions': '', 'Duration': '', 'StartDTTM': '', 'EndDTTM': '', 'AutoRelist': '0',
+            'GoodTilCanceled': 'false', 'Working Condition': 'Yes', 'UPC': f'0{rng.randrange(10 ** 10):010d}',
+            'Truck': 'T-1', 'Source': 'AMZ FC', 'Size': 'M', 'Photo Taker': 'clerk', 'Packaging': '',
+            'Other Notes': 'box damaged' if i % 7 == 0 else '', 'MSRP': str(msrp), 'Location': 'A1',
+            'Item Condition': 'New', 'ID': f'rec{i:08d}', 'Amazon ID': 'B00XXXXXXX', 'AuctionCount': 1,
+            'HibidSearchText': 'search text', 'FullTitle': f'Synthetic product {i % 500}', 'Success': True,
+        }
+        for image_number in range(1, 11):
+            lot[f'Image_{image_number}'] = f'https://minio.example.com/auction-images/rec{i:08d}_{image_number}.jpg' if image_number <= 4 else ''
+        yield lot
+
+
+def _legacy_csv(lots):
+    """The pre-schema path: DictWriter, pandas clean, pandas header validation"""
+    import pandas as pd
+    from auction.utils.lot_schema import CSV_COLUMNS, FIXED_VALUES
+
+    output = StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for lot in lots:
+        row = {column: str(lot.get(column, '')) for column in CSV_COLUMNS}
+        row.update(FIXED_VALUES)
+        writer.writerow(row)
+
+    df = pd.read_csv(StringIO(output.getvalue()))
+    df['Price'] = pd.to_numeric(df['Price'], errors='coerce').fillna(0).round(2).astype(str)
+    df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce').fillna(1).astype(int).astype(str)
+    df['Category'] = pd.to_numeric(df['Category'], errors='coerce').fillna(162733).astype(int).astype(str)
+    buffer = StringIO()
+    df.to_csv(buffer, index=False)
+    content = buffer.getvalue()
+
+    if pd.read_csv(StringIO(content)).columns.tolist() != CSV_COLUMNS:
+        raise ValueError("Header mismatch")
+    return content
+
+
+def _schema_csv(lots, header):
+    from auction.utils.lot_schema import LotCsvWriter
+
+    with LotCsvWriter(header) as writer:
+        writer.write_all(lots)
+        return writer.getvalue()
+
+
+def _build_lots(mode, count, header):
+    """The in-memory representation each mode keeps for the whole run"""
+    if mode == 'legacy':
+        return list(_synthetic_lots(count))
+    from auction.utils.lot_schema import Lot
+    return [Lot.from_dict(header, lot) for lot in _synthetic_lots(count)]
+
+
+def _run_case(mode, count, queue):
+    """Runs in a fresh process so ru_maxrss reflects only this case"""
+    import django
+    django.setup()
+    import pandas  # noqa: F401 - imported up front so both modes start from the same baseline
+    from auction.utils.lot_schema import EventLotHeader
+
+    header = EventLotHeader('12345', '88850842', 'M')
+    tracemalloc.start()
+    lots = _build_lots(mode, count, header)
+    lots_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    content = _legacy_csv(lots) if mode == 'legacy' else _schema_csv(lots, header)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        'mode': mode,
+        'lots': count,
+        'lots_mb': round(lots_bytes / (1024 * 1024), 1),
+        'seconds': round(elapsed, 3),
+        'cpu_seconds': round(cpu, 3),
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'peak_rss_delta_mb': round((peak_rss - baseline_rss) / 1024, 1),
+        'csv_mb': round(len(content.encode('utf-8')) / (1024 * 1024), 2),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compare lot memory, CSV time and peak memory of the old dict/pandas path and the slotted Lot writer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=list(DEFAULT_SIZES),
+            help='Lot counts to benchmark',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print results as JSON',
+        )
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('spawn')
+        results = []
+        for count in options['sizes']:
+            for mode in ('legacy', 'schema'):
+                queue = context.Queue()
+                process = context.Process(target=_run_case, args=(mode, count, queue))
+                process.start()
+                results.append(queue.get())
+                process.join()
+
+        if options['json']:
+            self.stdout.write(json.dumps({'results': results}, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                f"{result['lots']:>6} lots | {result['mode']:>6} | lots in memory: {result['lots_mb']}MB | "
+                f"time: {result['seconds']}s (CPU {result['cpu_seconds']}s) | "
+                f"peak RSS: {result['peak_rss_mb']}MB (+{result['peak_rss_delta_mb']}MB) | "
+                f"CSV: {result['csv_mb']}MB"
+            )
+        for legacy, schema in zip(results[::2], results[1::2]):
+            if schema['seconds']:
+                self.stdout.write(
+                    f"{legacy['lots']:>6} lots: {legacy['seconds'] / schema['seconds']:.2f}x faster, "
+                    f"{legacy['peak_rss_delta_mb'] - schema['peak_rss_delta_mb']:.1f}MB less peak memory while writing, "
+                    f"{legacy['lots_mb'] - schema['lots_mb']:.1f}MB less held by the lots"
+                )
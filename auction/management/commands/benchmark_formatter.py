@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import random
+import asyncio
+import resource
+import tempfile
+import threading
+from io import BytesIO
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import ProtectedError
+
+AIRTABLE_PAGE_SIZE = 100
+S3_LOCATION = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<LocationConstraint xmlns="http://s3.amazonaws.com/doc/2006-03-01/">us-east-1</LocationConstraint>'
+)
+
+
+def _jpeg(width, height, seed):
+    """A noisy photo-sized JPEG, so decode/resize/encode cost is close to a real warehouse photo"""
+    from PIL import Image
+
+    image = Image.effect_noise((width, height), 20 + seed % 40).convert('RGB')
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+class LocalStandIns:
+    """
+    Serves attachment images at /img/<n> and answers everything else like an S3 bucket,
+    on its own thread and event loop so it does not skew the formatter's loop.
+    """
+
+    def __init__(self, images):
+        self.images = images
+        self.port = None
+        self.objects = 0
+        self.bytes_uploaded = 0
+        self.bytes_served = 0
+        self._loop = None
+        self._started = threading.Event()
+
+    async def _image(self, request):
+        body = self.images[int(request.match_info['number']) % len(self.images)]
+        self.bytes_served += len(body)
+        return self._web.Response(body=body, content_type='image/jpeg')
+
+    async def _s3(self, request):
+        if 'location' in request.query:
+            return self._web.Response(text=S3_LOCATION, content_type='application/xml')
+        if request.method == 'PUT':
+            body = await request.read()
+            if 'policy' not in request.query and request.path.count('/') > 1:
+                self.objects += 1
+                self.bytes_uploaded += len(body)
+            return self._web.Response(headers={'ETag': '"0"'})
+        return self._web.Response()
+
+    def _serve(self):
+        from aiohttp import web
+
+        self._web = web
+        self._loop = asyncio.new_event_loop()
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get('/img/{number}', self._image)
+        app.router.add_route('*', '/{tail:.*}', self._s3)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True, name='benchmark-stand-ins').start()
+        self._started.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+
+class LoopLagMonitor:
+    """How late a short sleep wakes up on the formatter's loop; high values mean blocking work on the loop"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.monotonic() - started - self.interval))
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {'samples': 0}
+        return {
+            'samples': len(samples),
+            'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+            'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+            'max_ms': round(samples[-1] * 1000, 2),
+        }
+
+
+def _synthetic_records(count, images_per_record, distinct_images, base_url, nonce):
+    """Airtable-shaped records; attachment ids are unique per run so the processed-image cache always misses"""
+    rng = random.Random(count)
+    categories = ['Home & Kitchen', 'Electronics', 'Toys & Games', 'Sports & Outdoors', 'Unknown']
+    records = []
+    for i in range(count):
+        fields = {
+            'Lot Number': i + 1,
+            'Product Name': f'Synthetic product {i % 500} with a reasonably long descriptive title',
+            'Description': 'Synthetic description. ' * 8,
+            'Category': rng.choice(categories),
+            'MSRP': round(rng.uniform(5, 900), 2),
+            'Auction Count': rng.randint(0, 3),
+            'Condition': 'New',
+            'Working Condition': 'Yes',
+            'Notes': 'box damaged' if i % 7 == 0 else '',
+            'UPC': f'0{rng.randrange(10 ** 10):010d}',
+            'B00 ASIN': 'B00XXXXXXX',
+            'Shipment': 'T-1',
+            'Size': 'M',
+            'Clerk': 'benchmark',
+            'Location': 'A1',
+        }
+        for j in range(1, images_per_record + 1):
+            number = (i * images_per_record + j) % distinct_images
+            fields[f'Image {j}'] = [{'id': f'att-bench-{nonce}-{i}-{j}', 'url': f'{base_url}/img/{number}?r={nonce}-{i}-{j}'}]
+        records.append({'id': f'recbench{i:06d}', 'fields': fields})
+    return records
+
+
+def _delete_redis_keys(nonce, event_id, task_id):
+    """Remove the image cache entries, checkpoint, task status and rate-limit bucket this run wrote; returns how many keys went"""
+    from django.conf import settings
+    from auction.utils.formatter_checkpoint import FormatterCheckpoint
+    from auction.utils.image_cache import ProcessedImageCache
+
+    redis_conn = settings.REDIS_CONN
+    # Every attachment id of a run carries its nonce, so the pattern only matches this run's entries
+    keys = list(redis_conn.scan_iter(match=f"{ProcessedImageCache.PREFIX}:att:att-bench-{nonce}-*", count=1000))
+    keys += [
+        f"{FormatterCheckpoint.PREFIX}:{event_id}", f"{FormatterCheckpoint.PREFIX}:{event_id}:records",
+        f"task:{task_id}", f"task_history:{task_id}", f"rate_limit:benchmark-{nonce}-minio",
+    ]
+    deleted = 0
+    for start in range(0, len(keys), 1000):
+        deleted += redis_conn.delete(*keys[start:start + 1000])
+    return deleted
+
+
+def _write_config(endpoint, keep_rate_limits):
+    """Copy of the real config whose MinIO endpoint is the local stand-in"""
+    from auction.utils import config_manager
+
+    config = json.loads(json.dumps(config_manager.config))
+    if not config.get('warehouses'):
+        raise CommandError("auction/utils/config.json has no warehouses; copy config.json.example first")
+    config.setdefault('global', {}).update({
+        'minio_endpoint': endpoint,
+        'minio_access_key': 'benchmark',
+        'minio_secret_key': 'benchmark',
+        'minio_secure': False,
+    })
+    if not keep_rate_limits:
+        config['global'].setdefault('rate_limits', {})['minio'] = {'rate': 100000, 'burst': 100000}
+    handle = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    with handle:
+        json.dump(config, handle)
+    return handle.name
+
+
+class Command(BaseCommand):
+    # System checks import the formatter, which must only be imported once its config points at the stand-ins
+    requires_system_checks = []
+    help = (
+        'Run the auction formatter end to end on a synthetic event, against local Airtable, image and MinIO '
+        'stand-ins with the bid-site upload stubbed, and report timings, throughput, peak RSS and loop lag as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=200, help='Number of synthetic Airtable records')
+        parser.add_argument('--images-per-record', type=int, default=3, help='Attachments per record (1-10)')
+        parser.add_argument('--distinct-images', type=int, default=8, help='Distinct JPEGs generated and served')
+        parser.add_argument('--image-size', type=str, default='3024x4032', help='WIDTHxHEIGHT of the served JPEGs')
+        parser.add_argument('--warehouse', type=str, default=None, help='Warehouse to format for (default: first in config)')
+        parser.add_argument('--keep-rate-limits', action='store_true', help='Keep the configured MinIO request budget')
+        parser.add_argument('--output', type=str, default=None, help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['images_per_record'] <= 10:
+            raise CommandError("--images-per-record must be between 1 and 10")
+        try:
+            width, height = (int(value) for value in options['image_size'].lower().split('x'))
+        except ValueError:
+            raise CommandError("--image-size must look like 3024x4032")
+
+        images = [_jpeg(width, height, seed) for seed in range(options['distinct_images'])]
+        stand_ins = LocalStandIns(images).start()
+        config_path = _write_config(f"127.0.0.1:{stand_ins.port}", options['keep_rate_limits'])
+        os.environ['AUCTION_FORMATTER_CONFIG'] = config_path
+        try:
+            report = self.run_benchmark(stand_ins, options)
+        finally:
+            stand_ins.stop()
+            os.unlink(config_path)
+
+        report['config'].update({
+            'image_size': f"{width}x{height}",
+            'image_kb': round(sum(len(image) for image in images) / len(images) / 1024, 1),
+        })
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def run_benchmark(self, stand_ins, options):
+        from auction.scripts import auction_formatter
+        from auction.models import Event, CsvBlob
+        from auction.utils import config_manager
+        from auction.utils.rate_limiter import TokenBucket
+
+        warehouse = options['warehouse'] or next(iter(config_manager.config['warehouses']))
+        nonce = f"{int(time.time())}{os.getpid()}"
+        # Same rate and burst, but a bucket of its own so the run neither drains nor refills the shared one
+        shared_bucket = auction_formatter.rate_limiter
+        auction_formatter.rate_limiter = TokenBucket(f"benchmark-{nonce}-minio", shared_bucket.rate, shared_bucket.burst)
+        records = _synthetic_records(
+            options['records'], options['images_per_record'], options['distinct_images'], stand_ins.base_url, nonce
+        )
+        event_id, task_id = f"BENCH-{nonce}", f"benchmark-{nonce}"
+        event = Event.objects.create(
+            event_id=event_id, warehouse=warehouse, title='Formatter benchmark',
+            start_date=date.today(), ending_date=date.today()
+        )
+        messages = []
+        formatter = auction_formatter.AuctionFormatter(
+            event=event,
+            gui_callback=lambda message, progress=None: messages.append(message),
+            should_stop=None,
+            callback=lambda: None,
+            selected_warehouse=warehouse,
+            starting_price=None,
+            task_id=task_id,
+        )
+
+        phases = {}
+
+        def timed(name, method):
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    phases[name] = round(phases.get(name, 0.0) + time.perf_counter() - started, 3)
+            return wrapper
+
+        async def airtable_pages():
+            for start in range(0, len(records), AIRTABLE_PAGE_SIZE):
+                yield records[start:start + AIRTABLE_PAGE_SIZE]
+
+        uploaded_csv = {}
+
+        async def bid_site_upload(csv_content):
+            uploaded_csv['bytes'] = len(csv_content.encode('utf-8'))
+            return True
+
+        formatter.fetch_airtable_record_pages = airtable_pages
+        formatter.upload_csv_to_website_playwright = bid_site_upload
+        formatter.process_record_pages = timed('records_and_images', formatter.process_record_pages)
+        formatter.generate_and_clean_csv = timed('csv', formatter.generate_and_clean_csv)
+        formatter.save_formatted_data = timed('save', formatter.save_formatted_data)
+
+        lag = LoopLagMonitor()
+
+        async def run():
+            monitor = asyncio.create_task(lag.run())
+            try:
+                return await formatter.run_auction_formatter()
+            finally:
+                monitor.cancel()
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        try:
+            result = asyncio.run(run())
+        finally:
+            wall = time.perf_counter() - started
+            blob_ids = list(event.formatted_data.values_list('blob_id', 'manifest_id'))
+            event.delete()
+            try:
+                CsvBlob.objects.filter(id__in=[blob_id for pair in blob_ids for blob_id in pair if blob_id]).delete()
+            except ProtectedError:
+                pass  # Identical CSV also stored for a real event
+            try:
+                redis_keys_deleted = _delete_redis_keys(nonce, event_id, task_id)
+            except Exception as e:
+                self.stderr.write(f"Could not remove the benchmark's Redis keys: {e}")
+                redis_keys_deleted = None
+
+        processing = phases.get('records_and_images') or wall
+        return {
+            'config': {
+                'records': len(records),
+                'images_per_record': options['images_per_record'],
+                'distinct_images': options['distinct_images'],
+                'warehouse': warehouse,
+                'rate_limited': options['keep_rate_limits'],
+                'max_concurrent_images': formatter.MAX_CONCURRENT_IMAGES,
+                'transform_workers': formatter.transform_engine.max_workers,
+            },
+            'result': result,
+            'wall_seconds': round(wall, 3),
+            'phases_seconds': phases,
+            'records': {
+                'ok': len(formatter.processed_records),
+                'failed': len(formatter.failed_records),
+                'per_second': round(len(formatter.processed_records) / processing, 2),
+            },
+            'images': {
+                'uploaded': stand_ins.objects,
+                'per_second': round(stand_ins.objects / processing, 2),
+                'mb_downloaded': round(stand_ins.bytes_served / (1024 * 1024), 1),
+                'mb_uploaded': round(stand_ins.bytes_uploaded / (1024 * 1024), 1),
+            },
+            'pipeline': formatter.pipeline.stats(),
+            'minio_upload_latency': auction_formatter.minio_uploader.latency.as_dict(),
+            'loop_lag': lag.as_dict(),
+            # The event-loop process only; transform pool workers are forkserver children, not ours
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'peak_rss_delta_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+            'csv_bytes': uploaded_csv.get('bytes', 0),
+            'progress_messages': len(messages),
+            'redis_keys_deleted': redis_keys_deleted,
+        }
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import resource
+import multiprocessing
+from django.core.management.base import BaseCommand, CommandError
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def _run_mode(paths, fast, repeat, queue):
+    """Runs in a fresh process so ru_maxrss reflects only this mode"""
+    from auction.utils.image_transform import transform_image
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_times = []
+    output_bytes = 0
+    failures = 0
+    for _ in range(repeat):
+        for path in paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            started = time.process_time()
+            try:
+                output_bytes += len(transform_image(data, fast=fast))
+            except Exception:
+                failures += 1
+                continue
+            cpu_times.append(time.process_time() - started)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_times.sort()
+    count = len(cpu_times)
+    queue.put({
+        'mode': 'fast' if fast else 'full',
+        'images': count,
+        'failures': failures,
+        'cpu_ms_mean': round(sum(cpu_times) / count * 1000, 2) if count else 0.0,
+        'cpu_ms_p50': round(cpu_times[count // 2] * 1000, 2) if count else 0.0,
+        'cpu_ms_p95': round(cpu_times[min(count - 1, int(count * 0.95))] * 1000, 2) if count else 0.0,
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'peak_rss_delta_mb': round((peak_rss - baseline_rss) / 1024, 1),
+        'output_mb': round(output_bytes / (1024 * 1024), 2),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compare per-image CPU time and peak memory of the full and reduced-scale image transforms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'corpus',
+            type=str,
+            help='Directory of sample warehouse photos (jpg/png)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Number of passes over the corpus per mode',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print results as JSON',
+        )
+
+    def handle(self, *args, **options):
+        corpus = options['corpus']
+        if not os.path.isdir(corpus):
+            raise CommandError(f"Corpus directory not found: {corpus}")
+
+        paths = sorted(
+            os.path.join(corpus, name) for name in os.listdir(corpus)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not paths:
+            raise CommandError(f"No images found in {corpus}")
+
+        context = multiprocessing.get_context('spawn')
+        results = []
+        for fast in (False, True):
+            queue = context.Queue()
+            process = context.Process(target=_run_mode, args=(paths, fast, options['repeat'], queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+
+        if options['json']:
+            self.stdout.write(json.dumps({'corpus': corpus, 'files': len(paths), 'results': results}, indent=2))
+            return
+
+        self.stdout.write(f"Corpus: {corpus} ({len(paths)} files, {options['repeat']} pass(es))\n")
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:>4} | "
+                f"images: {result['images']} | "
+                f"failures: {result['failures']} | "
+                f"CPU/image mean: {result['cpu_ms_mean']}ms p50: {result['cpu_ms_p50']}ms p95: {result['cpu_ms_p95']}ms | "
+                f"peak RSS: {result['peak_rss_mb']}MB (+{result['peak_rss_delta_mb']}MB)"
+            )
+        full, fast = results
+        if fast['cpu_ms_mean']:
+            self.stdout.write(f"\nSpeedup: {full['cpu_ms_mean'] / fast['cpu_ms_mean']:.2f}x CPU per image")
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0009_remove_hibidupload_auction_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('compressed_size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='auctionformatteddata',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='formatted_data', to='auction.csvblob'),
+        ),
+        migrations.AddField(
+            model_name='voidedtransaction',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='voided_transactions', to='auction.csvblob'),
+        ),
+        migrations.AlterField(
+            model_name='auctionformatteddata',
+            name='csv_data',
+            field=models.TextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='voidedtransaction',
+            name='csv_data',
+            field=models.TextField(default=''),
+        ),
+    ]
@@ -0,0 +1,42 @@
+import gzip
+import hashlib
+
+from django.db import migrations
+
+
+def move_csv_data_to_blobs(apps, schema_editor):
+    CsvBlob = apps.get_model('auction', 'CsvBlob')
+    blob_ids = {}
+    for model_name in ('AuctionFormattedData', 'VoidedTransaction'):
+        model = apps.get_model('auction', model_name)
+        for row in model.objects.only('id', 'csv_data').iterator():
+            raw = (row.csv_data or '').encode('utf-8')
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest not in blob_ids:
+                data = gzip.compress(raw, compresslevel=6, mtime=0)
+                blob, _ = CsvBlob.objects.get_or_create(
+                    sha256=digest,
+                    defaults={'data': data, 'size': len(raw), 'compressed_size': len(data)},
+                )
+                blob_ids[digest] = blob.id
+            model.objects.filter(id=row.id).update(blob_id=blob_ids[digest])
+
+
+def restore_csv_data(apps, schema_editor):
+    for model_name in ('AuctionFormattedData', 'VoidedTransaction'):
+        model = apps.get_model('auction', model_name)
+        for row in model.objects.select_related('blob').iterator():
+            if row.blob_id:
+                row.csv_data = gzip.decompress(bytes(row.blob.data)).decode('utf-8')
+                row.save(update_fields=['csv_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0010_csvblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_csv_data_to_blobs, restore_csv_data),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0011_move_csv_data_to_blobs'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='auctionformatteddata',
+            name='csv_data',
+        ),
+        migrations.RemoveField(
+            model_name='voidedtransaction',
+            name='csv_data',
+        ),
+        migrations.AlterField(
+            model_name='auctionformatteddata',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='formatted_data', to='auction.csvblob'),
+        ),
+        migrations.AlterField(
+            model_name='voidedtransaction',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='voided_transactions', to='auction.csvblob'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.23 on 2026-10-17 00:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0012_csvblob_finalize'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionformatteddata',
+            name='changes',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='auction.csvblob'),
+        ),
+        migrations.AddField(
+            model_name='auctionformatteddata',
+            name='manifest',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='auction.csvblob'),
+        ),
+    ]
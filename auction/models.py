@@ -1,4 +1,8 @@
-from django.db import models
+import io
+import gzip
+import hashlib
+
+from django.db import models, IntegrityError, transaction
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils import timezone
@@ -39,11 +43,63 @@ class Event(models.Model):
     def __str__(self):
         return f"{self.title} ({self.event_id})"
 
+class CsvBlob(models.Model):
+    """
+    A gzip-compressed CSV stored once per distinct content. Rows that hold a CSV point
+    at a blob, so identical re-runs share one copy instead of adding another.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    compressed_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def store(cls, text):
+        raw = text.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        blob = cls.objects.filter(sha256=digest).only('id', 'sha256', 'size', 'compressed_size').first()
+        if blob:
+            return blob
+        # mtime=0 keeps the compressed bytes stable for the same content
+        data = gzip.compress(raw, compresslevel=6, mtime=0)
+        try:
+            with transaction.atomic():
+                return cls.objects.create(sha256=digest, data=data, size=len(raw), compressed_size=len(data))
+        except IntegrityError:
+            # Another worker stored the same CSV first
+            return cls.objects.get(sha256=digest)
+
+    @property
+    def text(self):
+        return gzip.decompress(bytes(self.data)).decode('utf-8')
+
+    def iter_bytes(self, compressed=False, chunk_size=64 * 1024):
+        """Yield the CSV in chunks; decompressed lazily unless the stored gzip bytes are wanted as-is"""
+        data = memoryview(bytes(self.data))
+        if compressed:
+            for start in range(0, len(data), chunk_size):
+                yield bytes(data[start:start + chunk_size])
+            return
+        with gzip.GzipFile(fileobj=io.BytesIO(data), mode='rb') as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def __str__(self):
+        return f"CSV {self.sha256[:12]} ({self.size} bytes, {self.compressed_size} compressed)"
+
 class VoidedTransaction(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='voided_transactions')
-    csv_data = models.TextField()
+    blob = models.ForeignKey(CsvBlob, on_delete=models.PROTECT, related_name='voided_transactions')
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def csv_data(self):
+        return self.blob.text
+
     def __str__(self):
         return f"Voided Transaction for Event {self.event.event_id}"
     
@@ -59,9 +115,17 @@ class ImageMetadata(models.Model):
     
 class AuctionFormattedData(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='formatted_data')
-    csv_data = models.TextField()
+    blob = models.ForeignKey(CsvBlob, on_delete=models.PROTECT, related_name='formatted_data')
+    # Record id -> fingerprint the CSV was built from, for delta re-formatting
+    manifest = models.ForeignKey(CsvBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    # Only the lots added or changed since the previous build (delta runs)
+    changes = models.ForeignKey(CsvBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def csv_data(self):
+        return self.blob.text
+
     def __str__(self):
         return f"Formatted Data for Event {self.event.event_id}"
     
@@ -15,14 +15,13 @@ import json
 import random
 import asyncio
 import tempfile
-import cachetools
 import csv
 import gc
 
 from typing import Optional
 from asyncio import Semaphore
 from collections import defaultdict
-from typing import List, Dict, Tuple
+from typing import Dict
 from io import BytesIO, StringIO
 from contextlib import asynccontextmanager
 
@@ -31,21 +30,44 @@ from django.core.wsgi import get_wsgi_application
 from django.conf import settings
 from django.db import transaction
 from asgiref.sync import sync_to_async, async_to_sync
-from celery import shared_task
+from celery import shared_task, chord, group
+from celery.exceptions import Ignore
 from celery.utils.log import get_task_logger
 
 # Third-party imports
 import aiohttp
-from minio import Minio
 from minio.error import S3Error
-import pandas as pd
-from PIL import Image, ExifTags
-from playwright.async_api import async_playwright
+from PIL import Image
 
 # Local imports
-from auction.models import Event, ImageMetadata, AuctionFormattedData
+from auction.models import Event, ImageMetadata, AuctionFormattedData, CsvBlob
 from auction.utils import config_manager
 from auction.utils.redis_utils import RedisTaskStatus
+from auction.utils.rate_limiter import get_bucket
+from auction.utils.airtable_cache import airtable_view_cache
+from auction.utils.metrics import LatencyHistogram
+from auction.utils.minio_uploader import MinioUploader, build_minio_client, content_object_name
+from auction.utils.pipeline import Stage, StagePipeline
+from auction.utils.image_cache import ProcessedImageCache, image_cache_key
+from auction.utils.category_index import get_category_index
+from auction.utils.progress_reporter import ProgressReporter
+from auction.utils.browser_pool import get_browser_pool, await_in_worker_loop
+from auction.utils.bid_session import BidSession
+from auction.utils.memory_governor import AdaptiveLimit, build_memory_governor
+from auction.utils.adaptive_concurrency import (
+    AimdController, ServiceOverloaded, is_overload, OVERLOAD_STATUSES, OK, ERROR, OVERLOAD
+)
+from auction.utils.resilience import (
+    CircuitOpenError, is_host_failure, host_of, get_retry_policy, get_breaker, breaker_stats
+)
+from auction.utils.formatter_delta import build_key, lot_fingerprint, manifest_csv, load_previous_build
+from auction.utils.formatter_shards import ShardStore, get_shard_size
+from auction.utils.premium_selection import get_premium_selector
+from auction.utils.lot_schema import CSV_COLUMNS, EventLotHeader, Lot, LotCsvWriter
+from auction.utils.formatter_checkpoint import (
+    FormatterCheckpoint, record_fingerprint, STAGE_CSV_SAVED, STAGE_UPLOADED
+)
+from auction.utils.image_transform import ImageTransformEngine, transform_image, default_worker_count
 
 logger = get_task_logger(__name__)
 
@@ -53,22 +75,30 @@ logger = get_task_logger(__name__)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "auction_webapp.settings")
 application = get_wsgi_application()
 
-# Load configuration
-config_path = os.path.join(
+# Load configuration (benchmark_formatter points AUCTION_FORMATTER_CONFIG at a copy using local stand-ins)
+config_path = os.environ.get('AUCTION_FORMATTER_CONFIG') or os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils', 'config.json'
 )
 config_manager.load_config(config_path)
 
-# Initialize MinIO client
-minio_client = Minio(
+# Initialize MinIO client with a connection pool sized to formatter image concurrency
+MINIO_POOL_SIZE = 32 if os.environ.get('DYNO') is not None else 64
+minio_client = build_minio_client(
     endpoint=config_manager.get_global_var('minio_endpoint'),
     access_key=config_manager.get_global_var('minio_access_key'),
     secret_key=config_manager.get_global_var('minio_secret_key'),
-    secure=config_manager.get_global_var('minio_secure')
+    secure=config_manager.get_global_var('minio_secure'),
+    pool_size=MINIO_POOL_SIZE
 )
 
 # Ensure bucket exists
 bucket_name = config_manager.get_global_var('minio_bucket')
+minio_uploader = MinioUploader(
+    minio_client,
+    bucket_name,
+    config_manager.get_global_var('minio_endpoint'),
+    max_workers=MINIO_POOL_SIZE
+)
 try:
     if not minio_client.bucket_exists(bucket_name):
         minio_client.make_bucket(bucket_name)
@@ -86,152 +116,154 @@ try:
 except S3Error as e:
     logger.error(f"Error setting up MinIO bucket: {str(e)}")
 
-class RateLimiter:
-    def __init__(self, rate_limit, time_period):
-        self.rate_limit = rate_limit
-        self.time_period = time_period
-        self.semaphore = None
-
-    async def acquire(self):
-        if self.semaphore is None:
-            self.semaphore = asyncio.Semaphore(self.rate_limit)
-        await self.semaphore.acquire()
-        asyncio.create_task(self.release_after_delay())
-
-    async def release_after_delay(self):
-        await asyncio.sleep(self.time_period)
-        self.semaphore.release()
-
-# Environment-based global rate limiting
-is_heroku_env = os.environ.get('DYNO') is not None
-global_rate_limit = 20 if is_heroku_env else 50
-rate_limiter = RateLimiter(rate_limit=global_rate_limit, time_period=1)
-
-def get_image_orientation(img: Image.Image) -> int:
-    try:
-        exif = img._getexif()
-        if exif:
-            for tag, value in exif.items():
-                if ExifTags.TAGS.get(tag) == 'Orientation':
-                    return value
-    except (AttributeError, KeyError, IndexError):
-        pass
-    return None
+# Cluster-wide MinIO request budget shared by every worker process
+rate_limiter = get_bucket('minio')
+
+class ConnectionReuseStats:
+    """Counts new vs. reused connections for an aiohttp session via TraceConfig hooks"""
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return trace_config
+
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_cache_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params):
+        self.dns_cache_misses += 1
+
+    def as_dict(self) -> Dict:
+        total = self.connections_created + self.connections_reused
+        return {
+            'requests': self.requests,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'reuse_ratio': round(self.connections_reused / total, 3) if total else 0.0,
+            'dns_cache_hits': self.dns_cache_hits,
+            'dns_cache_misses': self.dns_cache_misses,
+        }
 
 
-async def download_image_async(url: str, gui_callback) -> bytes:
+def create_image_session(max_connections: int, stats: Optional[ConnectionReuseStats] = None) -> aiohttp.ClientSession:
+    """
+    Build the shared download session for one formatter run.
+    Per-host limit matches MAX_CONCURRENT_IMAGES so every image slot can hold a
+    keep-alive connection to the attachment CDN without opening a new TLS session.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=max_connections * 2,
+        limit_per_host=max_connections,
+        use_dns_cache=True,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+        enable_cleanup_closed=True
+    )
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=60),
+        trace_configs=trace_configs
+    )
+
+
+async def download_image_async(url: str, gui_callback, session: Optional[aiohttp.ClientSession] = None) -> bytes:
     if not url:
         gui_callback("Invalid input: URL is required")
         return None
 
+    if session is None:
+        # One-off callers without a shared session still work, at the cost of a new connection
+        async with aiohttp.ClientSession() as own_session:
+            return await download_image_async(url, gui_callback, own_session)
+
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    gui_callback(f"Error downloading image: HTTP {response.status}")
-                    return None
+        async with session.get(url) as response:
+            if response.status in OVERLOAD_STATUSES:
+                raise ServiceOverloaded('Image host', response.status)
+            if response.status != 200:
+                gui_callback(f"Error downloading image: HTTP {response.status}")
+                return None
 
-                content_type = response.headers.get('Content-Type', '')
-                if not content_type.startswith('image/'):
-                    gui_callback("URL does not point to an image")
-                    return None
+            content_type = response.headers.get('Content-Type', '')
+            if not content_type.startswith('image/'):
+                gui_callback("URL does not point to an image")
+                return None
 
-                content = await response.read()
-                if len(content) < 1000:
-                    gui_callback("Image is too small, might be corrupted")
-                    return None
+            content = await response.read()
+            if len(content) < 1000:
+                gui_callback("Image is too small, might be corrupted")
+                return None
 
-                return content
+            return content
 
     except Exception as e:
+        if is_host_failure(e):
+            raise  # The caller backs off instead of treating the image as bad
         gui_callback(f"Error while downloading {url}: {str(e)}")
         return None
 
-async def process_image_async(image_data: bytes, gui_callback, width_threshold: int = 1024, dpi_threshold: int = 72) -> Optional[bytes]:
+async def process_image_async(image_data: bytes, gui_callback, width_threshold: int = 1024, dpi_threshold: int = 72,
+                              engine: Optional[ImageTransformEngine] = None, timeout: Optional[float] = None) -> Optional[bytes]:
+    """
+    Run the Pillow transform off the event loop, in the engine's process pool when one is given.
+    With an engine, timeout excludes the wait for its memory budget and slots; a timeout is raised.
+    """
     try:
         if not image_data:
             gui_callback("Error: Empty image data")
             return None
 
-        # Use BytesIO to avoid disk I/O
-        with Image.open(BytesIO(image_data)) as img:
-            # Verify that the image was opened successfully
-            if not img:
-                gui_callback("Error: Failed to open image")
-                return None
-
-            # Convert to RGB early if needed
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-
-            # Handle orientation
-            orientation = get_image_orientation(img)
-            if orientation == 6:
-                img = img.transpose(Image.ROTATE_270)
-            elif orientation == 8:
-                img = img.transpose(Image.ROTATE_90)
-
-            # Resize if needed (using LANCZOS for better quality)
-            width, height = img.size
-            if width > width_threshold:
-                new_width = width_threshold
-                new_height = int(height * (new_width / width))
-                try:
-                    img = img.resize((new_width, new_height), Image.LANCZOS)
-                except Exception as resize_error:
-                    gui_callback(f"Error resizing image: {str(resize_error)}")
-                    return None
-
-            # Set DPI
-            if img.info.get('dpi', (72, 72))[0] > dpi_threshold:
-                img.info['dpi'] = (dpi_threshold, dpi_threshold)
-
-            # Optimize output
-            output = BytesIO()
-            img.save(output, 
-                    format='JPEG', 
-                    quality=85,  # Slightly reduced quality for better performance
-                    optimize=True,
-                    progressive=True)
-            return output.getvalue()
+        if engine is not None:
+            return await engine.transform(image_data, width_threshold, dpi_threshold, timeout=timeout)
+        return await asyncio.wait_for(
+            asyncio.to_thread(transform_image, image_data, width_threshold, dpi_threshold), timeout
+        )
 
-    except (IOError, OSError) as e:
-        gui_callback(f"Error opening or processing image: {str(e)}")
+    except asyncio.TimeoutError:
+        # An OSError subclass; the caller counts it as overload
+        raise
     except Image.DecompressionBombError:
         gui_callback("Error: Image is too large to process")
+    except (IOError, OSError) as e:
+        gui_callback(f"Error opening or processing image: {str(e)}")
     except Exception as e:
         gui_callback(f"Unexpected error processing image: {str(e)}")
     
     return None
 
-async def upload_file_to_minio(file_name: str, file_content: bytes, gui_callback) -> Optional[str]:
+async def upload_file_to_minio(file_name: str, file_content: bytes, gui_callback,
+                               uploader: Optional[MinioUploader] = None) -> Optional[str]:
     try:
         await rate_limiter.acquire()
-        
-        # Create a temporary file to store the content
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-
-        try:
-            # Upload to MinIO
-            minio_client.fput_object(
-                bucket_name,
-                file_name,
-                temp_file_path,
-                content_type='image/jpeg'
-            )
-            
-            # Generate public URL
-            url = f"https://{config_manager.get_global_var('minio_endpoint')}/{bucket_name}/{file_name}"
-            gui_callback(f"File uploaded successfully: {url}")
-            return url
 
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_file_path)
+        # Stream straight from memory on the uploader's thread pool
+        url = await (uploader or minio_uploader).upload(file_name, file_content, content_type='image/jpeg')
+        logger.debug(f"File uploaded successfully: {url}")
+        return url
 
     except Exception as e:
+        if is_host_failure(e):
+            raise
         gui_callback(f"Error uploading to MinIO: {str(e)}")
         return None
 
@@ -239,45 +271,12 @@ async def upload_file_via_ftp_async(file_name, file_content, gui_callback, shoul
     """Compatibility wrapper for MinIO upload"""
     return await upload_file_to_minio(file_name, file_content, gui_callback)
 
-@cachetools.cached(cache=cachetools.TTLCache(maxsize=100, ttl=3600))
-async def get_cached_airtable_records(BASE: str, TABLE: str, VIEW: str, gui_callback, airtable_token: str) -> List[Dict]:
-    return await get_airtable_records_list(BASE, TABLE, VIEW, gui_callback, airtable_token)
-
-async def get_airtable_records_list(BASE: str, TABLE: str, VIEW: str, gui_callback, airtable_token: str) -> List[Dict]:
-    gui_callback("Getting Airtable Records...")
-    response_list = []
-    offset = ""
-
-    headers = {
-        "Authorization": f"Bearer {airtable_token}",
-        "Content-Type": "application/json",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                url = f"https://api.airtable.com/v0/{BASE}/{TABLE}?view={VIEW}&pageSize=100"  # Increased page size
-                if offset:
-                    url += f"&offset={offset}"
-
-                gui_callback(f"Requesting URL: {url}")
-                async with session.get(url, headers=headers) as response:
-                    response.raise_for_status()
-                    response_json = await response.json()
-
-                records = response_json.get("records", [])
-                response_list.extend(records)
-                gui_callback(f"Retrieved {len(records)} records")
-
-                offset = response_json.get("offset")
-                if not offset:
-                    break
-            except Exception as e:
-                gui_callback(f"Exception occurred: {e}")
-                break
-
-    gui_callback(f"Retrieved a total of {len(response_list)} records from Airtable")
-    return response_list
+# The only Airtable fields process_single_record_async and prepare_record_images read
+AIRTABLE_FORMATTER_FIELDS = [
+    "Lot Number", "Product Name", "Description", "Category", "MSRP", "Auction Count",
+    "Condition", "Working Condition", "Notes", "UPC", "B00 ASIN", "Shipment", "Size",
+    "Clerk", "Location",
+] + [f"Image {j}" for j in range(1, 11)]
 
 def text_shortener(input_text: str, str_len: int) -> str:
     if len(input_text) > str_len:
@@ -294,55 +293,6 @@ def format_html_field(field_name: str, value: str) -> str:
     return f"<b>{field_name}</b>: {value}<br>" if value else ""
 
 
-def category_converter(category: str) -> int:
-    category_dict = {
-        2830472: "appliances",
-        2830485: ["arts, crafts & sewing", "arts,crafts & sewing", "arts & crafts", "arts"],
-        339711: ["automotive", "automotive parts & accessories"],
-        339747: "furniture",
-        2830498: "baby products",
-        2830511: "beauty & personal care",
-        2830524: "cell phones & accessories",
-        2830537: ["clothing", "clothing,shoes & jewelry", "clothing, shoes & jewelry"],
-        2153220: ["comics", "collectibles"],
-        339723: ["electronics", "computers & accessories"],
-        2830563: "grocery & gourmet food",
-        2830576: "health & household",
-        162703: ["home & kitchen", "storage & organization", "kitchen & dining"],
-        2830771: "industrial & scientific",
-        2830784: "medical supplies & equipment",
-        2830797: "mobility & daily living aids",
-        2673968: "musical instruments",
-        2830810: "office products",
-        2830823: ["lawn & garden", "garden & outdoor"],
-        2830836: ["dogs", "cats", "pet supplies"],
-        2830862: "restaurant appliances & equipment",
-        2830875: "sports & fitness",
-        2830914: ["lighting & ceiling fans", "tools & home improvement", "kitchen & bath fixtures", "power & hand tools"],
-        2830927: "toys & games",
-        2830940: "video games",
-        162733: "misc",
-        2830888: ["sports & outdoors", "outdoors"],
-        2831231: "movies & tv",
-        507716: "luggage",
-        507704: "drugstore",
-        2673955: "books",
-        2831248: "cds & vinyl",
-        70189253: "Pool",
-        83468654: "Christmas"
-    }
-
-    for key, value in category_dict.items():
-        if isinstance(value, str):
-            if category.lower() == value.lower():
-                return key
-        elif isinstance(value, list):
-            if category.lower() in [v.lower() for v in value]:
-                return key
-
-    return 162733  # Default category ID
-
-
 def calculate_starting_price(auction_count: int, msrp: float = 0.00, override_price: Optional[float] = None) -> str:
     """
     Calculate starting price based on auction count and MSRP:
@@ -407,118 +357,6 @@ def format_subtitle(auction_count: int, msrp: float, other_notes: str) -> str:
     return (final_msrp + " " + notes_str)[:80]
 
 
-def process_single_record(airtable_record: Dict, uploaded_image_urls: Dict[str, List[Tuple[str, int]]],
-                          auction_id: str, selected_warehouse: str, starting_price: str, gui_callback) -> Dict:
-    try:
-        record_id = airtable_record.get('id', '')
-        gui_callback(f"Processing record ID: {record_id}")
-
-        fields = airtable_record.get('fields', {})
-
-        # Calculate dynamic starting price based on auction count and MSRP
-        auction_count = fields.get("Auction Count", 0)
-        msrp = fields.get("MSRP", "0.00")
-        dynamic_starting_price = calculate_starting_price(auction_count, msrp, starting_price)
-
-        new_record = {
-            'EventID': auction_id,
-            'LotNumber': ('M' if selected_warehouse == "Maule Warehouse" else 'S' if selected_warehouse == "Sahara Warehouse" else '') + str(fields.get("Lot Number", "")),
-            'Lot Number': str(fields.get("Lot Number", "")),  # Duplicate as in original
-            'Seller': "702Auctions",
-            'ConsignorNumber': "",
-            'Category_not_formatted': fields.get("Category", ""),
-            'Category': category_converter(fields.get("Category", "")),
-            'Region': "88850842" if selected_warehouse == "Maule Warehouse" else "88850843" if selected_warehouse == "Sahara Warehouse" else "",
-            'ListingType': "Auction",
-            'Currency': "USD",
-            'Title': text_shortener(fields.get("Product Name", ""), 80),
-            'Subtitle': "",  # Will be set later
-            'Description': "",  # Will be set later
-            'Price': dynamic_starting_price,
-            'Quantity': "1",
-            'IsTaxable': "TRUE",
-            'YouTubeID': "",
-            'PdfAttachments': "",
-            'Bold': "false",
-            'Badge': "",
-            'Highlight': "false",
-            'ShippingOptions': "",
-            'Duration': "",
-            'StartDTTM': "",
-            'EndDTTM': "",
-            'AutoRelist': "0",
-            'GoodTilCanceled': "false",
-            'Working Condition': fields.get("Working Condition", ""),
-            'UPC': "",  # Will be set later with specific logic
-            'Truck': fields.get("Shipment", ""),
-            'Source': "AMZ FC",
-            'Size': fields.get("Size", ""),
-            'Photo Taker': fields.get("Clerk", ""),
-            'Packaging': "",
-            'Other Notes': fields.get("Notes", ""),
-            'MSRP': fields.get("MSRP", "0.00"),
-            'Location': fields.get("Location", ""),
-            'Item Condition': fields.get("Condition", ""),
-            'ID': record_id,
-            'Amazon ID': fields.get("B00 ASIN", ""),
-            'AuctionCount': fields.get("Auction Count", ""),
-            'HibidSearchText': fields.get("Description", ""),
-            'FullTitle': fields.get("Product Name", "")
-        }
-
-        # UPC handling
-        upc = str(fields.get("UPC", ""))
-        new_record["UPC"] = "" if upc.lower() == 'nan' or not upc.isdigit() else upc
-
-        # Subtitle
-        new_record["Subtitle"] = format_subtitle(
-            int(new_record["AuctionCount"]) if new_record["AuctionCount"] else 1,
-            float(new_record["MSRP"]) if new_record["MSRP"] else 0.00,
-            new_record["Other Notes"]
-        )
-
-        # Description
-        description_parts = [
-            format_html_field("Description", new_record['FullTitle']),
-            format_html_field("MSRP", new_record['MSRP']),
-            format_html_field("Condition", new_record['Item Condition']),
-            format_html_field("Notes", new_record['Other Notes']),
-            format_html_field("Other info", new_record['HibidSearchText']),
-            format_html_field("Lot Number", new_record['Lot Number'])
-        ]
-        new_record["Description"] = ''.join(part for part in description_parts if part)
-        new_record["Description"] += "<br><b>Pickup Information:</b> This item is available for LOCAL PICKUP ONLY. No shipping available."
-
-        # Handle image URLs
-        for i in range(1, 11):
-            new_record[f"Image_{i}"] = ''
-
-        if record_id in uploaded_image_urls:
-            gui_callback(f"Found uploaded images for record ID: {record_id}")
-            sorted_images = sorted(uploaded_image_urls[record_id], key=lambda x: x[1])
-            for url, image_number in sorted_images:
-                if 1 <= image_number <= 10:
-                    new_record[f'Image_{image_number}'] = url
-                    gui_callback(f"Assigned Image_{image_number}: {url}")
-            
-            # Check if Image_1 is present
-            if not new_record['Image_1']:
-                gui_callback(f"Warning: Image_1 is missing for record ID: {record_id}")
-                # You might want to add additional error handling or reporting here
-        else:
-            gui_callback(f"No uploaded images found for record ID: {record_id}")
-
-        gui_callback(f"Final new_record: {new_record}")
-        new_record['Success'] = True
-        return new_record
-
-    except Exception as e:
-        lot_number = fields.get('Lot Number', 'Unknown')
-        error_message = f"Error processing Lot Number {lot_number}: {str(e)}"
-        gui_callback(f"Error: {error_message}")
-        gui_callback(f"Traceback: {traceback.format_exc()}")
-        return {'Lot Number': lot_number, 'Failure Message': error_message, 'Success': False}
-
 def get_event(event_id: str) -> Event:
     try:
         return Event.objects.get(event_id=event_id)
@@ -535,16 +373,33 @@ async def organize_images(event: Event) -> None:
             await sync_to_async(image.save)()
 
 
+class ImageJob:
+    """One image of one record moving through the download, transform and upload stages"""
+    __slots__ = ('record_id', 'image_number', 'url', 'cache_key', 'file_name', 'data', 'followers')
+
+    def __init__(self, record_id, image_number, url, cache_key):
+        self.record_id = record_id
+        self.image_number = image_number
+        self.url = url
+        self.cache_key = cache_key
+        self.file_name = f"{record_id}_{image_number}.jpg"
+        self.data = None
+        self.followers = []
+
+
 class AuctionFormatter:
-    def __init__(self, event, gui_callback, should_stop, callback, selected_warehouse, starting_price, task_id):
+    def __init__(self, event, gui_callback, should_stop, callback, selected_warehouse, starting_price, task_id, resume=False, delta=False):
         self.event = event
         self.auction_id = event.event_id
-        self.gui_callback = gui_callback
+        # Every progress message goes through a throttled reporter; per-lot detail uses .trace()
+        self.gui_callback = gui_callback if isinstance(gui_callback, ProgressReporter) else ProgressReporter(gui_callback)
         self.should_stop = should_stop if should_stop is not None else asyncio.Event()
         self.callback = callback
         self.selected_warehouse = selected_warehouse
         self.starting_price = starting_price
         self.task_id = task_id
+        self.resume = resume
+        self.delta = delta
         self.total_steps = 6
         self.current_step = 0
 
@@ -558,7 +413,7 @@ class AuctionFormatter:
             self.BATCH_SIZE = 50                  # Smaller batches for memory management
             self.IMAGE_CHUNK_SIZE = 10           # Smaller chunks for stability
             self.memory_limit = 512 * 1024 * 1024  # 512MB target (safe margin)
-            gui_callback("Running on Heroku - using conservative resource settings")
+            self.gui_callback("Running on Heroku - using conservative resource settings")
         else:
             # Aggressive settings for local processing with ample resources
             self.MAX_CONCURRENT_TASKS = 32        # Increased for local processing
@@ -566,7 +421,7 @@ class AuctionFormatter:
             self.BATCH_SIZE = 100                 # Larger batches for local processing
             self.IMAGE_CHUNK_SIZE = 20           # Larger chunks for better throughput
             self.memory_limit = 2048 * 1024 * 1024  # 2GB for local processing
-            gui_callback("Running locally - using aggressive resource settings")
+            self.gui_callback("Running locally - using aggressive resource settings")
         
         # Website URLs and notification email
         self.website_login_url = config_manager.get_global_var('website_login_url')
@@ -576,18 +431,85 @@ class AuctionFormatter:
         config_manager.set_active_warehouse(selected_warehouse)
         
         self.semaphores = None
+        self.stage_limits = {}
+        self.concurrency = {}
+        self.memory_governor = None
         self.rate_limiter = None
+        self.http_session = None
+        self.connection_stats = ConnectionReuseStats()
+        self.image_cache = ProcessedImageCache()
+        self.checkpoint = FormatterCheckpoint(self.auction_id)
+        self.category_index = get_category_index(selected_warehouse)
+        self.premium_selector = get_premium_selector(selected_warehouse)
+        # Per-event CSV columns, shared by every Lot of this run
+        self.lot_header = EventLotHeader(
+            event_id=self.auction_id,
+            region="88850842" if selected_warehouse == "Maule Warehouse" else "88850843" if selected_warehouse == "Sahara Warehouse" else "",
+            lot_prefix='M' if selected_warehouse == "Maule Warehouse" else 'S' if selected_warehouse == "Sahara Warehouse" else ''
+        )
+        self.resumed_records = {}
+        self.saved_images = {}
+        self.records_fed = 0
+        self.records_assembled = 0
+        # Delta runs reuse the lots of unchanged records from the event's previous build
+        self.fingerprint_key = build_key(starting_price, self.lot_header)
+        self.previous_build = None
+        self.manifest = {}
+
+        # CPU-bound Pillow work runs in its own pool; raw images waiting for it may use
+        # at most a quarter of the memory budget before downloads are held back
+        self.transform_engine = ImageTransformEngine(
+            max_workers=default_worker_count(),
+            memory_budget=self.memory_limit // 4
+        )
 
     async def setup_resources(self):
         """Initialize resources with optimized concurrency settings"""
+        # Both limits shrink when RSS nears memory_limit and grow back once it recovers
         self.semaphores = {
-            'main': asyncio.Semaphore(self.MAX_CONCURRENT_TASKS),
-            'image': asyncio.Semaphore(self.MAX_CONCURRENT_IMAGES)
+            'main': AdaptiveLimit(self.MAX_CONCURRENT_TASKS, 'records'),
+            'image': AdaptiveLimit(self.MAX_CONCURRENT_IMAGES, 'images')
         }
-        # Environment-based rate limiting
-        is_heroku = os.environ.get('DYNO') is not None
-        rate_limit = 32 if is_heroku else 100
-        self.rate_limiter = RateLimiter(rate_limit=rate_limit, time_period=1)
+        # Image stages start low and find their own limit from latency and errors; the
+        # environment constants above are now only the upper bounds
+        self.stage_limits = {
+            'download': self.semaphores['image'],
+            'transform': AdaptiveLimit(self.transform_engine.max_in_flight, 'transforms'),
+            'upload': AdaptiveLimit(self.MAX_CONCURRENT_IMAGES, 'uploads'),
+        }
+        self.concurrency = {
+            'download': AimdController('download', self.stage_limits['download'],
+                                       initial=max(4, self.MAX_CONCURRENT_IMAGES // 8), on_change=self.publish_stage_limit),
+            'transform': AimdController('transform', self.stage_limits['transform'],
+                                        initial=self.transform_engine.max_workers, on_change=self.publish_stage_limit),
+            'upload': AimdController('upload', self.stage_limits['upload'],
+                                     initial=max(4, self.MAX_CONCURRENT_IMAGES // 8), on_change=self.publish_stage_limit),
+        }
+        for stage, limit in self.stage_limits.items():
+            self.publish_stage_limit(stage, limit.limit)
+        self.memory_governor = build_memory_governor(
+            self.memory_limit,
+            {'images': self.semaphores['image'], 'records': self.semaphores['main']},
+            report=self.report_memory_decision
+        )
+        self.memory_governor.start()
+        # One pooled session per run so attachment downloads reuse keep-alive connections
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = create_image_session(self.MAX_CONCURRENT_IMAGES, self.connection_stats)
+        self.transform_engine.start()
+        # Upload latency is reported per run
+        minio_uploader.latency = LatencyHistogram('minio_upload')
+        self.category_index.reset_stats()
+        self.rate_limiter = rate_limiter
+
+    def report_memory_decision(self, message, level, action):
+        self.gui_callback(message, level=level)
+        self.gui_callback.count('memory', action)
+        for stage, limit in self.stage_limits.items():
+            self.publish_stage_limit(stage, limit.limit)
+
+    def publish_stage_limit(self, stage, limit):
+        self.gui_callback.gauge(stage, 'limit', limit)
 
     def update_progress(self, message, sub_progress=None):
         self.current_step += 1
@@ -789,36 +711,34 @@ class AuctionFormatter:
         try:
             self.update_progress("Starting auction formatting")
 
-            airtable_records = await self.fetch_airtable_records()
-            if not airtable_records:
-                self.update_progress("Failed to fetch Airtable records")
-                return
-
-            processed_records, failed_records = await self.process_records_and_images(airtable_records)
-            self.update_progress("Records and images processed")
+            stage = await self.prepare_checkpoint()
+            if stage == STAGE_UPLOADED:
+                final_message = "Auction already formatted and uploaded - nothing to resume"
+                self.update_progress(final_message)
+                return final_message
+            if stage == STAGE_CSV_SAVED:
+                saved_csv = await self.load_saved_csv()
+                if saved_csv:
+                    self.gui_callback("Resuming from saved CSV - skipping record processing")
+                    return await self.upload_formatted_csv(saved_csv)
 
-            cleaned_csv_content = await self.generate_and_clean_csv(processed_records)
-            if not cleaned_csv_content:
-                self.update_progress("Failed to generate CSV content")
-                return
+            if self.delta:
+                await self.load_previous_build()
 
-            validation_result = self.validate_csv_content(cleaned_csv_content)
-            if not validation_result['valid']:
-                self.update_progress(f"CSV validation failed: {validation_result['message']}")
+            # Image work starts as soon as the first page of records arrives
+            try:
+                processed_records, failed_records = await self.process_record_pages(self.fetch_airtable_record_pages())
+            except Exception as e:
+                # Raised as-is so the task fails (and retries) with the real error
+                RedisTaskStatus.set_status(self.task_id, "ERROR", f"Failed to fetch Airtable records: {str(e)}")
+                self.gui_callback(f"Error fetching Airtable records: {str(e)}")
+                raise
+            if not self.records_fed:
+                self.update_progress("No records to format in the send-to-auction view")
                 return
+            self.update_progress("Records and images processed")
 
-            await self.save_formatted_data(cleaned_csv_content)
-            self.update_progress("Formatted data saved to database")
-
-            upload_success = await self.upload_csv_to_website_playwright(cleaned_csv_content)
-            if upload_success:
-                final_message = "Auction formatting process completed successfully"
-                self.update_progress(final_message)
-                return final_message
-            else:
-                error_message = "Failed to upload CSV to website"
-                self.update_progress(error_message)
-                return error_message
+            return await self.finish_run(processed_records)
 
         except Exception as e:
             error_message = f"Error in auction formatting process: {str(e)}"
@@ -827,146 +747,451 @@ class AuctionFormatter:
 
         finally:
             await self.cleanup_resources()
+            self.gui_callback.flush()
             await sync_to_async(self.callback)()
 
-    def validate_csv_content(self, csv_content):
-        expected_columns = [
-            'EventID', 'LotNumber', 'Seller', 'ConsignorNumber', 'Category', 'Region',
-            'ListingType', 'Currency', 'Title', 'Subtitle', 'Description', 'Price',
-            'Quantity', 'IsTaxable', 'Image_1', 'Image_2', 'Image_3', 'Image_4',
-            'Image_5', 'Image_6', 'Image_7', 'Image_8', 'Image_9', 'Image_10',
-            'YouTubeID', 'PdfAttachments', 'Bold', 'Badge', 'Highlight', 'ShippingOptions',
-            'Duration', 'StartDTTM', 'EndDTTM', 'AutoRelist', 'GoodTilCanceled',
-            'Working Condition', 'UPC', 'Truck', 'Source', 'Size', 'Photo Taker',
-            'Packaging', 'Other Notes', 'MSRP', 'Lot Number', 'Location', 'Item Condition',
-            'ID', 'Amazon ID'
+    async def finish_run(self, processed_records):
+        """Order the lots, then generate, validate, store and upload the CSV (also the merge step of a distributed run)"""
+        cleaned_csv_content = await self.generate_and_clean_csv(processed_records)
+        if not cleaned_csv_content:
+            self.update_progress("Failed to generate CSV content")
+            return
+
+        validation_result = self.validate_csv_content(cleaned_csv_content)
+        if not validation_result['valid']:
+            self.update_progress(f"CSV validation failed: {validation_result['message']}")
+            return
+
+        changes_csv_content = await self.finish_delta(processed_records)
+        await self.save_formatted_data(cleaned_csv_content, manifest_csv(self.manifest), changes_csv_content)
+        await asyncio.to_thread(self.checkpoint.mark_stage, STAGE_CSV_SAVED, records=len(processed_records))
+        self.update_progress("Formatted data saved to database")
+
+        return await self.upload_formatted_csv(
+            cleaned_csv_content if changes_csv_content is None else changes_csv_content
+        )
+
+    async def store_record_shards(self, store, shard_size):
+        """Split the event's records into shards of shard_size kept in `store`; returns the number of shards"""
+        shard, shard_count = [], 0
+        async for page in self.fetch_airtable_record_pages():
+            for record in page:
+                shard.append(record)
+                if len(shard) == shard_size:
+                    await asyncio.to_thread(store.save_records, shard_count, shard)
+                    shard, shard_count = [], shard_count + 1
+        if shard:
+            await asyncio.to_thread(store.save_records, shard_count, shard)
+            shard_count += 1
+        return shard_count
+
+    async def format_shard(self, records):
+        """Images and lots for one shard of a distributed run; the CSV and upload are left to the merge"""
+        try:
+            # The coordinator has already reset or kept the checkpoint; a retried shard skips what it finished
+            await self.load_checkpointed_progress()
+            if self.delta:
+                await self.load_previous_build()
+            return await self.process_records_and_images(records)
+        finally:
+            await self.cleanup_resources()
+            self.gui_callback.flush()
+
+    async def merge_shards(self, store, shard_count):
+        """Finish a distributed run from the lots its shards stored"""
+        try:
+            lots, fingerprints, failed, record_ids = await asyncio.to_thread(store.load_results, shard_count)
+            processed_records = [Lot.from_dict(self.lot_header, lot) for lot in lots]
+            self.manifest = fingerprints
+            self.gui_callback(
+                f"Merged {shard_count} shards: {len(processed_records)} lots, {len(failed)} failed records"
+            )
+            if self.delta:
+                await self.load_previous_build()
+                if self.previous_build is not None:
+                    # Records seen by any shard are not removed lots
+                    self.previous_build.seen.update(record_ids)
+            self.current_step = 1
+            self.update_progress("Records and images processed")
+            return await self.finish_run(processed_records)
+        finally:
+            self.gui_callback.flush()
+
+    async def upload_formatted_csv(self, csv_content):
+        if self.delta and csv_content.count('\n') <= 1:
+            # A delta run where nothing changed: the site already has every lot
+            await asyncio.to_thread(self.checkpoint.mark_stage, STAGE_UPLOADED)
+            final_message = "No lots changed since the previous build - nothing to upload"
+            self.update_progress(final_message)
+            return final_message
+        upload_success = await self.upload_csv_to_website_playwright(csv_content)
+        if upload_success:
+            await asyncio.to_thread(self.checkpoint.mark_stage, STAGE_UPLOADED)
+            final_message = "Auction formatting process completed successfully"
+            self.update_progress(final_message)
+            return final_message
+        else:
+            error_message = "Failed to upload CSV to website"
+            self.update_progress(error_message)
+            return error_message
+
+    async def prepare_checkpoint(self):
+        """
+        Load the previous run's progress when resuming, otherwise start a fresh checkpoint.
+        Returns the stage the previous run reached (None for a fresh run).
+        """
+        stage = await asyncio.to_thread(self.checkpoint.stage) if self.resume else None
+        if not stage:
+            if self.resume:
+                self.gui_callback("No checkpoint found for this event - starting from the beginning")
+            await asyncio.to_thread(self.checkpoint.reset, self.task_id)
+            if not self.delta:
+                # A delta run keeps the image rows of the lots it reuses
+                await sync_to_async(ImageMetadata.objects.filter(event=self.event).delete)()
+            return None
+
+        await self.load_checkpointed_progress()
+        self.gui_callback(
+            f"Resuming from stage '{stage}': {len(self.resumed_records)} records and "
+            f"{len(self.saved_images)} images already processed"
+        )
+        return stage
+
+    async def load_checkpointed_progress(self):
+        """Records assembled and images uploaded by earlier attempts at this event"""
+        self.resumed_records = await asyncio.to_thread(self.checkpoint.load_records)
+        saved = await sync_to_async(list)(
+            ImageMetadata.objects.filter(event=self.event).values_list('filename', 'image')
+        )
+        self.saved_images = dict(saved)
+
+    async def load_saved_csv(self):
+        """The CSV the interrupted run meant to upload: the changes-only CSV of a delta run, else the full one"""
+        def latest_csv():
+            formatted = (
+                AuctionFormattedData.objects.filter(event=self.event)
+                .select_related('blob', 'changes').order_by('-created_at').first()
+            )
+            if formatted is None:
+                return None
+            return formatted.changes.text if self.delta and formatted.changes else formatted.csv_data
+        return await sync_to_async(latest_csv)()
+
+    async def load_previous_build(self):
+        self.previous_build = await sync_to_async(load_previous_build)(self.event, self.lot_header)
+        if self.previous_build is None:
+            self.gui_callback("No previous build with a manifest for this event - formatting every record")
+        else:
+            self.gui_callback(f"Delta run: comparing records against {len(self.previous_build)} previously built lots")
+
+    async def finish_delta(self, processed_records):
+        """Changes-only CSV for a delta run with a previous build (None otherwise); also drops image rows of removed lots"""
+        if self.previous_build is None:
+            return None
+        changed = [
+            lot for lot in processed_records
+            if self.previous_build.is_change(lot.record_id, self.manifest.get(lot.record_id))
         ]
-        
-        df = pd.read_csv(StringIO(csv_content))
-        csv_columns = df.columns.tolist()
-        
-        if csv_columns != expected_columns:
-            missing_columns = set(expected_columns) - set(csv_columns)
-            extra_columns = set(csv_columns) - set(expected_columns)
+        removed = self.previous_build.removed()
+        if removed:
+            def delete_removed_images():
+                stale = [
+                    image_id for image_id, filename in
+                    ImageMetadata.objects.filter(event=self.event).values_list('id', 'filename')
+                    if filename.rsplit('_', 1)[0] in removed
+                ]
+                ImageMetadata.objects.filter(id__in=stale).delete()
+            await sync_to_async(delete_removed_images)()
+        self.gui_callback(
+            f"Delta run: {len(changed)} added or changed lots, "
+            f"{len(processed_records) - len(changed)} unchanged, {len(removed)} no longer in Airtable"
+        )
+        return self.generate_csv_content(changed)
+
+    def validate_csv_content(self, csv_content):
+        """Rows are validated while the CSV is written, so only the header needs checking here"""
+        header = next(csv.reader([csv_content.split('\n', 1)[0]]), [])
+        if header != CSV_COLUMNS:
+            missing_columns = set(CSV_COLUMNS) - set(header)
+            extra_columns = set(header) - set(CSV_COLUMNS)
             message = f"CSV columns do not match expected columns. Missing: {missing_columns}, Extra: {extra_columns}"
             return {'valid': False, 'message': message}
         
         return {'valid': True, 'message': "CSV content is valid"}
 
-    async def fetch_airtable_records(self):
+    async def fetch_airtable_record_pages(self):
+        """Yield pages of send-to-auction records, projected to the fields the formatter reads"""
         RedisTaskStatus.set_status(self.task_id, "IN_PROGRESS", "Fetching Airtable records")
-        try:
-            airtable_records = await get_cached_airtable_records(
-                config_manager.get_warehouse_var('airtable_inventory_base_id'),
-                config_manager.get_warehouse_var('airtable_inventory_table_id'),
-                config_manager.get_warehouse_var('airtable_send_to_auction_view_id'),
-                self.gui_callback,
-                config_manager.get_warehouse_var('airtable_api_key')
-            )
-            RedisTaskStatus.set_status(self.task_id, "IN_PROGRESS", f"Retrieved {len(airtable_records)} records from Airtable")
-            return airtable_records
-        except Exception as e:
-            RedisTaskStatus.set_status(self.task_id, "ERROR", f"Failed to fetch Airtable records: {str(e)}")
-            self.gui_callback(f"Error fetching Airtable records: {str(e)}")
-            return None
-    
+        total_records = 0
+        async for page in airtable_view_cache.iter_records(
+            config_manager.get_warehouse_var('airtable_inventory_base_id'),
+            config_manager.get_warehouse_var('airtable_inventory_table_id'),
+            config_manager.get_warehouse_var('airtable_send_to_auction_view_id'),
+            self.gui_callback,
+            config_manager.get_warehouse_var('airtable_api_key'),
+            fields=AIRTABLE_FORMATTER_FIELDS
+        ):
+            total_records += len(page)
+            yield page
+        RedisTaskStatus.set_status(self.task_id, "IN_PROGRESS", f"Retrieved {total_records} records from Airtable")
+
     def prepare_record_images(self, record):
         """Prepare and sort record images"""
         record_images = []
         for j in range(1, 11):
             image_info = record["fields"].get(f"Image {j}", [])
             if image_info:
-                record_images.append((j, image_info[0].get("url")))
+                record_images.append((j, image_info[0].get("url"), image_info[0].get("id")))
         # Sort to ensure image_1 is processed first
         record_images.sort(key=lambda x: x[0])
         return record_images
 
     async def process_records_and_images(self, airtable_records):
-        """Optimized record and image processing with increased parallelism"""
+        """Stream records through download -> transform -> upload -> assemble stages"""
+        async def single_page():
+            yield airtable_records
+
+        self.gui_callback(f"Starting to process {len(airtable_records)} records")
+        return await self.process_record_pages(single_page())
+
+    async def process_record_pages(self, pages):
+        """Feed each page of records into the pipeline as it arrives"""
         if not self.semaphores:
             await self.setup_resources()
 
-        self.gui_callback(f"Starting to process {len(airtable_records)} records")
-        processed_records = []
-        failed_records = []
-        total_records = len(airtable_records)
-
-        # Process in chunks for better memory management
-        chunk_size = self.BATCH_SIZE  # Use environment-aware batch size
-        for i in range(0, total_records, chunk_size):
-            if self.should_stop.is_set():
-                break
-
-            chunk = airtable_records[i:i+chunk_size]
-            self.gui_callback(f"Processing chunk {i//chunk_size + 1} of {(total_records + chunk_size - 1)//chunk_size}")
-
-            # Process images with higher concurrency but controlled batch size
-            image_tasks = []
-            for record in chunk:
-                record_images = self.prepare_record_images(record)
-                if record_images:
-                    record_image_tasks = [
-                        self.process_single_image_with_semaphore(
-                            self.semaphores['image'],
-                            record['id'],
-                            url,
-                            j
-                        )
-                        for j, url in record_images
-                    ]
-                    image_tasks.extend(record_image_tasks)
-
-            # Process images with environment-aware batch size
-            image_results = {}
-            batch_size = self.IMAGE_CHUNK_SIZE
-            for batch_start in range(0, len(image_tasks), batch_size):
-                batch_end = batch_start + batch_size
-                batch = image_tasks[batch_start:batch_end]
-                
-                results = await asyncio.gather(*batch, return_exceptions=True)
-                for result in results:
-                    if isinstance(result, Exception):
-                        self.gui_callback(f"Error in image processing: {str(result)}")
-                        continue
-                    if result:
-                        record_id, url, image_number = result
-                        if record_id not in image_results:
-                            image_results[record_id] = []
-                        image_results[record_id].append((url, image_number))
-
-            # Process records with controlled concurrency
-            record_tasks = [
-                self.process_single_record_with_semaphore(record, image_results.get(record['id'], []))
-                for record in chunk
-            ]
+        self.start_record_pipeline()
+        try:
+            async for page in pages:
+                if self.should_stop.is_set():
+                    break
+                for record in page:
+                    await self.feed_record(record)
+            await self.pipeline.close()
+        except BaseException:
+            self.pipeline.cancel()
+            raise
 
-            batch_results = await asyncio.gather(*record_tasks, return_exceptions=True)
-            
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    self.gui_callback(f"Error processing record: {str(result)}")
-                    continue
-                if result.get('Success', False):
-                    processed_records.append(result)
-                else:
-                    failed_records.append(result)
+        self.gui_callback(f"Processed {self.records_assembled}/{self.records_fed} records")
+        self.gui_callback(f"Pipeline stage stats: {self.pipeline.stats()}")
+        return self.processed_records, self.failed_records
+
+    def start_record_pipeline(self):
+        """Build the stage pipeline; each stage gets its own workers and a bounded input queue"""
+        self.processed_records = []
+        self.failed_records = []
+        self.records_fed = 0
+        self.records_assembled = 0
+        self.pending_records = {}
+        self.inflight_images = {}
+        self.pipeline = StagePipeline([
+            Stage('download', self.download_stage, self.MAX_CONCURRENT_IMAGES, self.MAX_CONCURRENT_IMAGES * 2,
+                  limiter=self.stage_limits['download']),
+            Stage('transform', self.transform_stage, self.transform_engine.max_in_flight, self.IMAGE_CHUNK_SIZE,
+                  limiter=self.stage_limits['transform']),
+            Stage('upload', self.upload_stage, self.MAX_CONCURRENT_IMAGES, self.IMAGE_CHUNK_SIZE * 2,
+                  limiter=self.stage_limits['upload']),
+            Stage('assemble', self.assemble_stage, 2, self.BATCH_SIZE),
+        ])
+        self.pipeline.start()
+
+    async def feed_record(self, record):
+        """Queue a record's images; cached images and records without images skip straight ahead"""
+        self.records_fed += 1
+        if self.previous_build is not None:
+            # Still in Airtable, whichever path below builds its lot
+            self.previous_build.seen.add(record['id'])
+        jobs = [
+            ImageJob(record['id'], j, url, image_cache_key(url, attachment_id))
+            for j, url, attachment_id in self.prepare_record_images(record)
+            if url
+        ]
 
-            progress = min((i + chunk_size) / total_records * 100, 100)
-            actual_processed = min(i + chunk_size, total_records)
-            self.gui_callback(f"Processed {actual_processed}/{total_records} records ({progress:.1f}%)")
+        # A resumed run reuses the previous result of an unchanged record when all of its
+        # images made it; otherwise only the missing or replaced images are redone and the
+        # record reassembled. A saved image is kept while its attachment is the same one.
+        saved = []
+        checkpointed = self.resumed_records.get(record['id'])
+        if checkpointed:
+            unchanged = checkpointed['fingerprint'] == record_fingerprint(record)
+            sources = checkpointed.get('images', {})
+            reusable = {
+                job.image_number for job in jobs
+                if job.file_name in self.saved_images and (unchanged or sources.get(str(job.image_number)) == job.cache_key)
+            }
+            saved = [(self.saved_images[job.file_name], job.image_number) for job in jobs if job.image_number in reusable]
+            jobs = [job for job in jobs if job.image_number not in reusable]
+            if unchanged and not jobs and checkpointed['result'].get('Success', False):
+                self.processed_records.append(Lot.from_dict(self.lot_header, checkpointed['result']))
+                self.manifest[record['id']] = lot_fingerprint(record, self.fingerprint_key)
+                self.gui_callback.count('records', 'resumed')
+                self.records_assembled += 1
+                return
 
-            # Memory management
-            if self.check_memory_usage() > 0.8:  # If memory usage is above 80%
-                gc.collect()  # Force garbage collection
-                await asyncio.sleep(1)  # Give system time to reclaim memory
+        if self.previous_build is not None and not saved:
+            fingerprint = lot_fingerprint(record, self.fingerprint_key)
+            lot = self.previous_build.reuse(record['id'], fingerprint)
+            if lot is not None:
+                self.processed_records.append(lot)
+                self.manifest[record['id']] = fingerprint
+                self.gui_callback.count('records', 'unchanged')
+                self.records_assembled += 1
+                return
 
-        return processed_records, failed_records
+        if not jobs:
+            await self.pipeline.put('assemble', (record, saved))
+            return
+
+        self.pending_records[record['id']] = {'record': record, 'remaining': len(jobs), 'images': saved, 'saved': len(saved)}
+        cached_urls = await asyncio.to_thread(self.image_cache.lookup_many, [job.cache_key for job in jobs])
+        for job, cached_url in zip(jobs, cached_urls):
+            if cached_url:
+                self.image_cache.hits += 1
+                self.gui_callback.count('cache', 'hit')
+                await self.complete_image(job, cached_url)
+            elif job.cache_key in self.inflight_images:
+                # Same source already being fetched in this run; share its result
+                self.image_cache.coalesced += 1
+                self.inflight_images[job.cache_key].followers.append(job)
+            else:
+                self.image_cache.misses += 1
+                self.inflight_images[job.cache_key] = job
+                await self.pipeline.put('download', job)
+
+    async def run_stage_with_retries(self, stage, job, operation, host=None, queued=False):
+        """
+        Retry one stage of one image; the bytes of earlier stages stay on the job, so only
+        this stage is repeated. Attempts back off with jitter, a host whose circuit is open
+        is not called at all, and every attempt feeds the stage's concurrency controller.
+        With queued, operation(timeout) applies the policy timeout itself, after its own
+        queue wait, so waiting for a local resource is not timed out as overload.
+        """
+        policy = get_retry_policy(stage)
+        breaker = get_breaker(host) if host else None
+        controller = self.concurrency.get(stage)
+        for attempt in range(policy.attempts):
+            if attempt:
+                await asyncio.sleep(policy.backoff(attempt - 1))
+            if breaker is not None:
+                try:
+                    breaker.check()
+                except CircuitOpenError as e:
+                    self.gui_callback.count(stage, 'circuit_open')
+                    self.gui_callback.trace(f"Skipping {stage} for image {job.image_number} of record {job.record_id}: {e}")
+                    break
+
+            started = time.monotonic()
+            result, outcome, host_failed = None, ERROR, False
+            try:
+                if queued:
+                    result = await operation(policy.timeout)
+                else:
+                    result = await asyncio.wait_for(operation(), timeout=policy.timeout)
+                outcome = OK if result else ERROR
+            except asyncio.TimeoutError:
+                outcome, host_failed = OVERLOAD, True
+                self.gui_callback.warning(f"Timed out in {stage} for image {job.image_number} of record {job.record_id} (Attempt {attempt + 1})")
+            except Exception as e:
+                outcome, host_failed = OVERLOAD if is_overload(e) else ERROR, is_host_failure(e)
+                self.gui_callback.warning(f"Error in {stage} for image {job.image_number} of record {job.record_id}: {str(e)}")
+
+            if controller is not None:
+                controller.observe(time.monotonic() - started, outcome)
+            if breaker is not None:
+                if host_failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if result:
+                self.gui_callback.count(stage, 'ok')
+                return result
+        self.gui_callback.count(stage, 'failed')
+        return None
+
+    async def download_stage(self, job):
+        job.data = await self.run_stage_with_retries(
+            'download', job, lambda: download_image_async(job.url, self.gui_callback, self.http_session),
+            host=host_of(job.url)
+        )
+        if not job.data:
+            return await self.finish_image(job, None)
+        return job
+
+    async def transform_stage(self, job):
+        raw_data = job.data
+        job.data = await self.run_stage_with_retries(
+            'transform', job,
+            lambda timeout: process_image_async(raw_data, self.gui_callback, engine=self.transform_engine, timeout=timeout),
+            queued=True
+        )
+        if not job.data:
+            return await self.finish_image(job, None)
+        return job
+
+    async def upload_stage(self, job):
+        # The object is named by its bytes, never by {record_id}_{n}.jpg, so it is safe to cache forever
+        object_name = content_object_name(job.data)
+        uploaded_url = await self.run_stage_with_retries(
+            'upload', job, lambda: upload_file_via_ftp_async(object_name, job.data, self.gui_callback, self.should_stop),
+            host=minio_uploader.public_endpoint
+        )
+        job.data = None
+        if uploaded_url:
+            await asyncio.to_thread(self.image_cache.store, job.cache_key, object_name, uploaded_url)
+        return await self.finish_image(job, uploaded_url)
+
+    async def finish_image(self, job, uploaded_url):
+        if uploaded_url is None:
+            self.gui_callback.warning(f"Giving up on image {job.image_number} for record {job.record_id}")
+        self.inflight_images.pop(job.cache_key, None)
+        await self.complete_image(job, uploaded_url)
+        for follower in job.followers:
+            await self.complete_image(follower, uploaded_url)
+        return None
+
+    async def complete_image(self, job, uploaded_url):
+        """Record one image outcome; the record moves to assembly when its last image is done"""
+        entry = self.pending_records[job.record_id]
+        if uploaded_url:
+            entry['images'].append((uploaded_url, job.image_number))
+        entry['remaining'] -= 1
+        if entry['remaining'] == 0:
+            del self.pending_records[job.record_id]
+            new_images = entry['images'][entry['saved']:]
+            if new_images:
+                try:
+                    await self.save_images_to_database({job.record_id: new_images})
+                except Exception as e:
+                    self.gui_callback.warning(f"Failed to checkpoint images for record {job.record_id}: {str(e)}")
+            await self.pipeline.put('assemble', (entry['record'], entry['images']))
+
+    async def assemble_stage(self, item):
+        record, image_results = item
+        result = await self.process_single_record_with_semaphore(record, image_results)
+        images = {
+            str(image_number): image_cache_key(url, attachment_id)
+            for image_number, url, attachment_id in self.prepare_record_images(record) if url
+        }
+        if isinstance(result, Lot):
+            await asyncio.to_thread(self.checkpoint.save_record, record, dict(result.as_dict(), Success=True), images)
+            self.processed_records.append(result)
+            self.manifest[record['id']] = lot_fingerprint(record, self.fingerprint_key)
+            self.gui_callback.count('records', 'ok')
+        else:
+            await asyncio.to_thread(self.checkpoint.save_record, record, result, images)
+            self.failed_records.append(result)
+            self.gui_callback.count('records', 'failed')
+
+        self.records_assembled += 1
+        if self.records_assembled % self.BATCH_SIZE == 0:
+            self.gui_callback(f"Processed {self.records_assembled}/{self.records_fed} records")
+            self.gui_callback(f"Pipeline stage stats: {self.pipeline.stats()}")
+        return None
 
     async def process_single_record_async(self, record, image_results):
-        """Async version of process_single_record as a method of AuctionFormatter"""
+        """Build the Lot for one record; per-event columns come from self.lot_header"""
         try:
             record_id = record.get('id', '')
-            self.gui_callback(f"Processing record ID: {record_id}")
+            self.gui_callback.trace(f"Processing record ID: {record_id}")
 
             fields = record.get('fields', {})
 
@@ -975,113 +1200,100 @@ class AuctionFormatter:
             msrp = fields.get("MSRP", "0.00")
             dynamic_starting_price = calculate_starting_price(auction_count, msrp, self.starting_price)
 
-            new_record = {
-                'EventID': self.auction_id,
-                'LotNumber': ('M' if self.selected_warehouse == "Maule Warehouse" else 'S' if self.selected_warehouse == "Sahara Warehouse" else '') + str(fields.get("Lot Number", "")),
-                'Lot Number': str(fields.get("Lot Number", "")),
-                'Seller': "702Auctions",
-                'ConsignorNumber': "",
-                'Category_not_formatted': fields.get("Category", ""),
-                'Category': category_converter(fields.get("Category", "")),
-                'Region': "88850842" if self.selected_warehouse == "Maule Warehouse" else "88850843" if self.selected_warehouse == "Sahara Warehouse" else "",
-                'ListingType': "Auction",
-                'Currency': "USD",
-                'Title': text_shortener(fields.get("Product Name", ""), 80),
-                'Subtitle': "",  # Will be set later
-                'Description': "",  # Will be set later
-                'Price': dynamic_starting_price,
-                'Quantity': "1",
-                'IsTaxable': "TRUE",
-                'YouTubeID': "",
-                'PdfAttachments': "",
-                'Bold': "false",
-                'Badge': "",
-                'Highlight': "false",
-                'ShippingOptions': "",
-                'Duration': "",
-                'StartDTTM': "",
-                'EndDTTM': "",
-                'AutoRelist': "0",
-                'GoodTilCanceled': "false",
-                'Working Condition': fields.get("Working Condition", ""),
-                'UPC': "",  # Will be set later
-                'Truck': fields.get("Shipment", ""),
-                'Source': "AMZ FC",
-                'Size': fields.get("Size", ""),
-                'Photo Taker': fields.get("Clerk", ""),
-                'Packaging': "",
-                'Other Notes': fields.get("Notes", ""),
-                'MSRP': fields.get("MSRP", "0.00"),
-                'Location': fields.get("Location", ""),
-                'Item Condition': fields.get("Condition", ""),
-                'ID': record_id,
-                'Amazon ID': fields.get("B00 ASIN", ""),
-                'AuctionCount': fields.get("Auction Count", ""),
-                'HibidSearchText': fields.get("Description", ""),
-                'FullTitle': fields.get("Product Name", "")
-            }
+            lot_number = str(fields.get("Lot Number", ""))
+            full_title = fields.get("Product Name", "")
+            other_notes = fields.get("Notes", "")
+            item_condition = fields.get("Condition", "")
 
             # UPC handling
             upc = str(fields.get("UPC", ""))
-            new_record["UPC"] = "" if upc.lower() == 'nan' or not upc.isdigit() else upc
+            upc = "" if upc.lower() == 'nan' or not upc.isdigit() else upc
 
-            # Subtitle
-            new_record["Subtitle"] = format_subtitle(
-                int(new_record["AuctionCount"]) if new_record["AuctionCount"] else 1,
-                float(new_record["MSRP"]) if new_record["MSRP"] else 0.00,
-                new_record["Other Notes"]
+            subtitle = format_subtitle(
+                int(auction_count) if auction_count else 1,
+                float(msrp) if msrp else 0.00,
+                other_notes
             )
 
-            # Description
             description_parts = [
-                format_html_field("Description", new_record['FullTitle']),
-                format_html_field("MSRP", new_record['MSRP']),
-                format_html_field("Condition", new_record['Item Condition']),
-                format_html_field("Notes", new_record['Other Notes']),
-                format_html_field("Other info", new_record['HibidSearchText']),
-                format_html_field("Lot Number", new_record['Lot Number'])
+                format_html_field("Description", full_title),
+                format_html_field("MSRP", msrp),
+                format_html_field("Condition", item_condition),
+                format_html_field("Notes", other_notes),
+                format_html_field("Other info", fields.get("Description", "")),
+                format_html_field("Lot Number", lot_number)
             ]
-            new_record["Description"] = ''.join(part for part in description_parts if part)
-            new_record["Description"] += "<br><b>Pickup Information:</b> This item is available for LOCAL PICKUP ONLY. No shipping available."
-
-            # Handle image URLs
-            for i in range(1, 11):
-                new_record[f"Image_{i}"] = ''
+            description = ''.join(part for part in description_parts if part)
+            description += "<br><b>Pickup Information:</b> This item is available for LOCAL PICKUP ONLY. No shipping available."
+
+            lot = Lot.build(
+                self.lot_header,
+                lot_number=lot_number,
+                category=self.category_index.lookup(fields.get("Category", "")),
+                title=text_shortener(full_title, 80),
+                subtitle=subtitle,
+                description=description,
+                price=dynamic_starting_price,
+                working_condition=fields.get("Working Condition", ""),
+                upc=upc,
+                truck=fields.get("Shipment", ""),
+                size=fields.get("Size", ""),
+                photo_taker=fields.get("Clerk", ""),
+                other_notes=other_notes,
+                msrp=msrp,
+                location=fields.get("Location", ""),
+                item_condition=item_condition,
+                record_id=record_id,
+                amazon_id=fields.get("B00 ASIN", ""),
+            )
 
             if image_results:  # Using passed image results instead of checking uploaded_image_urls
-                self.gui_callback(f"Found uploaded images for record ID: {record_id}")
+                self.gui_callback.trace(f"Found uploaded images for record ID: {record_id}")
                 sorted_images = sorted(image_results, key=lambda x: x[1])
                 for url, image_number in sorted_images:
                     if 1 <= image_number <= 10:
-                        new_record[f'Image_{image_number}'] = url
-                        self.gui_callback(f"Assigned Image_{image_number}: {url}")
+                        lot.set_image(image_number, url)
+                        self.gui_callback.trace(f"Assigned Image_{image_number}: {url}")
                 
-                if not new_record['Image_1']:
-                    self.gui_callback(f"Warning: Image_1 is missing for record ID: {record_id}")
+                if not lot.image_1:
+                    self.gui_callback.warning(f"Warning: Image_1 is missing for record ID: {record_id}")
             else:
-                self.gui_callback(f"No uploaded images found for record ID: {record_id}")
+                self.gui_callback.trace(f"No uploaded images found for record ID: {record_id}")
 
-            new_record['Success'] = True
-            return new_record
+            return lot
 
         except Exception as e:
             lot_number = fields.get('Lot Number', 'Unknown')
             error_message = f"Error processing Lot Number {lot_number}: {str(e)}"
-            self.gui_callback(f"Error: {error_message}")
-            self.gui_callback(f"Traceback: {traceback.format_exc()}")
+            self.gui_callback.error(f"Error: {error_message}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
             return {'Lot Number': lot_number, 'Failure Message': error_message, 'Success': False}
 
-    def check_memory_usage(self) -> float:
-        """Check current memory usage ratio"""
-        import resource
-        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Convert to bytes
-        return usage / self.memory_limit
-
     async def cleanup_resources(self):
         """Cleanup resources properly"""
         try:
-            # Clear semaphores
+            # Stop adapting concurrency and clear semaphores
+            if self.memory_governor is not None:
+                self.memory_governor.stop()
+                self.gui_callback(f"Memory governor stats: {self.memory_governor.as_dict()}")
+                self.memory_governor = None
+            if self.concurrency:
+                self.gui_callback(f"Adaptive concurrency: { {stage: controller.as_dict() for stage, controller in self.concurrency.items()} }")
             self.semaphores = None
+
+            # Close the shared download session and report how often connections were reused
+            if self.http_session is not None:
+                await self.http_session.close()
+                self.http_session = None
+                self.gui_callback(f"Image download connection stats: {self.connection_stats.as_dict()}")
+            self.gui_callback(f"MinIO upload latency: {minio_uploader.latency.as_dict()}")
+            self.gui_callback(f"Circuit breakers: {breaker_stats()}")
+            self.gui_callback(f"Processed image cache stats: {self.image_cache.as_dict()}")
+            self.gui_callback(f"Category lookup stats: {self.category_index.as_dict()}")
+            self.gui_callback(f"Progress reporting stats: {self.gui_callback.as_dict()}")
+
+            # Stop the transform workers; waiting for them to exit must not block the loop
+            await asyncio.to_thread(self.transform_engine.shutdown)
             
             # Force garbage collection
             gc.collect()
@@ -1095,64 +1307,22 @@ class AuctionFormatter:
             if not processed_records:
                 raise ValueError("No processed records to generate CSV.")
             
-            # Convert to DataFrame for sorting and duplicate handling
-            df = pd.DataFrame(processed_records)
-            self.gui_callback(f"Initial data loaded with {len(df)} records")
-            
-            # Convert MSRP to numeric for sorting
-            df['MSRP'] = pd.to_numeric(df['MSRP'], errors='coerce').round(2)
-            
-            # Filter out damaged/missing items
-            condition_mask = ~df['Subtitle'].str.contains('missing|damaged|no', 
-                                                        case=False, 
-                                                        na=False)
-            
-            # Process top items
-            potential_top = df[condition_mask].sort_values('MSRP', ascending=False)
-            
-            # Handle duplicates in top 50
-            top_50_indices = []
-            seen_titles = set()
-            duplicate_indices = []
-            
-            for idx, row in potential_top.iterrows():
-                title_key = row['Title'].lower().strip()
-                if len(top_50_indices) < 50:
-                    if title_key not in seen_titles:
-                        top_50_indices.append(idx)
-                        seen_titles.add(title_key)
-                    else:
-                        duplicate_indices.append(idx)
-            
-            # Split into groups
-            top_50_records = df.loc[top_50_indices].to_dict('records')
-            remaining_mask = ~df.index.isin(top_50_indices + duplicate_indices)
-            remaining_records = df[remaining_mask].to_dict('records')
-            duplicate_records = df.loc[duplicate_indices].to_dict('records')
-            
-            # Combine and shuffle remaining records
-            other_records = duplicate_records + remaining_records
-            random.shuffle(other_records)
-            
-            # Combine all records in final order
-            sorted_records = top_50_records + other_records
-            
-            self.gui_callback(f"Records sorted with {len(top_50_records)} premium items")
+            self.gui_callback(f"Initial data loaded with {len(processed_records)} records")
+
+            # Premium lots lead the auction; everything else is shuffled behind them
+            premium_records, other_records = self.premium_selector.select(processed_records)
+            # Seeded by event so the same lots always come out in the same order
+            random.Random(self.auction_id).shuffle(other_records)
+            sorted_records = premium_records + other_records
             
-            # Use existing generate_csv_content with sorted records
-            csv_content = self.generate_csv_content(sorted_records)
-            if not csv_content.strip():
-                raise ValueError("Generated CSV content is empty.")
+            self.gui_callback(f"Records sorted with {len(premium_records)} premium items")
             
-            # Clean using existing method
-            cleaned_csv_content = self.clean_csv_content(csv_content)
+            cleaned_csv_content = self.generate_csv_content(sorted_records)
             if not cleaned_csv_content.strip():
-                raise ValueError("Cleaned CSV content is empty.")
+                raise ValueError("Generated CSV content is empty.")
             
             self.final_csv_content = cleaned_csv_content
             self.gui_callback(f"CSV content generated successfully")
-            
-            await self.save_formatted_data(cleaned_csv_content)
             return cleaned_csv_content
 
         except Exception as e:
@@ -1163,63 +1333,6 @@ class AuctionFormatter:
             logger.error(traceback.format_exc())
             raise
         
-    async def process_single_image_with_semaphore(self, semaphore, record_id, url, image_number):
-        """Optimized image processing with reduced delays"""
-        async with semaphore:
-            for attempt in range(3):
-                try:
-                    self.gui_callback(f"Processing image {image_number} for record {record_id} (Attempt {attempt + 1})")
-                    
-                    # Reduced timeout for faster failure detection
-                    try:
-                        image_data = await asyncio.wait_for(
-                            download_image_async(url, self.gui_callback),
-                            timeout=60  # Increased for large batches
-                        )
-                        if not image_data:
-                            await asyncio.sleep(1)  # Reduced delay
-                            continue
-                    except asyncio.TimeoutError: 
-                        await asyncio.sleep(1)
-                        continue
-
-                    try:
-                        processed_data = await asyncio.wait_for(
-                            process_image_async(image_data, self.gui_callback),
-                            timeout=60  # Increased for large images
-                        )
-                        if not processed_data:
-                            await asyncio.sleep(1)
-                            continue
-                    except asyncio.TimeoutError:
-                        await asyncio.sleep(1)
-                        continue
-
-                    try:
-                        file_name = f"{record_id}_{image_number}.jpg"
-                        uploaded_url = await asyncio.wait_for(
-                            upload_file_via_ftp_async(
-                                file_name,
-                                processed_data,
-                                self.gui_callback,
-                                self.should_stop
-                            ),
-                            timeout=60  # Increased for large uploads
-                        )
-                        
-                        if uploaded_url:
-                            return (record_id, uploaded_url, image_number)
-                    except asyncio.TimeoutError:
-                        await asyncio.sleep(1)
-                    
-                    await asyncio.sleep(1)
-
-                except Exception as e:
-                    self.gui_callback(f"Error processing image {image_number} for record {record_id}: {str(e)}")
-                    await asyncio.sleep(1)
-
-            return None
-
     async def process_single_record_with_semaphore(self, record, image_results):
         """Process single record with semaphore control"""
         try:
@@ -1229,25 +1342,6 @@ class AuctionFormatter:
             self.gui_callback(f"Error processing record {record.get('id', 'unknown')}: {str(e)}")
             return {'id': record.get('id', 'unknown'), 'error': str(e), 'Success': False}
 
-    async def download_and_process_image(self, record_id, url, image_number, image_data_dict):
-        image_data = await download_image_async(url, self.gui_callback)
-        if image_data:
-            processed_image_data = await process_image_async(image_data, self.gui_callback)
-            # Free up memory by deleting the original image data
-            del image_data
-            if processed_image_data:
-                image_data_dict[record_id].append((processed_image_data, image_number))
-
-    async def upload_image_and_get_url(self, record_id, image_data, image_number, uploaded_image_urls):
-        file_name = f"{record_id}_{image_number}.jpg"
-        url = await upload_file_via_ftp_async(file_name, image_data, self.gui_callback)
-        # Free up memory by deleting the processed image data
-        del image_data
-        if url:
-            if not url.startswith("https://"):
-                url = "https://" + url
-            uploaded_image_urls[record_id].append((url, image_number))
-
     async def save_images_to_database(self, uploaded_image_urls):
         image_metadata = []
         for record_id, urls in uploaded_image_urls.items():
@@ -1258,95 +1352,57 @@ class AuctionFormatter:
                     is_primary=(image_number == 1),
                     image=url
                 ))
-        await sync_to_async(ImageMetadata.objects.bulk_create)(image_metadata)
 
-    async def process_record(self, record, uploaded_image_urls, processed_records, failed_records):
-        try:
-            result = process_single_record(
-                record, uploaded_image_urls, self.auction_id, self.selected_warehouse, self.starting_price, self.gui_callback
-            )
-            if result.get('Success', False):
-                processed_records.append(result['Data'])
-            else:
-                failed_records.append(result)
-        except Exception as e:
-            self.gui_callback(f"Error processing record {record['id']}: {str(e)}")
-            failed_records.append({'RecordID': record['id'], 'Error': str(e)})
+        def save():
+            if self.delta:
+                # A rebuilt lot replaces the image rows kept from the previous build
+                ImageMetadata.objects.filter(
+                    event=self.event, filename__in=[metadata.filename for metadata in image_metadata]
+                ).delete()
+            ImageMetadata.objects.bulk_create(image_metadata)
+        await sync_to_async(save)()
 
     def generate_csv_content(self, processed_records):
-        expected_columns = [
-            'EventID', 'LotNumber', 'Seller', 'ConsignorNumber', 'Category', 'Region',
-            'ListingType', 'Currency', 'Title', 'Subtitle', 'Description', 'Price',
-            'Quantity', 'IsTaxable', 'Image_1', 'Image_2', 'Image_3', 'Image_4',
-            'Image_5', 'Image_6', 'Image_7', 'Image_8', 'Image_9', 'Image_10',
-            'YouTubeID', 'PdfAttachments', 'Bold', 'Badge', 'Highlight', 'ShippingOptions',
-            'Duration', 'StartDTTM', 'EndDTTM', 'AutoRelist', 'GoodTilCanceled',
-            'Working Condition', 'UPC', 'Truck', 'Source', 'Size', 'Photo Taker',
-            'Packaging', 'Other Notes', 'MSRP', 'Lot Number', 'Location', 'Item Condition',
-            'ID', 'Amazon ID'
-        ]
-        
-        output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=expected_columns)
-        writer.writeheader()
-        
-        default_values = {
-            'EventID': self.auction_id,
-            'Seller': '702Auctions',
-            'ListingType': 'Auction',
-            'Currency': 'USD',
-            'Quantity': '1',
-            'IsTaxable': 'true',
-            'Bold': 'false',
-            'Highlight': 'false',
-            'ShippingOptions': '',
-            'AutoRelist': '0',
-            'GoodTilCanceled': 'false'
-        }
-        
-        for record in processed_records:
-            new_record = {column: str(record.get(column, '')) for column in expected_columns}
-            new_record.update(default_values)
-            
-            # Convert boolean fields to lowercase strings
-            for field in ['Bold', 'Highlight', 'GoodTilCanceled']:
-                new_record[field] = str(new_record[field]).lower()
-            
-            writer.writerow(new_record)
-        
-        return output.getvalue()
-    
-    def clean_csv_content(self, csv_content):
-        df = pd.read_csv(StringIO(csv_content))
-        
-        # Ensure 'Price' is a valid decimal
-        df['Price'] = pd.to_numeric(df['Price'], errors='coerce').fillna(0).round(2).astype(str)
-        
-        # Ensure 'Quantity' is an integer
-        df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce').fillna(1).astype(int).astype(str)
-        
-        # Ensure 'Category' is an integer
-        df['Category'] = pd.to_numeric(df['Category'], errors='coerce').fillna(162733).astype(int).astype(str)
-        
-        # Use a more efficient method to write CSV
-        buffer = StringIO()
-        df.to_csv(buffer, index=False)
-        return buffer.getvalue()
-
-    async def save_formatted_data(self, csv_content):
-        await sync_to_async(AuctionFormattedData.objects.create)(
-            event=self.event,
-            csv_data=csv_content
-        )
+        """Write the already-formatted lots in one pass; rows are checked against the lot schema as they go"""
+        with LotCsvWriter(self.lot_header) as writer:
+            writer.write_all(processed_records)
+            return writer.getvalue()
+
+    async def save_formatted_data(self, csv_content, manifest_content=None, changes_content=None):
+        """Store the CSV compressed and content-addressed; a re-run producing the same CSV adds nothing"""
+        def save():
+            blob = CsvBlob.store(csv_content)
+            manifest = CsvBlob.store(manifest_content) if manifest_content is not None else None
+            changes = CsvBlob.store(changes_content) if changes_content is not None else None
+            latest = (
+                AuctionFormattedData.objects.filter(event=self.event)
+                .order_by('-created_at').values_list('blob_id', 'manifest_id', 'changes_id').first()
+            )
+            ids = (blob.id, manifest and manifest.id, changes and changes.id)
+            if latest != ids:
+                AuctionFormattedData.objects.create(event=self.event, blob=blob, manifest=manifest, changes=changes)
+            return blob
+        blob = await sync_to_async(save)()
+        self.gui_callback(f"Formatted CSV stored as {blob.sha256[:12]}: {blob.size} bytes, {blob.compressed_size} compressed")
 
     async def upload_csv_to_website_playwright(self, csv_content):
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        """Upload through the worker's long-lived browser; Playwright calls must run on the pool's own loop"""
+        result = await await_in_worker_loop(self.upload_csv_with_browser, csv_content)
+        self.gui_callback(f"Browser pool stats: {get_browser_pool().as_dict()}")
+        return result
+
+    async def upload_csv_with_browser(self, csv_content):
+        username, password = self.get_maule_login_credentials()
+        # Most uploads start from the cached session and never see the login form
+        session = BidSession(username, report=self.gui_callback)
 
+        async def login(page):
+            await get_bucket('bid_site').acquire()
+            return await self.login_to_website(page, username, password)
+
+        async with session.page() as page:
             try:
-                username, password = self.get_maule_login_credentials()
-                login_success = await self.login_to_website(page, username, password)
+                login_success = await session.open(page, self.import_csv_url, login)
 
                 if not login_success:
                     self.gui_callback("Login to auction site failed")
@@ -1363,22 +1419,22 @@ class AuctionFormatter:
             except Exception as e:
                 self.gui_callback(f"Error during CSV upload process: {str(e)}")
                 return False
-            finally:
-                await browser.close()
 
 @shared_task(bind=True)
-def auction_formatter_task(self, auction_id, selected_warehouse, starting_price):
+def auction_formatter_task(self, auction_id, selected_warehouse, starting_price, resume=False, delta=False, distributed=False):
     config_manager.set_active_warehouse(selected_warehouse)
     
     try:
         with transaction.atomic():
             event = Event.objects.get(event_id=auction_id)
         
-        def progress_callback(message, percentage=None):
+        def progress_callback(message, percentage=None, stages=None):
             state = 'PROGRESS'
             meta = {'status': message}
             if percentage is not None:
                 meta['progress'] = percentage
+            if stages:
+                meta['stages'] = stages
             self.update_state(state=state, meta=meta)
             logger.info(f"Progress: {message} - {percentage}%")
         
@@ -1389,9 +1445,15 @@ def auction_formatter_task(self, auction_id, selected_warehouse, starting_price)
             callback=lambda: None,
             selected_warehouse=selected_warehouse,
             starting_price=starting_price,
-            task_id=self.request.id
+            task_id=self.request.id,
+            resume=resume,
+            delta=delta
         )
         
+        if distributed and dispatch_formatter_shards(self, formatter, selected_warehouse, starting_price, delta):
+            # The merge task reports completion under this task's id
+            raise Ignore()
+
         asyncio.run(formatter.run_auction_formatter())
         
         final_message = "Auction formatting completed successfully"
@@ -1405,8 +1467,140 @@ def auction_formatter_task(self, auction_id, selected_warehouse, starting_price)
         logger.error(error_message)
         raise
 
+    except Ignore:
+        raise
+
     except Exception as e:
         error_message = f"Error in auction formatting process: {str(e)}"
         RedisTaskStatus.set_status(self.request.id, "FAILURE", error_message, 100)
         logger.error(f"{error_message}\n{traceback.format_exc()}")
-        raise self.retry(exc=e, max_retries=3)
\ No newline at end of file
+        # Retries continue from the checkpoint instead of starting over
+        raise self.retry(exc=e, max_retries=3, kwargs={'resume': True, 'delta': delta, 'distributed': distributed})
+
+
+def dispatch_formatter_shards(task, formatter, selected_warehouse, starting_price, delta):
+    """
+    Fan a run out across the workers: the records are split into shards in Redis, a
+    group of format_shard_task builds their images and lots, and merge_formatter_shards_task
+    runs as the chord callback. Returns False when there is nothing to fan out and the
+    run should finish in this process (a resume past the image stage, or no records).
+    """
+    stage = asyncio.run(formatter.prepare_checkpoint())
+    if stage in (STAGE_CSV_SAVED, STAGE_UPLOADED):
+        return False
+
+    run_id = task.request.id
+    store = ShardStore(run_id)
+    shard_count = asyncio.run(formatter.store_record_shards(store, get_shard_size()))
+    if not shard_count:
+        return False
+
+    # Reported before dispatch so it cannot overwrite a state the shards or the merge have set
+    formatter.update_progress(f"Formatting {shard_count} shards across workers")
+    args = (run_id, shard_count, formatter.auction_id, selected_warehouse, starting_price, delta)
+    header = group(format_shard_task.s(shard, *args) for shard in range(shard_count))
+    chord(header)(merge_formatter_shards_task.s(*args).on_error(formatter_shards_failed_task.s(run_id)))
+    return True
+
+
+@shared_task(bind=True)
+def format_shard_task(self, shard, run_id, shard_count, auction_id, selected_warehouse, starting_price, delta=False):
+    """One shard of a distributed run; its lots go back to Redis, only a summary to the result backend"""
+    config_manager.set_active_warehouse(selected_warehouse)
+    store = ShardStore(run_id)
+    event = Event.objects.get(event_id=auction_id)
+
+    def progress_callback(message, percentage=None, stages=None):
+        # Shards report under the coordinating task's id, which is the one the page polls
+        meta = {'status': f"[shard {shard + 1}/{shard_count}] {message}"}
+        if stages:
+            meta['stages'] = stages
+        self.update_state(task_id=run_id, state='PROGRESS', meta=meta)
+        logger.info(f"Shard {shard + 1}/{shard_count} progress: {message}")
+
+    formatter = AuctionFormatter(
+        event=event,
+        gui_callback=progress_callback,
+        should_stop=asyncio.Event(),
+        callback=lambda: None,
+        selected_warehouse=selected_warehouse,
+        starting_price=starting_price,
+        task_id=run_id,
+        delta=delta
+    )
+
+    try:
+        records = store.load_records(shard)
+        processed_records, failed_records = asyncio.run(formatter.format_shard(records))
+        done = store.save_results(
+            shard,
+            [lot.as_dict() for lot in processed_records],
+            formatter.manifest,
+            failed_records,
+            [record['id'] for record in records]
+        )
+    except Exception as e:
+        logger.error(f"Error in formatter shard {shard + 1}/{shard_count} of {run_id}: {e}\n{traceback.format_exc()}")
+        # The checkpoint lets a retry skip the records this attempt finished
+        raise self.retry(exc=e, max_retries=2, countdown=10)
+
+    message = f"Shard {shard + 1}/{shard_count} finished: {len(processed_records)} lots, {len(failed_records)} failed"
+    self.update_state(task_id=run_id, state='PROGRESS', meta={'status': message, 'progress': done / shard_count * 90})
+    RedisTaskStatus.set_status(run_id, "IN_PROGRESS", message, done / shard_count * 90)
+    return {'shard': shard, 'lots': len(processed_records), 'failed': len(failed_records)}
+
+
+@shared_task(bind=True)
+def merge_formatter_shards_task(self, shard_summaries, run_id, shard_count, auction_id, selected_warehouse, starting_price, delta=False):
+    """Chord callback of a distributed run: premium ordering, CSV and the single bid-site upload"""
+    config_manager.set_active_warehouse(selected_warehouse)
+    store = ShardStore(run_id)
+
+    def progress_callback(message, percentage=None, stages=None):
+        meta = {'status': message}
+        if percentage is not None:
+            meta['progress'] = percentage
+        if stages:
+            meta['stages'] = stages
+        self.update_state(task_id=run_id, state='PROGRESS', meta=meta)
+        logger.info(f"Progress: {message} - {percentage}%")
+
+    try:
+        event = Event.objects.get(event_id=auction_id)
+        formatter = AuctionFormatter(
+            event=event,
+            gui_callback=progress_callback,
+            should_stop=asyncio.Event(),
+            callback=lambda: None,
+            selected_warehouse=selected_warehouse,
+            starting_price=starting_price,
+            task_id=run_id,
+            delta=delta
+        )
+        asyncio.run(formatter.merge_shards(store, shard_count))
+
+        final_message = "Auction formatting completed successfully"
+        RedisTaskStatus.set_status(run_id, "COMPLETED", final_message, 100)
+        self.backend.mark_as_done(run_id, final_message)
+        logger.info(final_message)
+        return final_message
+
+    except Exception as e:
+        error_message = f"Error in auction formatting process: {str(e)}"
+        RedisTaskStatus.set_status(run_id, "FAILURE", error_message, 100)
+        self.backend.mark_as_failure(run_id, e, traceback=traceback.format_exc())
+        logger.error(f"{error_message}\n{traceback.format_exc()}")
+        raise
+
+    finally:
+        store.delete()
+
+
+@shared_task
+def formatter_shards_failed_task(request, exc, exc_traceback, run_id):
+    """Chord error callback: fail the coordinating task so the page stops polling, and drop the shard data"""
+    error_message = f"Error in auction formatting process: {exc}"
+    RedisTaskStatus.set_status(run_id, "FAILURE", error_message, 100)
+    formatter_shards_failed_task.backend.mark_as_failure(run_id, exc, traceback=exc_traceback)
+    logger.error(f"Distributed formatter run {run_id} failed in task {request.id}: {exc}")
+    ShardStore(run_id).delete()
\ No newline at end of file
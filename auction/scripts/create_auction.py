@@ -7,7 +7,8 @@ import threading
 import sys
 import asyncio
 from datetime import datetime, timedelta
-from playwright.async_api import async_playwright
+from auction.utils.browser_pool import get_browser_pool, run_in_worker_loop
+from auction.utils.bid_session import BidSession
 from auction.utils import config_manager
 import logging
 from asgiref.sync import sync_to_async
@@ -17,6 +18,7 @@ from django.conf import settings
 from django.utils.timezone import make_aware
 from django.db import transaction
 from auction.utils.redis_utils import RedisTaskStatus
+from auction.utils.rate_limiter import get_bucket
 from celery.utils.log import get_task_logger
 from celery import current_task
 from celery import shared_task
@@ -52,16 +54,8 @@ def create_auction_task(self, auction_title, ending_date, selected_warehouse):
     else:
         raise TypeError("ending_date must be a string or datetime object")
     
-    async def run_task():
-        return await create_auction_main(auction_title, ending_date, selected_warehouse, task_id)
-
-    # Create a new event loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(run_task())
-    finally:
-        loop.close()
+    # Runs on the worker's browser loop, which outlives this task
+    return run_in_worker_loop(create_auction_main, auction_title, ending_date, selected_warehouse, task_id)
 
 def get_maule_login_credentials():
     # Temporarily set the active warehouse to Maule
@@ -200,6 +194,7 @@ async def login_relaythat(page, username, password, url):
 async def login_auction_site(page, username, password, url):
     """Logs in to the auction site using provided credentials."""
     try:
+        await get_bucket('bid_site').acquire()
         await page.goto(url)
         await page.wait_for_load_state('networkidle', timeout=60000)
         
@@ -339,19 +334,18 @@ async def create_auction(page, auction_title, image_path, formatted_start_date,
         bid_create_event = config_manager.get_global_var('bid_create_event')
         website_login_url = config_manager.get_global_var('website_login_url')
         
-        # Navigate to the login page first
-        await page.goto(website_login_url)
-        
-        logger.info('Logging in to auction site using Maule Warehouse credentials...')
+        # Opens the auction creation page, logging in only if the cached session has expired
+        logger.info('Opening auction creation page using Maule Warehouse credentials...')
         bid_username, bid_password = get_maule_login_credentials()
-        login_success = await login_auction_site(page, bid_username, bid_password, website_login_url)
+        session = BidSession(bid_username)
+        login_success = await session.open(
+            page, bid_create_event, lambda page: login_auction_site(page, bid_username, bid_password, website_login_url)
+        )
         if not login_success:
             logger.error("Failed to log in to auction site. Aborting process.")
             await page.screenshot(path='auction_site_login_failed.png')
             return None
         
-        # Navigate to the auction creation page after login
-        await page.goto(bid_create_event)
         await page.wait_for_load_state('networkidle', timeout=60000)
 
         logger.info('Filling auction details...')
@@ -479,12 +473,8 @@ async def create_auction_main(auction_title, ending_date, selected_warehouse, ta
         month_formatted_date, bid_formatted_ending_date = format_date(ending_date)
         current_task.update_state(state='PROGRESS', meta={'status': f"Auction dates formatted: {month_formatted_date}, ending on {bid_formatted_ending_date}"})
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            current_task.update_state(state='PROGRESS', meta={'status': "Browser launched for auction creation"})
+        async with get_browser_pool().page() as page:
+            current_task.update_state(state='PROGRESS', meta={'status': "Browser ready for auction creation"})
 
             formatted_start_date = datetime.now().strftime('%m/%d/%Y')
             current_task.update_state(state='PROGRESS', meta={'status': f"Retrieving auction image for {month_formatted_date}"})
@@ -26,7 +26,8 @@ from django.core.wsgi import get_wsgi_application
 from django.db import transaction
 import tempfile
 from asgiref.sync import sync_to_async
-from playwright.async_api import async_playwright
+from auction.utils.browser_pool import get_browser_pool, run_in_worker_loop
+from auction.utils.bid_session import BidSession
 import asyncio
 import aiohttp
 
@@ -36,8 +37,9 @@ logger = logging.getLogger(__name__)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "auction_webapp.settings")
 application = get_wsgi_application()
 
-from auction.models import Event, VoidedTransaction
+from auction.models import Event, VoidedTransaction, CsvBlob
 from auction.utils import config_manager
+from auction.utils.rate_limiter import get_bucket
 
 config_path = os.path.join(os.path.dirname(__file__), '..', 'utils', 'config.json')
 
@@ -47,7 +49,7 @@ AIRTABLE_URL = lambda base_id, table_id: f'https://api.airtable.com/v0/{base_id}
 def save_csv_to_database(event_id, csv_content):
     with transaction.atomic():
         event, created = Event.objects.get_or_create(event_id=event_id)
-        VoidedTransaction.objects.create(event=event, csv_data=csv_content)
+        VoidedTransaction.objects.create(event=event, blob=CsvBlob.store(csv_content))
 
 async def export_csv(page, event_id):
     logger.info("Starting CSV export...")
@@ -104,7 +106,7 @@ def void_unpaid_main(self, event_id, upload_choice, warehouse):
 
         # Running async Playwright process
         try:
-            asyncio.run(start_playwright_process(event_id, upload_choice, task_id))
+            run_in_worker_loop(start_playwright_process, event_id, upload_choice, task_id)
         except Exception as e:
             logger.error(f"Error in start_playwright_process: {str(e)}")
             self.update_state(state="FAILURE", meta={'status': f"Error in void unpaid process: {str(e)}"})
@@ -128,6 +130,7 @@ def void_unpaid_main(self, event_id, upload_choice, warehouse):
 async def login(page, username, password):
     """Logs in to the auction site using provided credentials."""
     try:
+        await get_bucket('bid_site').acquire()
         # Wait for and fill username field
         logger.info("Waiting for username field to be visible...")
         await page.wait_for_selector("#username", state="visible", timeout=30000)
@@ -195,27 +198,27 @@ async def start_playwright_process(event_id, upload_choice, task_id):
     logger.info(f"Report URL: {report_url}")
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
-            context = await browser.new_context()
-            page = await context.new_page()
-            
+        async with get_browser_pool().page() as page:
             current_task.update_state(state="PROGRESS", meta={'status': "Logging in to the auction site"})
             RedisTaskStatus.set_status(task_id, "IN_PROGRESS", "Logging in to the auction site")
             
-            await page.goto(login_url)
             username = config_manager.get_warehouse_var("bid_username")
             password = config_manager.get_warehouse_var("bid_password")
             if username is None or password is None:
                 raise ValueError("Failed to retrieve login credentials from config.")
-            
-            login_success = await login(page, username, password)
+
+            async def login_from_logon_page(page):
+                await page.goto(login_url)
+                return await login(page, username, password)
+
+            # Opens the report page, logging in only if the cached session has expired
+            session = BidSession(username)
+            login_success = await session.open(page, report_url, login_from_logon_page)
             if not login_success:
                 raise Exception("Login failed. Aborting process.")
 
             current_task.update_state(state="PROGRESS", meta={'status': "Navigating to report page"})
             RedisTaskStatus.set_status(task_id, "IN_PROGRESS", "Navigating to report page")
-            await page.goto(report_url)
             try:
                 await page.wait_for_selector("#ReportResults", state="visible", timeout=60000)
             except:
@@ -255,9 +258,6 @@ async def start_playwright_process(event_id, upload_choice, task_id):
         RedisTaskStatus.set_status(task_id, "ERROR", error_message)
         raise
     finally:
-        logger.info("Closing browser")
-        if 'browser' in locals():
-            await browser.close()
         if csv_content:
             success_message = f"Process completed. CSV data saved to database for event {event_id}."
             logger.info(success_message)
@@ -421,6 +421,7 @@ async def void_transaction(page):
     is_heroku = os.environ.get('DYNO') is not None
     delay = 2 if is_heroku else 3  # Conservative on Heroku, more relaxed locally
     
+    await get_bucket('bid_site').acquire()
     await page.click("#ReportResults > div:nth-child(2) > div:nth-child(6) > a")
     await asyncio.sleep(delay)
     await page.click(".modal .btn.btn-danger")
@@ -5,10 +5,10 @@ from auction.models import Event
 from auction.scripts.auction_formatter import auction_formatter_task
 from auction.scripts.create_auction import format_date, get_image, create_auction, save_event_to_database, create_auction_main
 from auction.utils import config_manager
+from auction.utils.browser_pool import run_in_worker_loop
 from auction.scripts.void_unpaid_on_bid import start_playwright_process, void_unpaid_main
 from auction.scripts.remove_duplicates_in_airtable import run_remove_dups, get_valid_auctions
 import logging
-import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -46,15 +46,8 @@ def create_auction_task(self, auction_title, ending_date, selected_warehouse, en
     else:
         raise TypeError("ending_date must be a string or datetime object")
     
-    async def run_async_task():
-        return await create_auction_main(auction_title, ending_date, selected_warehouse, task_id, ending_time)
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(run_async_task())
-    finally:
-        loop.close()
+    # Runs on the worker's browser loop, which outlives this task
+    return run_in_worker_loop(create_auction_main, auction_title, ending_date, selected_warehouse, task_id, ending_time)
 
 @shared_task(bind=True)
 def void_unpaid_task(self, event_id, upload_choice, warehouse):
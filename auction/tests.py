@@ -1,3 +1,554 @@
+import asyncio
+import datetime
+import random
+import gzip
+import time
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+import pandas as pd
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+
+from auction.models import AuctionFormattedData, CsvBlob, Event, ImageMetadata
+from auction.scripts.auction_formatter import AuctionFormatter
+from auction.utils import config_manager
+from auction.utils.browser_pool import BrowserPool, BrowserSlots
+from auction.utils.category_index import DEFAULT_CATEGORY_ID, CategoryIndex, get_category_index, normalize_category
+from auction.utils.formatter_checkpoint import record_fingerprint
+from auction.utils.image_cache import ProcessedImageCache
+from auction.utils.image_transform import ImageTransformEngine
+from auction.utils.formatter_delta import PreviousBuild, build_key, lot_fingerprint, manifest_csv
+from auction.utils.lot_schema import EventLotHeader
+from auction.utils.memory_governor import AdaptiveLimit
+from auction.utils.premium_selection import PremiumSelector
+from auction.utils.rate_limiter import TokenBucket
+from auction.utils.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, RetryPolicy
+)
+from auction.utils.minio_uploader import content_object_name
+from auction.utils.progress_reporter import ProgressReporter
+from auction.views import accepts_gzip
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.queued = []
+
+    async def put(self, stage, item):
+        self.queued.append((stage, item))
+
+
+class MissingImageCache:
+    hits = misses = coalesced = 0
+
+    def lookup_many(self, keys):
+        return [None] * len(keys)
+
+
+class DictRedis:
+    """Just the string commands ProcessedImageCache uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+class DeltaResumeTests(TestCase):
+    """A resumed delta run must not treat records it finishes from the checkpoint as removed"""
+
+    def setUp(self):
+        today = datetime.date.today()
+        self.event = Event.objects.create(
+            event_id='E100', warehouse='Maule Warehouse', title='Test', start_date=today, ending_date=today
+        )
+        header = EventLotHeader(event_id='E100', region='88850842', lot_prefix='M')
+        key = build_key('10', header)
+        self.records = {
+            record_id: {
+                'id': record_id,
+                'fields': {
+                    'Product Name': f'Item {record_id}',
+                    'Image 1': [{'url': f'https://img.example/{record_id}/1.jpg', 'id': f'att{record_id}1'}],
+                    'Image 2': [{'url': f'https://img.example/{record_id}/2.jpg', 'id': f'att{record_id}2'}],
+                },
+            }
+            for record_id in ('recDone', 'recPartial', 'recGone')
+        }
+        # Every record changed since the previous build, so none can be reused from it
+        previous = PreviousBuild(
+            'ID\n' + ''.join(f'{record_id}\n' for record_id in self.records),
+            manifest_csv({record_id: 'stale' for record_id in self.records}),
+            header,
+        )
+
+        for record_id in self.records:
+            for image_number in (1, 2):
+                ImageMetadata.objects.create(
+                    event=self.event, filename=f'{record_id}_{image_number}.jpg',
+                    image=f'https://minio.example/{record_id}_{image_number}.jpg'
+                )
+        saved_images = {
+            filename: url for filename, url in
+            ImageMetadata.objects.values_list('filename', 'image')
+            if filename != 'recPartial_2.jpg'
+        }
+
+        formatter = AuctionFormatter.__new__(AuctionFormatter)
+        formatter.event = self.event
+        formatter.lot_header = header
+        formatter.fingerprint_key = key
+        formatter.gui_callback = ProgressReporter(lambda *args, **kwargs: None)
+        formatter.previous_build = previous
+        formatter.manifest = {}
+        formatter.saved_images = saved_images
+        formatter.resumed_records = {
+            record_id: {
+                'fingerprint': record_fingerprint(self.records[record_id]),
+                'result': {'Success': True, 'ID': record_id, 'Title': f'Item {record_id}', 'Lot Number': '1'},
+            }
+            for record_id in ('recDone', 'recPartial')
+        }
+        formatter.image_cache = MissingImageCache()
+        formatter.pipeline = RecordingPipeline()
+        formatter.processed_records = []
+        formatter.records_fed = 0
+        formatter.records_assembled = 0
+        formatter.pending_records = {}
+        formatter.inflight_images = {}
+        self.formatter = formatter
+
+    def test_checkpointed_records_are_not_removed(self):
+        # recGone is no longer in Airtable and is not fed
+        async_to_sync(self.formatter.feed_record)(self.records['recDone'])
+        async_to_sync(self.formatter.feed_record)(self.records['recPartial'])
+
+        self.assertEqual(self.formatter.records_assembled, 1)
+        self.assertEqual([stage for stage, _ in self.formatter.pipeline.queued], ['download'])
+        self.assertEqual(self.formatter.previous_build.removed(), {'recGone'})
+
+        async_to_sync(self.formatter.finish_delta)(self.formatter.processed_records)
+        self.assertEqual(
+            sorted(ImageMetadata.objects.filter(event=self.event).values_list('filename', flat=True)),
+            ['recDone_1.jpg', 'recDone_2.jpg', 'recPartial_1.jpg', 'recPartial_2.jpg'],
+        )
+
+    def test_changed_record_keeps_images_with_the_same_attachment(self):
+        record = self.records['recDone']
+        self.formatter.resumed_records['recDone']['images'] = {'1': 'att:attrecDone1', '2': 'att:attrecDone2'}
+        record['fields']['Product Name'] = 'Renamed'
+        record['fields']['Image 2'] = [{'url': 'https://img.example/recDone/new.jpg', 'id': 'attNew'}]
+
+        async_to_sync(self.formatter.feed_record)(record)
+
+        self.assertEqual(self.formatter.records_assembled, 0)
+        self.assertEqual(
+            [(stage, job.image_number) for stage, job in self.formatter.pipeline.queued], [('download', 2)]
+        )
+        self.assertEqual(
+            self.formatter.pending_records['recDone']['images'], [('https://minio.example/recDone_1.jpg', 1)]
+        )
+
+
+class RecordFingerprintTests(TestCase):
+    def record(self, attachment_id, signature):
+        return {'id': 'rec1', 'fields': {'Product Name': 'Lamp', 'Image 1': [{
+            'id': attachment_id, 'filename': 'lamp.jpg', 'size': 1234,
+            'url': f'https://dl.airtable.com/lamp.jpg?sig={signature}',
+            'thumbnails': {'large': {'url': f'https://dl.airtable.com/lamp-large.jpg?sig={signature}'}},
+        }]}}
+
+    def test_signed_urls_do_not_change_the_fingerprint(self):
+        self.assertEqual(record_fingerprint(self.record('att1', 'a')), record_fingerprint(self.record('att1', 'b')))
+        self.assertEqual(lot_fingerprint(self.record('att1', 'a'), 'key'), lot_fingerprint(self.record('att1', 'b'), 'key'))
+        self.assertNotEqual(record_fingerprint(self.record('att1', 'a')), record_fingerprint(self.record('att2', 'a')))
+
+
+class ProcessedImageCacheTests(TestCase):
+    def test_hits_point_at_the_bytes_they_were_built_from(self):
+        cache = ProcessedImageCache(DictRedis())
+        old, new = content_object_name(b'old image'), content_object_name(b'new image')
+        self.assertNotEqual(old, new)
+
+        # A relisted lot with a new photo in the same slot gets a new object, not an overwrite
+        cache.store('att:old', old, f'https://minio.example/{old}')
+        cache.store('att:new', new, f'https://minio.example/{new}')
+        self.assertEqual(
+            cache.lookup_many(['att:old', 'att:new', 'att:missing']),
+            [f'https://minio.example/{old}', f'https://minio.example/{new}', None],
+        )
+
+
+class RedisTestCase(TestCase):
+    """Runs against settings.REDIS_CONN (Lua scripts need a real server); keys listed in redis_keys are removed"""
+    redis_keys = ()
+
+    def setUp(self):
+        self.redis = settings.REDIS_CONN
+        try:
+            self.redis.ping()
+        except Exception as e:
+            self.skipTest(f"Redis unavailable: {e}")
+        self.addCleanup(self.redis.delete, *self.redis_keys)
+        self.redis.delete(*self.redis_keys)
+
+
+class BrowserSlotsTests(RedisTestCase):
+    redis_keys = ('browser_slots:test-dyno',)
+
+    def slots(self, member, lease=900):
+        slots = BrowserSlots(1, lease, self.redis)
+        slots.key, slots.member = 'browser_slots:test-dyno', member
+        return slots
+
+    def test_one_browser_per_slot(self):
+        first, second = self.slots('host:1'), self.slots('host:2')
+        self.assertTrue(first.try_acquire())
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        first.release()
+        self.assertTrue(second.try_acquire())
+
+    def test_expired_lease_frees_the_slot(self):
+        self.assertTrue(self.slots('host:1', lease=1).try_acquire())
+        time.sleep(1.1)
+        self.assertTrue(self.slots('host:2').try_acquire())
+
+
+class TokenBucketTests(RedisTestCase):
+    redis_keys = ('rate_limit:test-bucket',)
+
+    def bucket(self, redis_conn=None):
+        return TokenBucket('test-bucket', rate=20, burst=2, redis_conn=redis_conn or self.redis)
+
+    def test_burst_then_wait(self):
+        bucket = self.bucket()
+        self.assertEqual([bucket.reserve(), bucket.reserve()], [0, 0])
+        # The third token accrues 50ms after the burst is spent; a fourth caller waits behind it
+        self.assertTrue(0 < bucket.reserve() <= 50)
+        self.assertTrue(50 < bucket.reserve() <= 100)
+        self.assertFalse(bucket._redis_failed)
+
+    def test_refill_is_capped_at_burst(self):
+        bucket = self.bucket()
+        bucket.reserve(2)
+        time.sleep(0.5)  # 10 tokens' worth of time, but the bucket holds 2
+        self.assertEqual([bucket.reserve(), bucket.reserve()], [0, 0])
+        self.assertGreater(bucket.reserve(), 0)
+
+    def test_shared_between_instances(self):
+        self.assertEqual(self.bucket().reserve(2), 0)
+        self.assertGreater(self.bucket().reserve(), 0)
+
+    def test_falls_back_to_local_bucket_when_redis_fails(self):
+        class BrokenRedis:
+            def register_script(self, script):
+                raise redis.ConnectionError('Redis is down')
+
+        bucket = self.bucket(BrokenRedis())
+        with self.assertLogs('auction.utils.rate_limiter', 'WARNING') as logs:
+            self.assertEqual([bucket.reserve(), bucket.reserve()], [0, 0])
+            self.assertGreater(bucket.reserve(), 0)
+        # Warned once, not on every call
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(bucket._redis_failed)
+
+
+class RetryPolicyTests(TestCase):
+    def test_backoff_stays_within_half_and_full_cap(self):
+        policy = RetryPolicy(attempts=6, base_delay=0.5, max_delay=4.0)
+        for attempt, cap in enumerate([0.5, 1.0, 2.0, 4.0, 4.0, 4.0]):
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            self.assertTrue(all(cap / 2 <= delay <= cap for delay in delays), (attempt, min(delays), max(delays)))
+            # Jittered, so retries of images that failed together spread out
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_backoff_extremes(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=8.0)
+        with mock.patch('auction.utils.resilience.random.uniform', side_effect=lambda low, high: low):
+            self.assertEqual(policy.backoff(2), 2.0)
+        with mock.patch('auction.utils.resilience.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual(policy.backoff(2), 4.0)
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('auction.utils.resilience.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('img.example', failure_threshold=3, reset_timeout=30.0)
+
+    def test_closed_open_half_open_closed(self):
+        breaker = self.breaker
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.check()
+        self.assertEqual(breaker.state, CLOSED)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+
+        self.now += 30
+        breaker.check()  # the probe
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()  # only one probe at a time
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.check()
+        self.assertEqual(breaker.as_dict(), {
+            'state': CLOSED, 'consecutive_failures': 0, 'times_opened': 1, 'rejected': 2,
+        })
+
+    def test_failed_probe_reopens(self):
+        breaker = self.breaker
+        for _ in range(3):
+            breaker.record_failure()
+        self.now += 30
+        breaker.check()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.times_opened, 2)
+
+        self.now += 29
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+        self.now += 1
+        breaker.check()
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+    def test_success_resets_the_failure_count(self):
+        breaker = self.breaker
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class ClosedBrowser:
+    closed = False
+
+    def is_connected(self):
+        return True
+
+    async def close(self):
+        self.closed = True
+
+
+class BrowserIdleTests(TestCase):
+    def test_idle_browser_is_closed(self):
+        pool = BrowserPool(idle_timeout=0.01)
+        browser = pool.browser = ClosedBrowser()
+
+        async def run():
+            pool._lock = asyncio.Lock()
+            pool.active = 1
+            await pool._close_if_idle()
+            self.assertFalse(browser.closed)
+            pool.active = 0
+            pool.last_used = time.monotonic() - 1
+            await pool._close_if_idle()
+
+        asyncio.run(run())
+        self.assertTrue(browser.closed)
+        self.assertIsNone(pool.browser)
+        self.assertEqual(pool.recycles, {'idle': 1})
+
+
+class TransformTimeoutTests(TestCase):
+    def test_queue_wait_does_not_count_against_the_timeout(self):
+        output = BytesIO()
+        Image.new('RGB', (64, 48)).save(output, 'JPEG')
+        image = output.getvalue()
+        engine = ImageTransformEngine(max_workers=1, memory_budget=len(image))
+        self.addCleanup(engine.shutdown)
+
+        async def run():
+            engine.start()
+            # Another image holds the whole memory budget for longer than the timeout
+            await engine._reserve(len(image))
+            transform = asyncio.create_task(engine.transform(image, timeout=0.5))
+            await asyncio.sleep(1)
+            await engine._release(len(image))
+            return await transform
+
+        self.assertTrue(asyncio.run(run()).startswith(b'\xff\xd8'))
+
+
+class AdaptiveLimitTests(TestCase):
+    def test_cancelled_waiter_is_dropped(self):
+        limit = AdaptiveLimit(1)
+
+        async def run():
+            await limit.acquire()
+            waiter = asyncio.create_task(limit.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            self.assertEqual(len(limit._waiters), 0)
+
+            limit.release()
+            # The slot is free, so this must not queue behind the cancelled waiter
+            await asyncio.wait_for(limit.acquire(), 1)
+
+        asyncio.run(run())
+        self.assertEqual(limit.active, 1)
+
+
+def pandas_premium_selection(lots):
+    """The DataFrame selection PremiumSelector replaced, kept to check that results did not change"""
+    df = pd.DataFrame({
+        'Title': [lot.title for lot in lots],
+        'Subtitle': [lot.subtitle for lot in lots],
+        'MSRP_numeric': pd.to_numeric([lot.msrp for lot in lots], errors='coerce'),
+    })
+    condition_mask = ~df['Subtitle'].str.contains('missing|damaged|no', case=False, na=False)
+    potential_top = df[condition_mask].sort_values('MSRP_numeric', ascending=False)
+    top_50_indices = []
+    seen_titles = set()
+    for idx, row in potential_top.iterrows():
+        title_key = row['Title'].lower().strip()
+        if len(top_50_indices) < 50 and title_key not in seen_titles:
+            top_50_indices.append(idx)
+            seen_titles.add(title_key)
+    chosen = set(top_50_indices)
+    return [lots[idx] for idx in top_50_indices], [lot for idx, lot in enumerate(lots) if idx not in chosen]
+
+
+class PremiumSelectionTests(TestCase):
+    def synthetic_lots(self, count, seed):
+        rng = random.Random(seed)
+        titles = [f'Item {n}' for n in range(count // 3)]
+        # Distinct prices, so the old unstable sort has no ties to break
+        prices = rng.sample(range(100, 100000), count)
+        lots = []
+        for position in range(count):
+            title = rng.choice(titles)
+            lots.append(SimpleNamespace(
+                position=position,
+                title=rng.choice([title, title.upper(), f'  {title} ']),
+                subtitle=rng.choice(['', '', '', 'Brand new', 'Missing parts', 'box DAMAGED', 'NOTES: scuffed']),
+                msrp=rng.choice([f'{prices[position] / 100:.2f}'] * 8 + ['', 'n/a']),
+            ))
+        return lots
+
+    def test_matches_pandas_selection(self):
+        selector = PremiumSelector()
+        for count, seed in [(10, 1), (120, 2), (400, 3), (2000, 4)]:
+            lots = self.synthetic_lots(count, seed)
+            premium, others = selector.select(lots)
+            expected_premium, expected_others = pandas_premium_selection(lots)
+            self.assertEqual([lot.position for lot in premium], [lot.position for lot in expected_premium], count)
+            # The formatter shuffles the others afterwards; both list them in event order
+            self.assertEqual([lot.position for lot in others], [lot.position for lot in expected_others], count)
+
+    def test_unusable_msrp_ranks_last_and_ties_go_to_the_earlier_lot(self):
+        lots = [
+            SimpleNamespace(title='A', subtitle='', msrp=''),
+            SimpleNamespace(title='B', subtitle='', msrp='10'),
+            SimpleNamespace(title='C', subtitle='', msrp='10'),
+            SimpleNamespace(title='D', subtitle='', msrp='nan'),
+            SimpleNamespace(title='E', subtitle='', msrp='20'),
+        ]
+        premium, others = PremiumSelector(count=4).select(lots)
+        self.assertEqual([lot.title for lot in premium], ['E', 'B', 'C', 'A'])
+        self.assertEqual([lot.title for lot in others], ['D'])
+
+
+class CategoryIndexTests(TestCase):
+    def test_normalize_category(self):
+        self.assertEqual(normalize_category('Arts,Crafts and  Sewing'), 'arts,crafts&sewing')
+        self.assertEqual(normalize_category(' Home &  Kitchen '), normalize_category('HOME AND KITCHEN'))
+        # Only the whole word 'and' becomes '&'
+        self.assertEqual(normalize_category('Band Candles'), 'bandcandles')
+
+    def test_lookup(self):
+        index = CategoryIndex()
+        self.assertEqual(index.lookup('Home and Kitchen'), 162703)
+        self.assertEqual(index.lookup('  sports &outdoors'), 2830888)
+        self.assertEqual(index.lookup('Arts, Crafts & Sewing'), 2830485)
+        self.assertEqual(index.lookup(''), DEFAULT_CATEGORY_ID)
+        self.assertEqual(index.lookup(None), DEFAULT_CATEGORY_ID)
+
+    def test_unmapped_categories_are_counted(self):
+        index = CategoryIndex()
+        for category in ['Gadgets', 'electronics', 'Gadgets', '', 'Whatsits']:
+            index.lookup(category)
+        self.assertEqual(index.as_dict(), {'hits': 1, 'misses': 4, 'unmapped': {'Gadgets': 2, '': 1, 'Whatsits': 1}})
+        self.assertEqual(index.as_dict(top=1)['unmapped'], {'Gadgets': 2})
+
+        index.reset_stats()
+        self.assertEqual(index.as_dict(), {'hits': 0, 'misses': 0, 'unmapped': {}})
+
+    def test_warehouse_overrides(self):
+        config = {'warehouses': {'Test Warehouse': {'category_overrides': {'Gadgets': 5, 'Misc': 7}}}}
+        with mock.patch.object(config_manager, 'config', config):
+            index = get_category_index('Test Warehouse')
+            self.assertEqual(index.lookup('gadgets'), 5)
+            self.assertEqual(index.lookup('MISC'), 7)
+            self.assertEqual(index.lookup('toys and games'), 2830927)
+            self.assertIs(get_category_index('Test Warehouse'), index)
+
+
+class AcceptsGzipTests(TestCase):
+    def test_q_values(self):
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('br;q=1.0, GZIP;q=0.5'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip(''))
+        self.assertFalse(accepts_gzip('identity'))
+        self.assertFalse(accepts_gzip('gzip;q=0'))
+        self.assertFalse(accepts_gzip('gzip;q=0.000, deflate'))
+        self.assertFalse(accepts_gzip('*;q=1, gzip;q=0'))
+        self.assertFalse(accepts_gzip('*;q=0'))
+
+
+class DownloadFormattedCsvTests(TestCase):
+    csv_text = 'EventID,ID\nE200,rec1\n'
+
+    def setUp(self):
+        today = datetime.date.today()
+        event = Event.objects.create(
+            event_id='E200', warehouse='Maule Warehouse', title='Test', start_date=today, ending_date=today
+        )
+        AuctionFormattedData.objects.create(event=event, blob=CsvBlob.store(self.csv_text))
+        user = get_user_model().objects.create_user(username='staff', password='secret')
+        self.client.force_login(user)
+        self.url = reverse('auction:download_formatted_csv', args=['E200'])
+
+    def test_gzip_only_when_accepted(self):
+        response = self.client.get(self.url, secure=True, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode('utf-8'), self.csv_text)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(self.url, secure=True, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), self.csv_text)
+        self.assertIn('Accept-Encoding', response['Vary'])
 
-# Create your tests here.
+    def test_not_modified_varies_on_encoding(self):
+        etag = self.client.get(self.url, secure=True)['ETag']
+        response = self.client.get(self.url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept-Encoding', response['Vary'])
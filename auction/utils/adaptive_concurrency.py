@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+import aiohttp
+import urllib3
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+S3_OVERLOAD_CODES = frozenset({'SlowDown', 'ServiceUnavailable', 'RequestTimeout', 'InternalError', 'XMinioServerNotInitialized'})
+
+OK = 'ok'
+ERROR = 'error'
+OVERLOAD = 'overload'
+
+
+class ServiceOverloaded(Exception):
+    """A remote service answered 429 or 5xx; callers should back off rather than treat the item as bad"""
+
+    def __init__(self, service, status):
+        super().__init__(f"{service} returned HTTP {status}")
+        self.service = service
+        self.status = status
+
+
+def is_overload(exc):
+    """Timeouts, throttling and server errors: signs that we are sending too much, not that the item is bad"""
+    if isinstance(exc, (asyncio.TimeoutError, ServiceOverloaded, aiohttp.ServerDisconnectedError)):
+        return True
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in OVERLOAD_STATUSES
+    if isinstance(exc, S3Error):
+        return exc.code in S3_OVERLOAD_CODES
+    return isinstance(exc, (urllib3.exceptions.MaxRetryError, urllib3.exceptions.TimeoutError))
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease target for one stage's AdaptiveLimit.
+
+    Outcomes are judged a window at a time (one window = as many completions as the
+    current limit, at least min_window). A healthy window, with p95 latency within
+    latency_inflation x the best p95 seen and errors at most max_error_rate, raises the
+    limit: doubling until the first congestion signal (slow start), then +1. An
+    unhealthy window holds it. Any overload (timeout, 429/5xx) cuts the limit by
+    `decrease` at once; further overloads within the same window are the same event.
+
+    on_change(name, limit) is called whenever the effective limit moves.
+    """
+
+    def __init__(self, name, limit, initial=None, minimum=2, decrease=0.5, max_error_rate=0.1,
+                 latency_inflation=2.0, min_window=8, on_change=None):
+        self.name = name
+        self.limit = limit
+        self.minimum = minimum
+        self.decrease = decrease
+        self.max_error_rate = max_error_rate
+        self.latency_inflation = latency_inflation
+        self.min_window = min_window
+        self.on_change = on_change
+        self.slow_start = True
+        self.baseline_p95 = None
+        self.last_p95 = None
+        self.increases = 0
+        self.decreases = 0
+        self.overloads = 0
+        self._latencies = []
+        self._errors = 0
+        self._since_decrease = None
+        self.limit.set_target(initial if initial is not None else self.limit.max_limit)
+
+    @property
+    def target(self):
+        return self.limit.target
+
+    def _set_target(self, target):
+        before = self.limit.limit
+        self.limit.set_target(max(self.minimum, min(self.limit.max_limit, target)))
+        if self.limit.limit != before and self.on_change is not None:
+            self.on_change(self.name, self.limit.limit)
+
+    def observe(self, seconds, outcome=OK):
+        if self._since_decrease is not None:
+            self._since_decrease += 1
+
+        if outcome == OVERLOAD:
+            self.overloads += 1
+            if self._since_decrease is None or self._since_decrease >= max(self.min_window, self.limit.limit):
+                self.slow_start = False
+                self.decreases += 1
+                self._since_decrease = 0
+                self._set_target(int(self.target * self.decrease))
+                self._reset_window()
+            return
+
+        self._latencies.append(seconds)
+        if outcome != OK:
+            self._errors += 1
+        if len(self._latencies) >= max(self.min_window, self.limit.limit):
+            self._close_window()
+
+    def _close_window(self):
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        error_rate = self._errors / len(latencies)
+        self.last_p95 = p95
+        self.baseline_p95 = p95 if self.baseline_p95 is None else min(self.baseline_p95, p95)
+        self._reset_window()
+
+        if error_rate > self.max_error_rate or p95 > self.baseline_p95 * self.latency_inflation:
+            self.slow_start = False
+            return
+        if self.limit.limit < self.target or self.target >= self.limit.max_limit:
+            return  # Capped by memory or already at the maximum
+        self.increases += 1
+        self._set_target(self.target * 2 if self.slow_start else self.target + 1)
+
+    def _reset_window(self):
+        self._latencies = []
+        self._errors = 0
+
+    def as_dict(self):
+        return {
+            'limit': self.limit.limit,
+            'target': self.target,
+            'max': self.limit.max_limit,
+            'slow_start': self.slow_start,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'overloads': self.overloads,
+            'p95_s': round(self.last_p95, 3) if self.last_p95 is not None else None,
+            'baseline_p95_s': round(self.baseline_p95, 3) if self.baseline_p95 is not None else None,
+        }
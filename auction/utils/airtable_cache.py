@@ -0,0 +1,153 @@
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+from django.conf import settings
+
+from auction.utils.rate_limiter import get_bucket
+
+logger = logging.getLogger(__name__)
+
+AIRTABLE_API_URL = "https://api.airtable.com/v0"
+
+
+async def iter_airtable_pages(session, base, table, params, headers, gui_callback=None):
+    """Yield each page of records (up to 100) as soon as Airtable returns it"""
+    url = f"{AIRTABLE_API_URL}/{base}/{table}"
+    offset = None
+    while True:
+        page_params = list(params) + [('pageSize', '100')]
+        if offset:
+            page_params.append(('offset', offset))
+
+        await get_bucket('airtable').acquire()
+        async with session.get(url, params=page_params, headers=headers) as response:
+            response.raise_for_status()
+            response_json = await response.json()
+
+        records = response_json.get("records", [])
+        if gui_callback:
+            gui_callback(f"Retrieved {len(records)} records")
+        yield records
+
+        offset = response_json.get("offset")
+        if not offset:
+            break
+
+
+class AirtableViewCache:
+    """
+    Shared Redis cache of an Airtable view, refreshed incrementally.
+
+    A cold cache pulls the whole view. Afterwards each refresh:
+    1. lists the record ids currently in the view with a one-field projection, which
+       keeps view order and drops records that left the view,
+    2. pulls only records whose LAST_MODIFIED_TIME() is after the previous sync,
+    3. pulls any id in the view that the cache has never seen.
+    LAST_MODIFIED_TIME() ignores computed fields (formulas, rollups), so the entry
+    expires after TTL and the next run does a full pull.
+    """
+    TTL = 3600  # 1 hour
+    CLOCK_SKEW = timedelta(seconds=60)
+    RECORD_ID_BATCH = 50
+
+    def __init__(self, redis_conn=None):
+        self._redis = redis_conn
+
+    @property
+    def redis(self):
+        return self._redis or settings.REDIS_CONN
+
+    def cache_key(self, base, table, view, fields=None):
+        key = f"airtable_cache:{base}:{table}:{view}"
+        if fields:
+            # Different projections of the same view are cached separately
+            key += ":" + hashlib.sha1("\x1f".join(sorted(fields)).encode('utf-8')).hexdigest()[:12]
+        return key
+
+    def load(self, key):
+        try:
+            data = self.redis.get(key)
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"Airtable cache read failed for {key}: {e}")
+            return None
+
+    def save(self, key, records, synced_at, full_sync=False):
+        try:
+            payload = {'synced_at': synced_at.isoformat(), 'records': records}
+            # Incremental syncs keep the expiry of the last full pull so computed fields are refreshed on schedule
+            ttl = self.TTL if full_sync else self.redis.ttl(key)
+            self.redis.set(key, json.dumps(payload), ex=ttl if ttl > 0 else self.TTL)
+        except Exception as e:
+            logger.warning(f"Airtable cache write failed for {key}: {e}")
+
+    async def _collect(self, session, base, table, params, headers):
+        records = []
+        async for page in iter_airtable_pages(session, base, table, params, headers):
+            records.extend(page)
+        return records
+
+    async def get_records(self, base, table, view, gui_callback, airtable_token, fields=None, id_field="Lot Number"):
+        records = []
+        async for page in self.iter_records(base, table, view, gui_callback, airtable_token, fields, id_field):
+            records.extend(page)
+        return records
+
+    async def iter_records(self, base, table, view, gui_callback, airtable_token, fields=None, id_field="Lot Number"):
+        """
+        Yield the view in pages of up to 100 records. A cold cache streams each page
+        straight from Airtable so callers can start work before the last page arrives.
+        fields limits the response to the given field names.
+        """
+        key = self.cache_key(base, table, view, fields)
+        headers = {"Authorization": f"Bearer {airtable_token}"}
+        projection = [('fields[]', field) for field in fields or []]
+        synced_at = datetime.now(timezone.utc)
+        # Redis round trips and (de)serializing the whole view stay off the event loop
+        cached = await asyncio.to_thread(self.load, key)
+
+        async with aiohttp.ClientSession() as session:
+            if not cached:
+                gui_callback("Airtable cache empty - fetching full view")
+                records = []
+                async for page in iter_airtable_pages(session, base, table, [('view', view)] + projection, headers, gui_callback):
+                    records.extend(page)
+                    yield page
+                await asyncio.to_thread(self.save, key, records, synced_at, full_sync=True)
+                return
+
+            since = datetime.fromisoformat(cached['synced_at']) - self.CLOCK_SKEW
+            records_by_id = {record['id']: record for record in cached['records']}
+
+            view_ids = [
+                record['id'] for record in await self._collect(
+                    session, base, table, [('view', view), ('fields[]', id_field)], headers
+                )
+            ]
+
+            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+            changed = await self._collect(
+                session, base, table, [('view', view), ('filterByFormula', formula)] + projection, headers
+            )
+            records_by_id.update((record['id'], record) for record in changed)
+
+            unseen = [record_id for record_id in view_ids if record_id not in records_by_id]
+            for start in range(0, len(unseen), self.RECORD_ID_BATCH):
+                batch = unseen[start:start + self.RECORD_ID_BATCH]
+                formula = "OR(" + ",".join(f"RECORD_ID()='{record_id}'" for record_id in batch) + ")"
+                fetched = await self._collect(session, base, table, [('filterByFormula', formula)] + projection, headers)
+                records_by_id.update((record['id'], record) for record in fetched)
+
+        records = [records_by_id[record_id] for record_id in view_ids if record_id in records_by_id]
+        removed = len({record['id'] for record in cached['records']} - set(view_ids))
+        gui_callback(f"Airtable cache refreshed: {len(changed)} changed, {len(unseen)} new, {removed} removed")
+        await asyncio.to_thread(self.save, key, records, synced_at)
+        for start in range(0, len(records), 100):
+            yield records[start:start + 100]
+
+
+airtable_view_cache = AirtableViewCache()
@@ -0,0 +1,180 @@
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+from auction.utils import config_manager
+from auction.utils.browser_pool import get_browser_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {'ttl': 6 * 3600, 'lock_timeout': 300, 'lock_wait': 240}
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def is_login_page(url):
+    url = url.lower()
+    return "logon" in url or "login" in url
+
+
+class BidSessionCache:
+    """
+    Logged-in Playwright storage_state of one bid-site account, shared by every worker.
+
+    - bid_session:{account}       JSON storage_state, expires after `ttl` seconds
+    - bid_session:{account}:lock  held by the one task logging in for the account
+
+    The account is a hash of the username so it does not appear in key names. Redis
+    errors are logged and treated as an empty cache; tasks then log in as before.
+    """
+    PREFIX = "bid_session"
+
+    def __init__(self, username, redis_conn=None):
+        options = dict(DEFAULT_SETTINGS)
+        options.update(config_manager.config.get('global', {}).get('bid_session', {}))
+        self.ttl = int(options['ttl'])
+        self.lock_timeout = int(options['lock_timeout'])
+        self.lock_wait = float(options['lock_wait'])
+        self.redis = redis_conn or settings.REDIS_CONN
+        account = hashlib.sha1(username.encode('utf-8')).hexdigest()[:16]
+        self.key = f"{self.PREFIX}:{account}"
+        self.lock_key = f"{self.key}:lock"
+        self._release_script = None
+
+    def get(self):
+        """The cached state, or None when there is none or one of its expiring cookies has expired"""
+        try:
+            data = self.redis.get(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to read bid-site session: {e}")
+            return None
+        if not data:
+            return None
+        state = json.loads(data)
+        now = time.time()
+        if any(0 < cookie.get('expires', -1) < now + 60 for cookie in state.get('cookies', [])):
+            self.invalidate(data)
+            return None
+        return state
+
+    def save(self, state):
+        try:
+            self.redis.setex(self.key, self.ttl, json.dumps(state))
+        except Exception as e:
+            logger.warning(f"Failed to cache bid-site session: {e}")
+
+    def invalidate(self, stale=None):
+        """Drop the cached state; with `stale`, only if another task has not replaced it meanwhile"""
+        try:
+            if stale is None:
+                self.redis.delete(self.key)
+                return
+            current = self.redis.get(self.key)
+            if current is not None and (current == stale or json.loads(current) == stale):
+                self.redis.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate bid-site session: {e}")
+
+    async def acquire_lock(self):
+        """Wait up to lock_wait seconds for the login lock; returns its token, or None if it was not obtained"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.5
+        while True:
+            try:
+                if self.redis.set(self.lock_key, token, nx=True, ex=self.lock_timeout):
+                    return token
+            except Exception as e:
+                logger.warning(f"Failed to take bid-site login lock: {e}")
+                return None
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 5.0)
+
+    def release_lock(self, token):
+        if token is None:
+            return
+        try:
+            if self._release_script is None:
+                self._release_script = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+            self._release_script(keys=[self.lock_key], args=[token])
+        except Exception as e:
+            logger.warning(f"Failed to release bid-site login lock: {e}")
+
+
+class BidSession:
+    """
+    A browser context for one bid-site account that starts from the cached session.
+
+        session = BidSession(username)
+        async with session.page() as page:
+            if await session.open(page, url, login):
+                ...
+
+    open() goes to the target page; only if the site sends it to the login page does it
+    call login(page), with at most one task per account logging in at a time, and then
+    cache the new storage_state for everyone else. open() also works on a page from any
+    other context, adding the cached cookies first. Use on the browser pool's loop.
+    """
+
+    def __init__(self, username, cache=None, report=None):
+        self.cache = cache or BidSessionCache(username)
+        self.report = report or logger.info
+        self.state = None
+
+    @asynccontextmanager
+    async def page(self, pool=None):
+        self.state = self.cache.get()
+        async with (pool or get_browser_pool()).page(storage_state=self.state) as page:
+            yield page
+
+    async def open(self, page, url, login):
+        """Navigate to url logged in; returns False if login failed"""
+        if self.state is None:
+            # A context not opened through page() can still start from the cached session
+            self.state = self.cache.get()
+            if self.state is not None:
+                await page.context.add_cookies(self.state.get('cookies', []))
+        await page.goto(url, wait_until='domcontentloaded')
+        if not is_login_page(page.url):
+            if self.state is not None:
+                self.report("Reusing cached bid-site session - login skipped")
+            return True
+
+        if self.state is not None:
+            self.report("Cached bid-site session has expired")
+            self.cache.invalidate(self.state)
+        token = await self.cache.acquire_lock()
+        try:
+            # Another task may have logged in while this one waited for the lock
+            fresh = self.cache.get()
+            if fresh is not None and fresh != self.state:
+                await page.context.add_cookies(fresh.get('cookies', []))
+                await page.goto(url, wait_until='domcontentloaded')
+                if not is_login_page(page.url):
+                    self.state = fresh
+                    self.report("Using the bid-site session another task just created")
+                    return True
+
+            if not await login(page):
+                return False
+            self.state = await page.context.storage_state()
+            self.cache.save(self.state)
+        finally:
+            self.cache.release_lock(token)
+
+        await page.goto(url, wait_until='domcontentloaded')
+        return not is_login_page(page.url)
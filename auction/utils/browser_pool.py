@@ -0,0 +1,393 @@
+import os
+import time
+import socket
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from celery import current_task
+from celery._state import _task_stack
+from django.conf import settings
+from playwright.async_api import async_playwright
+
+from auction.utils import config_manager
+from auction.utils.metrics import LatencyHistogram
+from auction.utils.memory_governor import PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Chromium flags that trade features the bid site does not need for a smaller footprint
+LEAN_CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-features=site-per-process,Translate,BackForwardCache,MediaRouter',
+    '--renderer-process-limit=2',
+    '--js-flags=--max-old-space-size=256',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+DEFAULT_SETTINGS = {
+    'prelaunch': False, 'max_contexts': 25, 'max_rss_mb': 350, 'headless': True,
+    'idle_timeout': 60, 'max_browsers': 2, 'slot_wait': 180, 'slot_lease': 900,
+}
+
+ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+  redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[1])
+  redis.call('EXPIRE', KEYS[1], ARGV[4])
+  return 1
+end
+return 0
+"""
+
+
+def browser_rss():
+    """Resident memory of this process's Chromium descendants, in bytes (0 where /proc is unavailable)"""
+    try:
+        children = {}
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    # The command name is in parentheses and may contain spaces
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(pid))
+
+        total, stack = 0, list(children.get(os.getpid(), []))
+        while stack:
+            pid = stack.pop()
+            stack.extend(children.get(pid, []))
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    if b'chrom' not in f.read():
+                        continue
+                with open(f'/proc/{pid}/statm') as f:
+                    total += int(f.read().split()[1]) * PAGE_SIZE
+            except (OSError, IndexError, ValueError):
+                continue
+        return total
+    except OSError:
+        return 0
+
+
+class BrowserSlots:
+    """
+    Caps how many worker processes on one dyno hold a launched Chromium at once; every
+    prefork child keeping its own would not fit in a 1GB dyno.
+
+    - browser_slots:{dyno}  sorted set: host:pid -> lease expiry (unix time)
+
+    Taking a slot again renews its lease; a process that dies without releasing its slot
+    loses it when the lease runs out. Redis errors are logged and the slot is granted.
+    """
+    PREFIX = "browser_slots"
+
+    def __init__(self, limit, lease, redis_conn=None):
+        self.limit = limit
+        self.lease = lease
+        self.redis = redis_conn or settings.REDIS_CONN
+        self.key = f"{self.PREFIX}:{os.environ.get('DYNO') or socket.gethostname()}"
+        self.member = f"{socket.gethostname()}:{os.getpid()}"
+        self._script = None
+
+    def try_acquire(self):
+        """Take or renew this process's slot; False while the dyno is at its limit"""
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(ACQUIRE_SLOT_SCRIPT)
+            return bool(self._script(keys=[self.key], args=[self.member, time.time(), self.limit, self.lease]))
+        except Exception as e:
+            logger.warning(f"Browser slot check failed, launching anyway: {e}")
+            return True
+
+    def release(self):
+        try:
+            self.redis.zrem(self.key, self.member)
+        except Exception as e:
+            logger.warning(f"Failed to release browser slot: {e}")
+
+
+class BrowserPool:
+    """
+    One Chromium per worker process, living on its own event loop thread so that it
+    outlives the asyncio.run() of each task. Tasks get a fresh BrowserContext per use
+    (context() / page()) and run their Playwright code on that loop through submit().
+
+    Before each context is handed out the browser is health-checked, and it is relaunched
+    once it has served max_contexts contexts or its processes exceed max_rss_mb. It is
+    closed after idle_timeout seconds without a context, and with `slots` a launch first
+    waits up to slot_wait seconds for one of the dyno's browser slots.
+    """
+
+    def __init__(self, max_contexts=25, max_rss_mb=350, headless=True, launch_args=None,
+                 idle_timeout=60, slots=None, slot_wait=180):
+        self.max_contexts = max_contexts
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.headless = headless
+        self.launch_args = launch_args if launch_args is not None else LEAN_CHROMIUM_ARGS
+        self.idle_timeout = idle_timeout
+        self.slots = slots
+        self.slot_wait = slot_wait
+        self.last_used = time.monotonic()
+        self._idle_handle = None
+        self.loop = None
+        self.thread = None
+        self.playwright = None
+        self.browser = None
+        self.active = 0
+        self.served = 0
+        self.launches = 0
+        self.recycles = {}
+        self.launch_latency = LatencyHistogram('browser_launch')
+        self.acquire_latency = LatencyHistogram('browser_context_acquire')
+        self._lock = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run_loop, name='browser-pool', daemon=True)
+            self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._lock = asyncio.Lock()
+        self.loop.run_forever()
+
+    def submit(self, coro_fn, *args, **kwargs):
+        """
+        Run coro_fn(*args, **kwargs) on the pool's loop; returns a concurrent.futures.Future.
+        The calling Celery task is made current on the loop thread so current_task works there.
+        """
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("submit() called from the browser pool's own loop; await the coroutine instead")
+        self.start()
+        task = current_task._get_current_object() if current_task else None
+        request = task.request if task is not None else None
+
+        async def run():
+            # Both the current task and its request are thread-local in Celery
+            if task is not None:
+                _task_stack.push(task)
+                task.request_stack.push(request)
+            try:
+                return await coro_fn(*args, **kwargs)
+            finally:
+                if task is not None:
+                    task.request_stack.pop()
+                    _task_stack.pop()
+
+        return asyncio.run_coroutine_threadsafe(run(), self.loop)
+
+    async def _acquire_slot(self):
+        deadline = time.monotonic() + self.slot_wait
+        while not await asyncio.to_thread(self.slots.try_acquire):
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"No browser slot free on this dyno after {self.slot_wait:.0f}s ({self.slots.limit} browsers running)"
+                )
+            await asyncio.sleep(1)
+
+    async def _launch(self):
+        started = time.monotonic()
+        if self.slots is not None:
+            await self._acquire_slot()
+        try:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        except Exception:
+            if self.slots is not None:
+                await asyncio.to_thread(self.slots.release)
+            raise
+        elapsed = time.monotonic() - started
+        self.launch_latency.observe(elapsed)
+        self.launches += 1
+        self.served = 0
+        logger.info(f"Browser launched in {elapsed:.2f}s (launch #{self.launches} in process {os.getpid()})")
+
+    async def _close_browser(self):
+        browser, self.browser = self.browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser: {e}")
+            if self.slots is not None:
+                await asyncio.to_thread(self.slots.release)
+
+    def _recycle_reason(self):
+        if self.browser is None:
+            return None
+        if not self.browser.is_connected():
+            return 'disconnected'
+        if self.served >= self.max_contexts:
+            return 'max_contexts'
+        if self.max_rss and browser_rss() > self.max_rss:
+            return 'rss'
+        return None
+
+    async def ensure_browser(self):
+        """Launch the browser, or replace one that is unhealthy or due for recycling (call on the pool's loop)"""
+        async with self._lock:
+            reason = self._recycle_reason()
+            if reason == 'disconnected' or (reason and not self.active):
+                # A worn browser still in use is recycled once its last context closes
+                self.recycles[reason] = self.recycles.get(reason, 0) + 1
+                logger.info(f"Recycling browser after {self.served} contexts ({reason})")
+                await self._close_browser()
+            if self.browser is None:
+                await self._launch()
+            elif self.slots is not None:
+                await asyncio.to_thread(self.slots.try_acquire)  # renew the lease
+            self.last_used = time.monotonic()
+            return self.browser
+
+    def _schedule_idle_close(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        if self.idle_timeout:
+            self._idle_handle = self.loop.call_later(
+                self.idle_timeout, lambda: asyncio.ensure_future(self._close_if_idle())
+            )
+
+    async def _close_if_idle(self):
+        async with self._lock:
+            if self.browser is None or self.active or time.monotonic() - self.last_used < self.idle_timeout:
+                return
+            self.recycles['idle'] = self.recycles.get('idle', 0) + 1
+            logger.info(f"Closing browser after {self.idle_timeout}s without a context")
+            await self._close_browser()
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """A fresh BrowserContext, closed on exit (use on the pool's loop)"""
+        started = time.monotonic()
+        browser = await self.ensure_browser()
+        context = await browser.new_context(**options)
+        self.acquire_latency.observe(time.monotonic() - started)
+        self.active += 1
+        self.served += 1
+        try:
+            yield context
+        finally:
+            self.active -= 1
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser context: {e}")
+            self.last_used = time.monotonic()
+            if not self.active:
+                self._schedule_idle_close()
+
+    @asynccontextmanager
+    async def page(self, **options):
+        async with self.context(**options) as context:
+            yield await context.new_page()
+
+    async def _shutdown(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        await self._close_browser()
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+    def shutdown(self, timeout=30):
+        if self.thread is None or not self.thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error shutting down browser pool: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def as_dict(self):
+        return {
+            'launches': self.launches,
+            'contexts_served': self.served,
+            'active_contexts': self.active,
+            'recycles': dict(self.recycles),
+            'browser_rss_mb': round(browser_rss() / (1024 * 1024), 1),
+            'launch': self.launch_latency.as_dict(),
+            'context_acquire': self.acquire_latency.as_dict(),
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """This process's pool; settings come from global.browser_pool in config.json"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            options = dict(DEFAULT_SETTINGS)
+            options.update(config_manager.config.get('global', {}).get('browser_pool', {}))
+            max_browsers = int(options['max_browsers'])
+            _pool = BrowserPool(
+                max_contexts=int(options['max_contexts']),
+                max_rss_mb=int(options['max_rss_mb']),
+                headless=bool(options['headless']),
+                idle_timeout=float(options['idle_timeout']),
+                slots=BrowserSlots(max_browsers, int(options['slot_lease'])) if max_browsers > 0 else None,
+                slot_wait=float(options['slot_wait']),
+            )
+        return _pool
+
+
+def init_worker_browser_pool():
+    """
+    worker_process_init hook: start the loop. The browser launches on the first context(),
+    or in the background here with prelaunch; the hook must return within Celery's
+    worker_proc_alive_timeout, so it never waits for Chromium.
+    """
+    pool = get_browser_pool()
+    pool.start()
+    if config_manager.config.get('global', {}).get('browser_pool', {}).get('prelaunch', DEFAULT_SETTINGS['prelaunch']):
+        pool.submit(pool.ensure_browser).add_done_callback(_log_prelaunch_failure)
+
+
+def _log_prelaunch_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        # The first task will try again
+        logger.warning(f"Browser prelaunch failed: {future.exception()}")
+
+
+def shutdown_browser_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        logger.info(f"Browser pool stats: {pool.as_dict()}")
+        pool.shutdown()
+
+
+def run_in_worker_loop(coro_fn, *args, **kwargs):
+    """Run a Playwright coroutine function on this process's browser loop and wait for it (from sync code)"""
+    return get_browser_pool().submit(coro_fn, *args, **kwargs).result()
+
+
+async def await_in_worker_loop(coro_fn, *args, **kwargs):
+    """The same, from a coroutine running on another event loop"""
+    return await asyncio.wrap_future(get_browser_pool().submit(coro_fn, *args, **kwargs))
@@ -0,0 +1,118 @@
+import re
+import logging
+from collections import Counter
+
+from auction.utils import config_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY_ID = 162733  # misc
+
+# Auction-site category id -> Airtable category names
+DEFAULT_CATEGORIES = {
+    2830472: ["appliances"],
+    2830485: ["arts, crafts & sewing", "arts & crafts", "arts"],
+    339711: ["automotive", "automotive parts & accessories"],
+    339747: ["furniture"],
+    2830498: ["baby products"],
+    2830511: ["beauty & personal care"],
+    2830524: ["cell phones & accessories"],
+    2830537: ["clothing", "clothing, shoes & jewelry"],
+    2153220: ["comics", "collectibles"],
+    339723: ["electronics", "computers & accessories"],
+    2830563: ["grocery & gourmet food"],
+    2830576: ["health & household"],
+    162703: ["home & kitchen", "storage & organization", "kitchen & dining"],
+    2830771: ["industrial & scientific"],
+    2830784: ["medical supplies & equipment"],
+    2830797: ["mobility & daily living aids"],
+    2673968: ["musical instruments"],
+    2830810: ["office products"],
+    2830823: ["lawn & garden", "garden & outdoor"],
+    2830836: ["dogs", "cats", "pet supplies"],
+    2830862: ["restaurant appliances & equipment"],
+    2830875: ["sports & fitness"],
+    2830914: ["lighting & ceiling fans", "tools & home improvement", "kitchen & bath fixtures", "power & hand tools"],
+    2830927: ["toys & games"],
+    2830940: ["video games"],
+    162733: ["misc"],
+    2830888: ["sports & outdoors", "outdoors"],
+    2831231: ["movies & tv"],
+    507716: ["luggage"],
+    507704: ["drugstore"],
+    2673955: ["books"],
+    2831248: ["cds & vinyl"],
+    70189253: ["pool"],
+    83468654: ["christmas"],
+}
+
+_AND = re.compile(r'\band\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_category(name):
+    """Case, whitespace and '&'/'and' insensitive key: 'Arts,Crafts and  Sewing' -> 'arts,crafts&sewing'"""
+    return _WHITESPACE.sub('', _AND.sub('&', str(name).lower()))
+
+
+class CategoryIndex:
+    """
+    Normalized category name -> auction-site category id, built once. Lookups that
+    fall back to DEFAULT_CATEGORY_ID are counted per raw name so unmapped Airtable
+    categories show up in the run report.
+    """
+
+    def __init__(self, categories=DEFAULT_CATEGORIES, overrides=None):
+        self.index = {}
+        for category_id, names in categories.items():
+            for name in names:
+                self.index[normalize_category(name)] = int(category_id)
+        for name, category_id in (overrides or {}).items():
+            self.index[normalize_category(name)] = int(category_id)
+        self.hits = 0
+        self.misses = 0
+        self.unmapped = Counter()
+
+    def lookup(self, category):
+        if category:
+            category_id = self.index.get(normalize_category(category))
+            if category_id is not None:
+                self.hits += 1
+                return category_id
+        self.misses += 1
+        self.unmapped[category or ''] += 1
+        return DEFAULT_CATEGORY_ID
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.unmapped = Counter()
+
+    def as_dict(self, top=20):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'unmapped': dict(self.unmapped.most_common(top)),
+        }
+
+
+_indexes = {}
+_indexes_config = None
+
+
+def get_category_index(warehouse=None):
+    """
+    Index for a warehouse (default: the active one). Extra or replacement names can be
+    set per warehouse as "category_overrides": {"Airtable category": category_id} in
+    config.json. Indexes are rebuilt only when the config is reloaded.
+    """
+    global _indexes_config
+    if _indexes_config is not config_manager.config:
+        _indexes.clear()
+        _indexes_config = config_manager.config
+
+    warehouse = warehouse or config_manager.active_warehouse
+    if warehouse not in _indexes:
+        overrides = config_manager.config.get('warehouses', {}).get(warehouse, {}).get('category_overrides', {})
+        _indexes[warehouse] = CategoryIndex(overrides=overrides)
+    return _indexes[warehouse]
@@ -0,0 +1,103 @@
+import json
+import time
+import hashlib
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Run stages in order; a resumed run skips whatever the checkpoint says is already done
+STAGE_IMAGES = 'images'
+STAGE_CSV_SAVED = 'csv_saved'
+STAGE_UPLOADED = 'uploaded'
+
+
+# Airtable re-signs attachment url and thumbnails on every read; these are what identify the file
+ATTACHMENT_IDENTITY = ('id', 'filename', 'size')
+
+
+def _is_attachment_list(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) and 'url' in item for item in value)
+
+
+def stable_fields(record):
+    """A record's fields with attachments reduced to the keys that stay the same across reads"""
+    return {
+        name: [{key: item.get(key) for key in ATTACHMENT_IDENTITY} for item in value] if _is_attachment_list(value) else value
+        for name, value in record.get('fields', {}).items()
+    }
+
+
+def record_fingerprint(record):
+    """Hash of a record's fields, so a resumed run only reuses rows that did not change in Airtable"""
+    payload = json.dumps(stable_fields(record), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FormatterCheckpoint:
+    """
+    Per-event progress of a formatter run, kept in Redis so a recycled worker or a
+    task retry can pick up where the last run stopped.
+
+    - formatter_checkpoint:{event_id}          hash: stage, task_id, updated_at, ...
+    - formatter_checkpoint:{event_id}:records  hash: record id -> {"fingerprint", "images", "result"}
+
+    Uploaded image URLs are checkpointed in ImageMetadata by the formatter itself.
+    Redis errors are logged and treated as an empty checkpoint.
+    """
+    PREFIX = "formatter_checkpoint"
+    TTL = 3 * 86400  # 3 days
+
+    def __init__(self, event_id, redis_conn=None):
+        self.event_id = event_id
+        self.redis = redis_conn or settings.REDIS_CONN
+        self.key = f"{self.PREFIX}:{event_id}"
+        self.records_key = f"{self.key}:records"
+
+    def reset(self, task_id=None):
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(self.key, self.records_key)
+            pipe.hset(self.key, mapping={'stage': STAGE_IMAGES, 'task_id': task_id or '', 'updated_at': int(time.time())})
+            pipe.expire(self.key, self.TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to reset formatter checkpoint for {self.event_id}: {e}")
+
+    def stage(self):
+        try:
+            return self.redis.hget(self.key, 'stage')
+        except Exception as e:
+            logger.warning(f"Failed to read formatter checkpoint for {self.event_id}: {e}")
+            return None
+
+    def mark_stage(self, stage, **info):
+        try:
+            mapping = {'stage': stage, 'updated_at': int(time.time())}
+            mapping.update({name: str(value) for name, value in info.items()})
+            pipe = self.redis.pipeline()
+            pipe.hset(self.key, mapping=mapping)
+            pipe.expire(self.key, self.TTL)
+            pipe.expire(self.records_key, self.TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to update formatter checkpoint for {self.event_id}: {e}")
+
+    def save_record(self, record, result, images=None):
+        """images maps image number -> source key, so a changed record can still keep its unchanged images"""
+        try:
+            entry = json.dumps(
+                {'fingerprint': record_fingerprint(record), 'images': images or {}, 'result': result}, default=str
+            )
+            self.redis.hset(self.records_key, record['id'], entry)
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint record {record.get('id')}: {e}")
+
+    def load_records(self):
+        """record id -> {"fingerprint", "images", "result"} for every record assembled so far"""
+        try:
+            entries = self.redis.hgetall(self.records_key)
+        except Exception as e:
+            logger.warning(f"Failed to load formatter checkpoint for {self.event_id}: {e}")
+            return {}
+        return {record_id: json.loads(entry) for record_id, entry in entries.items()}
@@ -0,0 +1,85 @@
+import csv
+import hashlib
+import logging
+from io import StringIO
+
+from auction.utils.formatter_checkpoint import record_fingerprint
+from auction.utils.lot_schema import Lot
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_COLUMNS = ['ID', 'Fingerprint']
+
+
+def build_key(starting_price, lot_header):
+    """Run settings that change every lot; a different key makes every record count as changed"""
+    return f"{starting_price}|{lot_header.event_id}|{lot_header.region}|{lot_header.lot_prefix}"
+
+
+def lot_fingerprint(record, key):
+    return hashlib.sha1(f"{key}|{record_fingerprint(record)}".encode('utf-8')).hexdigest()
+
+
+def manifest_csv(fingerprints):
+    """record id -> fingerprint as a two-column CSV, stored next to the full CSV it describes"""
+    output = StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(MANIFEST_COLUMNS)
+    writer.writerows(sorted(fingerprints.items()))
+    return output.getvalue()
+
+
+def parse_manifest(text):
+    reader = csv.reader(StringIO(text))
+    if next(reader, None) != MANIFEST_COLUMNS:
+        raise ValueError("Not a formatter manifest")
+    return {row[0]: row[1] for row in reader if len(row) == 2}
+
+
+class PreviousBuild:
+    """
+    What the event's last stored CSV was built from. reuse() hands back the previous
+    Lot of a record whose fingerprint is unchanged; anything else must be rebuilt.
+    """
+
+    def __init__(self, csv_text, manifest_text, lot_header):
+        self.fingerprints = parse_manifest(manifest_text)
+        self.rows = {
+            row['ID']: row for row in csv.DictReader(StringIO(csv_text))
+            if row.get('ID') in self.fingerprints
+        }
+        self.lot_header = lot_header
+        self.seen = set()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def reuse(self, record_id, fingerprint):
+        self.seen.add(record_id)
+        row = self.rows.get(record_id)
+        if row is None or self.fingerprints.get(record_id) != fingerprint:
+            return None
+        return Lot.from_dict(self.lot_header, row)
+
+    def is_change(self, record_id, fingerprint):
+        return self.fingerprints.get(record_id) != fingerprint
+
+    def removed(self):
+        return set(self.rows) - self.seen
+
+
+def load_previous_build(event, lot_header):
+    """The latest build of the event that has a manifest, or None (call from sync code)"""
+    from auction.models import AuctionFormattedData
+
+    formatted = (
+        AuctionFormattedData.objects.filter(event=event, manifest__isnull=False)
+        .select_related('blob', 'manifest').order_by('-created_at').first()
+    )
+    if formatted is None:
+        return None
+    try:
+        return PreviousBuild(formatted.csv_data, formatted.manifest.text, lot_header)
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable previous build for event {event.event_id}: {e}")
+        return None
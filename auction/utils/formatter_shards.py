@@ -0,0 +1,75 @@
+import json
+import logging
+from django.conf import settings
+
+from auction.utils import config_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_SIZE = 250
+
+
+def get_shard_size():
+    """Records per shard of a distributed run; global.formatter_shard_size in config.json"""
+    return int(config_manager.config.get('global', {}).get('formatter_shard_size', DEFAULT_SHARD_SIZE))
+
+
+class ShardStore:
+    """
+    Inputs and outputs of the shards of one distributed formatter run, kept in Redis so
+    that only shard numbers travel through the broker and result backend.
+
+    - formatter_run:{run_id}:records:{shard}  JSON list of Airtable records
+    - formatter_run:{run_id}:results:{shard}  JSON {"lots", "fingerprints", "failed", "record_ids"}
+    - formatter_run:{run_id}:done             set of finished shard numbers
+    """
+    PREFIX = "formatter_run"
+    TTL = 86400  # 1 day; the merge deletes the run's keys when it finishes
+
+    def __init__(self, run_id, redis_conn=None):
+        self.run_id = run_id
+        self.redis = redis_conn or settings.REDIS_CONN
+        self.key = f"{self.PREFIX}:{run_id}"
+
+    def save_records(self, shard, records):
+        self.redis.setex(f"{self.key}:records:{shard}", self.TTL, json.dumps(records))
+
+    def load_records(self, shard):
+        data = self.redis.get(f"{self.key}:records:{shard}")
+        if data is None:
+            raise LookupError(f"Records for shard {shard} of run {self.run_id} are missing or expired")
+        return json.loads(data)
+
+    def save_results(self, shard, lots, fingerprints, failed, record_ids):
+        """Store a shard's output and return how many shards have finished"""
+        payload = json.dumps(
+            {'lots': lots, 'fingerprints': fingerprints, 'failed': failed, 'record_ids': record_ids}, default=str
+        )
+        pipe = self.redis.pipeline()
+        pipe.setex(f"{self.key}:results:{shard}", self.TTL, payload)
+        pipe.sadd(f"{self.key}:done", shard)
+        pipe.expire(f"{self.key}:done", self.TTL)
+        pipe.scard(f"{self.key}:done")
+        return pipe.execute()[-1]
+
+    def load_results(self, shard_count):
+        """All shards' lots (in shard order), fingerprints, failures and record ids"""
+        lots, fingerprints, failed, record_ids = [], {}, [], []
+        for shard in range(shard_count):
+            data = self.redis.get(f"{self.key}:results:{shard}")
+            if data is None:
+                raise LookupError(f"Results for shard {shard} of run {self.run_id} are missing or expired")
+            result = json.loads(data)
+            lots.extend(result['lots'])
+            fingerprints.update(result['fingerprints'])
+            failed.extend(result['failed'])
+            record_ids.extend(result['record_ids'])
+        return lots, fingerprints, failed, record_ids
+
+    def delete(self):
+        try:
+            keys = list(self.redis.scan_iter(match=f"{self.key}:*", count=500))
+            if keys:
+                self.redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Failed to delete shard data of run {self.run_id}: {e}")
@@ -0,0 +1,64 @@
+import json
+import hashlib
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def image_cache_key(url, attachment_id=None):
+    """Airtable attachment ids are stable across relists; signed URLs are not, so they are only a fallback"""
+    if attachment_id:
+        return f"att:{attachment_id}"
+    return f"url:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+class ProcessedImageCache:
+    """
+    Maps a source image (Airtable attachment id or URL hash) to the processed JPEG
+    already stored in MinIO, so relisted lots skip download, transform and upload.
+
+    Index layout in Redis:
+    - image_cache:v2:{source_key}       -> {"url": ..., "object": ...}
+    Objects are content-addressed (content_object_name), so nothing ever overwrites the
+    bytes a hit points at. v1 entries pointed at rewritable {record_id}_{n}.jpg names.
+    """
+    PREFIX = "image_cache:v2"
+    TTL = 90 * 86400  # 90 days
+
+    def __init__(self, redis_conn=None):
+        self.redis = redis_conn or settings.REDIS_CONN
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _source_key(self, key):
+        return f"{self.PREFIX}:{key}"
+
+    def lookup(self, key):
+        try:
+            data = self.redis.get(self._source_key(key))
+            return json.loads(data)['url'] if data else None
+        except Exception as e:
+            logger.warning(f"Image cache lookup failed for {key}: {e}")
+            return None
+
+    def lookup_many(self, keys):
+        """One round trip for all of a record's images; misses and errors come back as None"""
+        if not keys:
+            return []
+        try:
+            values = self.redis.mget([self._source_key(key) for key in keys])
+            return [json.loads(value)['url'] if value else None for value in values]
+        except Exception as e:
+            logger.warning(f"Image cache lookup failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+    def store(self, key, object_name, url):
+        try:
+            self.redis.setex(self._source_key(key), self.TTL, json.dumps({'url': url, 'object': object_name}))
+        except Exception as e:
+            logger.warning(f"Image cache store failed for {key}: {e}")
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced}
@@ -0,0 +1,227 @@
+"""
+Image transform engine for the auction formatter.
+
+The Pillow work (decode, rotate, resize, progressive JPEG encode) is CPU bound and
+blocks the event loop when run inline. This module keeps the transform as a plain
+bytes -> bytes function so it can run in a separate process, and wraps it in an
+engine the async pipeline can await with a memory-aware admission limit.
+
+This module intentionally has no Django imports so worker processes stay cheap.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image, ExifTags
+
+logger = logging.getLogger(__name__)
+
+
+def get_image_orientation(img: Image.Image) -> int:
+    try:
+        exif = img._getexif()
+        if exif:
+            for tag, value in exif.items():
+                if ExifTags.TAGS.get(tag) == 'Orientation':
+                    return value
+    except (AttributeError, KeyError, IndexError):
+        pass
+    return None
+
+
+# One transpose per EXIF orientation value (1 = already upright)
+ORIENTATION_TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+
+def transform_image(image_data: bytes, width_threshold: int = 1024, dpi_threshold: int = 72, fast: bool = True) -> bytes:
+    """Decode, orient, resize and re-encode one image. Raises on failure."""
+    if not image_data:
+        raise ValueError("Empty image data")
+    if fast:
+        return _transform_image_fast(image_data, width_threshold, dpi_threshold)
+
+    with Image.open(BytesIO(image_data)) as img:
+        # Convert to RGB early if needed
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+
+        # Handle orientation
+        orientation = get_image_orientation(img)
+        if orientation == 6:
+            img = img.transpose(Image.ROTATE_270)
+        elif orientation == 8:
+            img = img.transpose(Image.ROTATE_90)
+
+        # Resize if needed (using LANCZOS for better quality)
+        width, height = img.size
+        if width > width_threshold:
+            new_width = width_threshold
+            new_height = int(height * (new_width / width))
+            img = img.resize((new_width, new_height), Image.LANCZOS)
+
+        return _encode_jpeg(img, dpi_threshold)
+
+
+def _transform_image_fast(image_data: bytes, width_threshold: int, dpi_threshold: int) -> bytes:
+    """
+    Visually equivalent to the full path, but a 12MP JPEG is decoded by libjpeg at 1/2, 1/4
+    or 1/8 scale (never below the target size) before the final LANCZOS resample,
+    and every EXIF orientation is applied in a single transpose.
+    """
+    with Image.open(BytesIO(image_data)) as img:
+        orientation = img.getexif().get(0x0112)
+        # Orientations 5-8 swap width and height, so the output width is the stored height
+        swapped = orientation in (5, 6, 7, 8)
+        width, height = img.size
+        oriented_width = height if swapped else width
+
+        if oriented_width > width_threshold:
+            scale = width_threshold / oriented_width
+            # draft() is a no-op for non-JPEG formats; it picks the smallest DCT scale >= requested size
+            img.draft('RGB', (max(1, int(width * scale)), max(1, int(height * scale))))
+
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        transpose = ORIENTATION_TRANSPOSE.get(orientation)
+        if transpose is not None:
+            img = img.transpose(transpose)
+
+        width, height = img.size
+        if width > width_threshold:
+            new_width = width_threshold
+            new_height = int(height * (new_width / width))
+            # reducing_gap lets Pillow box-reduce formats draft() cannot scale before the LANCZOS pass
+            img = img.resize((new_width, new_height), Image.LANCZOS, reducing_gap=3.0)
+
+        return _encode_jpeg(img, dpi_threshold)
+
+
+def _encode_jpeg(img: Image.Image, dpi_threshold: int) -> bytes:
+    # Set DPI
+    if img.info.get('dpi', (72, 72))[0] > dpi_threshold:
+        img.info['dpi'] = (dpi_threshold, dpi_threshold)
+
+    # Optimize output
+    output = BytesIO()
+    img.save(output,
+             format='JPEG',
+             quality=85,
+             optimize=True,
+             progressive=True)
+    return output.getvalue()
+
+
+def default_worker_count() -> int:
+    """Cores available to this process, capped to the dyno's CPU share on Heroku"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    if os.environ.get('DYNO') is not None:
+        # Standard-2X reports the host's cores but only has a 2x CPU share
+        return max(1, min(cores, 2))
+    return max(1, cores)
+
+
+def _in_daemon_process() -> bool:
+    """Celery prefork children are daemonic and may not fork their own pool"""
+    if multiprocessing.current_process().daemon:
+        return True
+    try:
+        import billiard
+        return bool(billiard.current_process().daemon)
+    except Exception:
+        return False
+
+
+class ImageTransformEngine:
+    """
+    Runs transform_image in a bounded ProcessPoolExecutor.
+
+    Admission is limited two ways so raw images cannot pile up in memory:
+    - at most max_in_flight transforms are submitted at once
+    - the total size of raw images admitted may not exceed memory_budget bytes
+    Callers simply await transform(); when either limit is reached they wait.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, memory_budget: int = 128 * 1024 * 1024,
+                 max_in_flight: Optional[int] = None, fast: bool = True):
+        self.max_workers = max_workers or default_worker_count()
+        self.fast = fast
+        self.memory_budget = memory_budget
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.executor = None
+        self.uses_processes = False
+        self._slots = None
+        self._budget_condition = None
+        self._bytes_in_flight = 0
+
+    def start(self):
+        if self.executor is not None:
+            return
+        if _in_daemon_process():
+            # Pillow releases the GIL for decode/resize/encode, so threads still keep the loop free
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='image-transform')
+            self.uses_processes = False
+        else:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('forkserver' if os.name == 'posix' else 'spawn')
+            )
+            self.uses_processes = True
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._budget_condition = asyncio.Condition()
+        logger.info(f"Image transform engine started with {self.max_workers} "
+                    f"{'processes' if self.uses_processes else 'threads'}")
+
+    async def _reserve(self, size: int):
+        async with self._budget_condition:
+            # A single oversized image is still admitted once nothing else is in flight
+            await self._budget_condition.wait_for(
+                lambda: self._bytes_in_flight == 0 or self._bytes_in_flight + size <= self.memory_budget
+            )
+            self._bytes_in_flight += size
+
+    async def _release(self, size: int):
+        async with self._budget_condition:
+            self._bytes_in_flight -= size
+            self._budget_condition.notify_all()
+
+    async def transform(self, image_data: bytes, width_threshold: int = 1024, dpi_threshold: int = 72,
+                        timeout: Optional[float] = None) -> bytes:
+        """timeout covers only the executor call, not the wait for memory budget or a slot"""
+        if self.executor is None:
+            self.start()
+        size = len(image_data)
+        await self._reserve(size)
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await asyncio.wait_for(loop.run_in_executor(
+                    self.executor, transform_image, image_data, width_threshold, dpi_threshold, self.fast
+                ), timeout)
+        finally:
+            await self._release(size)
+
+    @property
+    def bytes_in_flight(self) -> int:
+        return self._bytes_in_flight
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,187 @@
+"""
+Lot schema for the auction-site CSV import.
+
+A formatted lot is a slotted Lot holding only the fields that vary per lot. Columns
+that are the same for every lot of an event (EventID, Region, Seller, the import
+flags...) live once in an EventLotHeader shared by the whole run. Typed columns are
+formatted once, when the Lot is built, and LotCsvWriter writes each row straight out
+while checking it against the schema.
+"""
+
+import re
+import csv
+import math
+from io import StringIO
+
+from auction.utils.category_index import DEFAULT_CATEGORY_ID
+
+
+class LotSchemaError(ValueError):
+    pass
+
+
+def format_price(value, default="0.00"):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return f"{number:.2f}" if math.isfinite(number) else default
+
+
+def format_decimal(value):
+    """Like format_price, but unknown values stay blank instead of becoming 0.00"""
+    return format_price(value, default="")
+
+
+def format_category(value):
+    try:
+        return str(int(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return str(DEFAULT_CATEGORY_ID)
+
+
+class Column:
+    """attr names the Lot slot holding the value; columns without one come from the EventLotHeader"""
+    __slots__ = ('name', 'attr', 'formatter', 'pattern')
+
+    def __init__(self, name, attr=None, formatter=None, pattern=None):
+        self.name = name
+        self.attr = attr
+        self.formatter = formatter
+        self.pattern = re.compile(pattern) if pattern else None
+
+
+LOT_COLUMNS = (
+    Column('EventID'), Column('LotNumber', 'lot_code'), Column('Seller'), Column('ConsignorNumber'),
+    Column('Category', 'category', format_category, r'\d+'), Column('Region'), Column('ListingType'),
+    Column('Currency'), Column('Title', 'title'), Column('Subtitle', 'subtitle'),
+    Column('Description', 'description'), Column('Price', 'price', format_price, r'-?\d+\.\d{2}'),
+    Column('Quantity'), Column('IsTaxable'),
+    *(Column(f'Image_{i}', f'image_{i}') for i in range(1, 11)),
+    Column('YouTubeID'), Column('PdfAttachments'), Column('Bold'), Column('Badge'),
+    Column('Highlight'), Column('ShippingOptions'), Column('Duration'), Column('StartDTTM'),
+    Column('EndDTTM'), Column('AutoRelist'), Column('GoodTilCanceled'),
+    Column('Working Condition', 'working_condition'), Column('UPC', 'upc'), Column('Truck', 'truck'),
+    Column('Source'), Column('Size', 'size'), Column('Photo Taker', 'photo_taker'), Column('Packaging'),
+    Column('Other Notes', 'other_notes'), Column('MSRP', 'msrp', format_decimal, r'(-?\d+\.\d{2})?'),
+    Column('Lot Number', 'lot_number'), Column('Location', 'location'),
+    Column('Item Condition', 'item_condition'), Column('ID', 'record_id'), Column('Amazon ID', 'amazon_id'),
+)
+
+CSV_COLUMNS = [column.name for column in LOT_COLUMNS]
+LOT_FIELDS = tuple(column for column in LOT_COLUMNS if column.attr)
+
+# Values the import expects on every lot, whatever the record says
+FIXED_VALUES = {
+    'Seller': '702Auctions',
+    'ListingType': 'Auction',
+    'Currency': 'USD',
+    'Quantity': '1',
+    'IsTaxable': 'true',
+    'Bold': 'false',
+    'Highlight': 'false',
+    'ShippingOptions': '',
+    'AutoRelist': '0',
+    'GoodTilCanceled': 'false',
+    'Source': 'AMZ FC',
+}
+
+
+class EventLotHeader:
+    """Column values shared by every lot of one event"""
+    __slots__ = ('event_id', 'region', 'lot_prefix', 'values')
+
+    def __init__(self, event_id, region, lot_prefix):
+        self.event_id = event_id
+        self.region = region
+        self.lot_prefix = lot_prefix
+        values = {column.name: '' for column in LOT_COLUMNS if not column.attr}
+        values.update(FIXED_VALUES)
+        values['EventID'] = str(event_id)
+        values['Region'] = region
+        self.values = values
+
+
+class Lot:
+    """
+    The per-lot fields of one formatted record, all str. Build it with Lot.build so
+    typed columns are formatted exactly once.
+    """
+    __slots__ = tuple(column.attr for column in LOT_FIELDS)
+
+    @classmethod
+    def build(cls, header, **fields):
+        lot = cls()
+        for column in LOT_FIELDS:
+            value = fields.get(column.attr, '')
+            if column.formatter is not None:
+                value = column.formatter(value)
+            elif value is None:
+                value = ''
+            elif not isinstance(value, str):
+                value = str(value)
+            setattr(lot, column.attr, value)
+        if not fields.get('lot_code'):
+            lot.lot_code = header.lot_prefix + lot.lot_number
+        return lot
+
+    def set_image(self, image_number, url):
+        setattr(self, f'image_{image_number}', url)
+
+    def as_dict(self):
+        """Column name -> value for the per-lot columns; the inverse of from_dict"""
+        return {column.name: getattr(self, column.attr) for column in LOT_FIELDS}
+
+    @classmethod
+    def from_dict(cls, header, data):
+        """Rebuild a Lot from as_dict output (or any dict keyed by column name)"""
+        return cls.build(header, **{column.attr: data.get(column.name, '') for column in LOT_FIELDS})
+
+
+class LotCsvWriter:
+    """
+    Writes lots to CSV in one pass, validating each row against LOT_COLUMNS.
+
+    Each row starts as a copy of the header's shared values and only the per-lot
+    slots are filled in. The CSV is built in memory: every consumer (CsvBlob, the
+    bid-site upload) takes the whole text anyway.
+    A non-str value or a malformed typed value raises LotSchemaError naming the lot.
+    """
+
+    def __init__(self, header):
+        self.header = header
+        self._output = StringIO()
+        self._csv = csv.writer(self._output, lineterminator='\n')
+        self._template = [header.values.get(column.name, '') for column in LOT_COLUMNS]
+        self._fields = [(position, column) for position, column in enumerate(LOT_COLUMNS) if column.attr]
+        self.rows = 0
+        self._csv.writerow(CSV_COLUMNS)
+
+    def write(self, lot):
+        row = self._template.copy()
+        for position, column in self._fields:
+            value = getattr(lot, column.attr)
+            if not isinstance(value, str):
+                raise LotSchemaError(f"Lot {lot.lot_code} column '{column.name}' is {type(value).__name__}, not str")
+            if column.pattern is not None and not column.pattern.fullmatch(value):
+                raise LotSchemaError(f"Lot {lot.lot_code} column '{column.name}' has invalid value {value!r}")
+            row[position] = value
+        self._csv.writerow(row)
+        self.rows += 1
+
+    def write_all(self, lots):
+        for lot in lots:
+            self.write(lot)
+        return self
+
+    def getvalue(self):
+        return self._output.getvalue()
+
+    def close(self):
+        self._output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,241 @@
+import os
+import gc
+import time
+import asyncio
+import logging
+import resource
+import tracemalloc
+from collections import deque
+
+from auction.utils import config_manager
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+INFO = logging.INFO
+WARNING = logging.WARNING
+
+
+def current_rss():
+    """Resident set size of this process right now, in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class AdaptiveLimit:
+    """
+    An asyncio semaphore whose limit can be lowered or raised while it is held. Lowering
+    it never interrupts holders; new acquirers wait until fewer than `limit` are active.
+
+    The limit is min(target, ceiling): the target is where a throughput controller
+    (AimdController) wants it, the ceiling is what the MemoryGovernor allows.
+    """
+
+    def __init__(self, limit, name=''):
+        self.name = name
+        self.max_limit = limit
+        self.target = limit
+        self.ceiling = limit
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def limit(self):
+        return max(1, min(self.target, self.ceiling))
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as we were cancelled; hand it on
+                self.release()
+            else:
+                # A cancelled waiter left queued would send every later acquire() to the queue
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                self._wake()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def set_target(self, target):
+        self.target = max(1, min(self.max_limit, target))
+        self._wake()
+
+    def set_ceiling(self, ceiling):
+        self.ceiling = max(1, min(self.max_limit, ceiling))
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class MemoryGovernor:
+    """
+    Samples the current RSS every `interval` seconds and sets the ceiling of each
+    AdaptiveLimit with it.
+
+    Above `high` of memory_limit every ceiling drops to half the current limit (not below
+    min_limit); above `critical` a gc.collect() also runs, at most once per cooldown.
+    Once RSS falls below `low`, ceilings grow back by an eighth of the maximum per step. Adjustments are at least `cooldown`
+    seconds apart so a limit change can take effect before the next one. Each decision
+    is passed to report(message, level, action) and kept for as_dict().
+
+    With trace_python, tracemalloc also reports the Python heap (slower; for diagnosis).
+    """
+
+    def __init__(self, memory_limit, limits, report=None, high=0.8, critical=0.9, low=0.6,
+                 interval=0.5, cooldown=2.0, min_limit=2, trace_python=False):
+        self.memory_limit = memory_limit
+        self.limits = limits
+        self.report = report
+        self.high = high
+        self.critical = critical
+        self.low = low
+        self.interval = interval
+        self.cooldown = cooldown
+        self.min_limit = min_limit
+        self.trace_python = trace_python
+        self.decisions = deque(maxlen=20)
+        self.shrinks = 0
+        self.grows = 0
+        self.gc_runs = 0
+        self.rss = 0
+        self.peak_rss = 0
+        self._last_adjustment = 0.0
+        self._last_gc = 0.0
+        self._started_at = time.monotonic()
+        self._task = None
+        self._started_tracemalloc = False
+
+    def sample(self):
+        self.rss = current_rss()
+        self.peak_rss = max(self.peak_rss, self.rss)
+        return self.rss / self.memory_limit
+
+    def evaluate(self, now=None):
+        """Take one sample and adjust the limits if needed; returns the decision or None"""
+        now = time.monotonic() if now is None else now
+        ratio = self.sample()
+        if now - self._last_adjustment < self.cooldown:
+            return None
+
+        action = None
+        if ratio >= self.high:
+            if ratio >= self.critical and now - self._last_gc >= self.cooldown:
+                gc.collect()
+                self.gc_runs += 1
+                self._last_gc = now
+            for limit in self.limits.values():
+                new_ceiling = max(self.min_limit, limit.limit // 2)
+                if new_ceiling < limit.ceiling:
+                    limit.set_ceiling(new_ceiling)
+                    action = 'shrink'
+        elif ratio < self.low:
+            for limit in self.limits.values():
+                new_ceiling = min(limit.max_limit, limit.ceiling + max(1, limit.max_limit // 8))
+                if new_ceiling > limit.ceiling:
+                    limit.set_ceiling(new_ceiling)
+                    action = 'grow'
+        if action is None:
+            return None
+
+        self._last_adjustment = now
+        if action == 'shrink':
+            self.shrinks += 1
+        else:
+            self.grows += 1
+        decision = {
+            'at_s': round(now - self._started_at, 1),
+            'action': action,
+            'rss_mb': round(self.rss / (1024 * 1024), 1),
+            'ratio': round(ratio, 3),
+            'limits': {name: limit.limit for name, limit in self.limits.items()},
+        }
+        if self.trace_python:
+            decision['python_heap_mb'] = round(tracemalloc.get_traced_memory()[0] / (1024 * 1024), 1)
+        self.decisions.append(decision)
+        if self.report is not None:
+            limits = ', '.join(f"{name} {value}" for name, value in decision['limits'].items())
+            message = (
+                f"Memory at {decision['ratio']:.0%} of limit (RSS {decision['rss_mb']}MB): "
+                f"{'reducing' if action == 'shrink' else 'restoring'} concurrency to {limits}"
+            )
+            self.report(message, WARNING if action == 'shrink' else INFO, action)
+        return decision
+
+    async def run(self):
+        while True:
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.warning(f"Memory governor sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._started_at = time.monotonic()
+        self.sample()
+        self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def as_dict(self):
+        return {
+            'limit_mb': round(self.memory_limit / (1024 * 1024), 1),
+            'rss_mb': round(self.rss / (1024 * 1024), 1),
+            'peak_rss_mb': round(self.peak_rss / (1024 * 1024), 1),
+            'limits': {name: limit.limit for name, limit in self.limits.items()},
+            'shrinks': self.shrinks,
+            'grows': self.grows,
+            'gc_runs': self.gc_runs,
+            'decisions': list(self.decisions),
+        }
+
+
+def build_memory_governor(memory_limit, limits, report=None):
+    """Thresholds can be tuned under global.memory_governor in config.json"""
+    settings = config_manager.config.get('global', {}).get('memory_governor', {})
+    return MemoryGovernor(
+        memory_limit,
+        limits,
+        report=report,
+        high=float(settings.get('high', 0.8)),
+        critical=float(settings.get('critical', 0.9)),
+        low=float(settings.get('low', 0.6)),
+        interval=float(settings.get('interval', 0.5)),
+        trace_python=bool(settings.get('tracemalloc', False)),
+    )
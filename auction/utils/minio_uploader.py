@@ -0,0 +1,80 @@
+import os
+import time
+import hashlib
+import asyncio
+import logging
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+import certifi
+import urllib3
+from minio import Minio
+
+from auction.utils.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Object names are derived from the bytes (content_object_name), so an object never
+# changes once written and browsers and CDNs may keep it indefinitely.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def content_object_name(content, extension='jpg'):
+    """Content-addressed object name; new bytes always get a new name instead of overwriting an old one"""
+    return f"{hashlib.sha256(content).hexdigest()}.{extension}"
+
+
+def build_minio_client(endpoint, access_key, secret_key, secure, pool_size):
+    """MinIO client whose urllib3 pool holds one connection per concurrent upload instead of the default 10"""
+    http_client = urllib3.PoolManager(
+        maxsize=pool_size,
+        block=True,
+        timeout=urllib3.Timeout(connect=10, read=60),
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+        retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+    )
+    return Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=secure,
+        http_client=http_client
+    )
+
+
+class MinioUploader:
+    """
+    Uploads in-memory objects with put_object on a dedicated thread pool, so the
+    event loop never blocks on MinIO and no temp files touch the disk.
+    """
+
+    def __init__(self, client, bucket, public_endpoint, max_workers):
+        self.client = client
+        self.bucket = bucket
+        self.public_endpoint = public_endpoint
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='minio-upload')
+        self.latency = LatencyHistogram('minio_upload')
+
+    def public_url(self, object_name):
+        return f"https://{self.public_endpoint}/{self.bucket}/{object_name}"
+
+    def _put(self, object_name, content, content_type):
+        self.client.put_object(
+            self.bucket,
+            object_name,
+            BytesIO(content),
+            length=len(content),
+            content_type=content_type,
+            metadata={'Cache-Control': IMMUTABLE_CACHE_CONTROL}
+        )
+
+    async def upload(self, object_name, content, content_type='image/jpeg'):
+        """Upload bytes and return the public URL. Raises on failure."""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            await loop.run_in_executor(self.executor, self._put, object_name, content, content_type)
+        finally:
+            self.latency.observe(time.monotonic() - started)
+        return self.public_url(object_name)
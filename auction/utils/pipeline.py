@@ -0,0 +1,141 @@
+"""
+Queue-connected stage pipeline.
+
+Each stage has its own worker count and a bounded input queue. Workers pull an item,
+run the stage handler and push whatever it returns into the next stage's queue, so a
+slow item only occupies one worker instead of holding back a whole batch. A full
+queue blocks the stage in front of it, which is what keeps memory bounded.
+"""
+
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self, queue=None):
+        end = self.finished_at or time.monotonic()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'throughput_per_s': round(self.processed / elapsed, 2) if elapsed else 0.0,
+            'utilization': round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0,
+            'queue_depth': queue.qsize() if queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+class Stage:
+    """
+    handler(item) is awaited for every item. Its return value is passed to the next
+    stage; returning None drops the item (the handler is expected to have recorded
+    the outcome itself). Exceptions are logged and counted, never propagated.
+
+    An optional limiter (any async context manager, e.g. an AdaptiveLimit) caps how
+    many workers run the handler at once, below the fixed worker count.
+    """
+
+    def __init__(self, name, handler, workers, queue_size, limiter=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.limiter = limiter
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = StageStats(name, workers)
+        self.next_stage = None
+        self._tasks = []
+
+    async def put(self, item):
+        await self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.stats.max_queue_depth:
+            self.stats.max_queue_depth = depth
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            if item is _END:
+                return
+            started = time.monotonic()
+            try:
+                if self.limiter is not None:
+                    async with self.limiter:
+                        result = await self.handler(item)
+                else:
+                    result = await self.handler(item)
+                self.stats.processed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                logger.error(f"Pipeline stage '{self.name}' failed: {e}", exc_info=True)
+                result = None
+            finally:
+                self.stats.busy_seconds += time.monotonic() - started
+            if result is not None and self.next_stage is not None:
+                await self.next_stage.put(result)
+
+    def start(self):
+        self.stats.started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self):
+        """Stop this stage once its queue is empty, then signal the next one"""
+        for _ in range(self.workers):
+            await self.queue.put(_END)
+        await asyncio.gather(*self._tasks)
+        self.stats.finished_at = time.monotonic()
+        if self.next_stage is not None:
+            await self.next_stage.drain()
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+class StagePipeline:
+    def __init__(self, stages):
+        self.stages = list(stages)
+        for current, following in zip(self.stages, self.stages[1:]):
+            current.next_stage = following
+        self.by_name = {stage.name: stage for stage in self.stages}
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    async def put(self, stage_name, item):
+        """Enqueue into any stage; blocks while that stage's queue is full"""
+        await self.by_name[stage_name].put(item)
+
+    async def close(self):
+        """Wait for every queued item to flow through all stages"""
+        await self.stages[0].drain()
+
+    def cancel(self):
+        for stage in self.stages:
+            stage.cancel()
+
+    def stats(self):
+        stats = []
+        for stage in self.stages:
+            stage_stats = stage.stats.as_dict(stage.queue)
+            if stage.limiter is not None and hasattr(stage.limiter, 'limit'):
+                stage_stats['limit'] = stage.limiter.limit
+            stats.append(stage_stats)
+        return stats
@@ -0,0 +1,70 @@
+import re
+import math
+import heapq
+import logging
+
+from auction.utils import config_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREMIUM_COUNT = 50
+# Matched anywhere in the subtitle, case-insensitively (so 'no' also excludes lots with NOTES)
+DEFAULT_EXCLUDE_KEYWORDS = ('missing', 'damaged', 'no')
+
+
+class PremiumSelector:
+    """
+    Picks the lots that open the auction: the top `count` distinct titles by MSRP,
+    skipping lots whose subtitle mentions any exclude keyword.
+
+    One pass keeps the highest-MSRP lot per normalized title, then a bounded heap
+    takes the top `count`, so the cost is O(n + titles * log count) rather than a
+    full sort of the event. Lots without a usable MSRP rank last; ties go to the
+    earlier lot.
+    """
+
+    def __init__(self, count=DEFAULT_PREMIUM_COUNT, exclude_keywords=DEFAULT_EXCLUDE_KEYWORDS):
+        self.count = count
+        self.exclude_keywords = tuple(exclude_keywords)
+        self._excluded = (
+            re.compile('|'.join(re.escape(keyword) for keyword in self.exclude_keywords), re.IGNORECASE).search
+            if self.exclude_keywords else None
+        )
+
+    @staticmethod
+    def _msrp(lot):
+        try:
+            value = float(lot.msrp)
+        except (TypeError, ValueError):
+            return -math.inf
+        return value if math.isfinite(value) else -math.inf
+
+    def select(self, lots):
+        """Returns (premium lots in MSRP order, every other lot in its original order)"""
+        best_by_title = {}
+        for position, lot in enumerate(lots):
+            if self._excluded is not None and self._excluded(lot.subtitle):
+                continue
+            title_key = lot.title.lower().strip()
+            # Negated position so that among equal MSRPs the earlier lot ranks higher
+            candidate = (self._msrp(lot), -position)
+            current = best_by_title.get(title_key)
+            if current is None or candidate > current:
+                best_by_title[title_key] = candidate
+
+        top = heapq.nlargest(self.count, best_by_title.values())
+        premium_positions = [-neg_position for _, neg_position in top]
+        chosen = set(premium_positions)
+        premium = [lots[position] for position in premium_positions]
+        others = [lot for position, lot in enumerate(lots) if position not in chosen]
+        return premium, others
+
+
+def get_premium_selector(warehouse=None):
+    """Per-warehouse settings come from "premium_lots": {"count": 50, "exclude_keywords": [...]} in config.json"""
+    warehouse = warehouse or config_manager.active_warehouse
+    settings = config_manager.config.get('warehouses', {}).get(warehouse, {}).get('premium_lots', {})
+    return PremiumSelector(
+        count=int(settings.get('count', DEFAULT_PREMIUM_COUNT)),
+        exclude_keywords=settings.get('exclude_keywords', DEFAULT_EXCLUDE_KEYWORDS)
+    )
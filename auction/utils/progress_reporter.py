@@ -0,0 +1,148 @@
+import time
+import asyncio
+import inspect
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger(f"{__name__}.trace")
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+class ProgressReporter:
+    """
+    Drop-in gui_callback that rate-limits what reaches the task status.
+
+    reporter(message, progress=None, level=INFO) logs the message at its level and
+    queues it for publishing. At most max_updates_per_second calls reach publish;
+    messages arriving in between are coalesced: the most severe (then most recent)
+    one is published with a "(+N more)" suffix, so warnings and errors are never
+    hidden behind routine progress. A pending update is flushed by the next call
+    after the window, by a timer on the running event loop, or by flush().
+
+    trace() is the per-lot/per-image debug channel: never published, and only one
+    in debug_sample_every messages is logged.
+
+    count(stage, outcome) keeps per-stage counters that are sent with every update;
+    gauge(stage, name, value) sets a current value (e.g. a concurrency limit) alongside them.
+    """
+
+    def __init__(self, publish, max_updates_per_second=2.0, debug_sample_every=50):
+        self.publish = publish
+        self._publish_takes_stages = self._accepts_stages(publish)
+        self.min_interval = 1.0 / max_updates_per_second
+        self.debug_sample_every = max(1, debug_sample_every)
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.published = 0
+        self.suppressed = 0
+        self.traced = 0
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+        self._pending = None  # (level, message)
+        self._pending_count = 0
+        self._progress = None
+        self._flush_scheduled = False
+
+    def __call__(self, message, progress=None, level=INFO):
+        logger.log(level, message)
+        now = time.monotonic()
+        with self._lock:
+            if progress is not None:
+                self._progress = progress
+            if self._pending is None or level >= self._pending[0]:
+                self._pending = (level, message)
+            self._pending_count += 1
+            due = now - self._last_publish >= self.min_interval
+            update = self._take_pending(now) if due else None
+            schedule = not due and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+        if update:
+            self._publish(*update)
+        elif schedule:
+            self._schedule_flush(self.min_interval - (now - self._last_publish))
+
+    def warning(self, message):
+        self(message, level=WARNING)
+
+    def error(self, message):
+        self(message, level=ERROR)
+
+    def trace(self, message):
+        self.traced += 1
+        if (self.traced - 1) % self.debug_sample_every == 0:
+            trace_logger.debug(f"[sampled 1/{self.debug_sample_every}] {message}")
+
+    def count(self, stage, outcome='done', n=1):
+        self.counters[stage][outcome] += n
+
+    def gauge(self, stage, name, value):
+        self.counters[stage][name] = value
+
+    def stage_counters(self):
+        return {stage: dict(outcomes) for stage, outcomes in self.counters.items()}
+
+    def flush(self):
+        """Publish whatever is pending right away (end of a stage or of the run)"""
+        with self._lock:
+            update = self._take_pending(time.monotonic())
+        if update:
+            self._publish(*update)
+
+    def _take_pending(self, now):
+        if self._pending is None:
+            return None
+        message = self._pending[1]
+        if self._pending_count > 1:
+            message = f"{message} (+{self._pending_count - 1} more)"
+            self.suppressed += self._pending_count - 1
+        self._pending = None
+        self._pending_count = 0
+        self._last_publish = now
+        self.published += 1
+        return message, self._progress
+
+    @staticmethod
+    def _accepts_stages(publish):
+        try:
+            parameters = inspect.signature(publish).parameters.values()
+        except (TypeError, ValueError):
+            return False
+        return any(p.name == 'stages' or p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+    def _publish(self, message, progress):
+        try:
+            if self._publish_takes_stages:
+                self.publish(message, progress, stages=self.stage_counters())
+            else:
+                self.publish(message, progress)
+        except Exception as e:
+            logger.warning(f"Progress publish failed: {e}")
+
+    def _schedule_flush(self, delay):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on the event loop thread; the next call or flush() will publish it
+            with self._lock:
+                self._flush_scheduled = False
+            return
+        loop.call_later(max(0.0, delay), self._scheduled_flush)
+
+    def _scheduled_flush(self):
+        with self._lock:
+            self._flush_scheduled = False
+        self.flush()
+
+    def as_dict(self):
+        return {
+            'published': self.published,
+            'coalesced': self.suppressed,
+            'traced': self.traced,
+            'stages': self.stage_counters(),
+        }
@@ -0,0 +1,103 @@
+import time
+import asyncio
+import logging
+import threading
+from django.conf import settings
+from auction.utils import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Token bucket with reservation: every caller takes its tokens immediately, letting the
+# balance go negative, and is told how long to wait until its tokens would have accrued.
+# One round trip per acquire, no polling, and callers are served in arrival order.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000) - requested
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil((burst - tokens) * 1000 / rate) + 1000)
+if tokens >= 0 then
+  return 0
+end
+return math.ceil(-tokens * 1000 / rate)
+"""
+
+# Requests per second and burst size, shared by every worker process and dyno
+DEFAULT_BUCKETS = {
+    'minio': {'rate': 100, 'burst': 100},
+    'airtable': {'rate': 5, 'burst': 5},  # Airtable allows 5 requests/s per base
+    'bid_site': {'rate': 2, 'burst': 4},
+}
+
+
+class LocalTokenBucket:
+    """In-process fallback with the same reservation semantics, used when Redis is unreachable"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, requested):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - requested
+            self.updated = now
+            if self.tokens >= 0:
+                return 0
+            return int(-self.tokens * 1000 / self.rate) + 1
+
+
+class TokenBucket:
+    """Distributed token bucket backed by Redis, keyed by bucket name"""
+
+    def __init__(self, name, rate, burst, redis_conn=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.key = f"rate_limit:{name}"
+        self.redis = redis_conn or settings.REDIS_CONN
+        self.local = LocalTokenBucket(rate, burst)
+        self._script = None
+        self._redis_failed = False
+
+    def reserve(self, tokens=1):
+        """Take tokens now and return the milliseconds to wait before using them"""
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+            wait_ms = int(self._script(keys=[self.key], args=[self.rate, self.burst, tokens]))
+            self._redis_failed = False
+            return wait_ms
+        except Exception as e:
+            if not self._redis_failed:
+                logger.warning(f"Rate limiter '{self.name}' falling back to per-process limits: {e}")
+                self._redis_failed = True
+            return self.local.reserve(tokens)
+
+    async def acquire(self, tokens=1):
+        # The reservation is a Redis round trip; keep it off the event loop
+        wait_ms = await asyncio.to_thread(self.reserve, tokens)
+        if wait_ms > 0:
+            await asyncio.sleep(wait_ms / 1000)
+
+
+_buckets = {}
+
+
+def get_bucket(name):
+    """Named bucket; rate/burst can be overridden under global.rate_limits in config.json"""
+    if name not in _buckets:
+        limits = dict(DEFAULT_BUCKETS.get(name, {'rate': 10, 'burst': 10}))
+        limits.update(config_manager.config.get('global', {}).get('rate_limits', {}).get(name, {}))
+        _buckets[name] = TokenBucket(name, limits['rate'], limits['burst'])
+    return _buckets[name]
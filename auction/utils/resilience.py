@@ -0,0 +1,158 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+import urllib3
+
+from auction.utils import config_manager
+from auction.utils.adaptive_concurrency import is_overload
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Attempts, backoff and per-attempt timeout for each formatter image stage
+DEFAULT_RETRY_POLICIES = {
+    'download': {'attempts': 3, 'base_delay': 0.5, 'max_delay': 8.0, 'timeout': 60.0},
+    'transform': {'attempts': 2, 'base_delay': 0.2, 'max_delay': 1.0, 'timeout': 60.0},
+    'upload': {'attempts': 4, 'base_delay': 0.5, 'max_delay': 8.0, 'timeout': 60.0},
+}
+DEFAULT_BREAKER = {'failure_threshold': 5, 'reset_timeout': 30.0}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit for {host} is open; next probe in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def is_host_failure(exc):
+    """Overload, or the host could not be reached at all; a bad image or a 404 is not the host's fault"""
+    if is_overload(exc):
+        return True
+    return isinstance(exc, (
+        aiohttp.ClientConnectionError, ConnectionError,
+        urllib3.exceptions.NewConnectionError, urllib3.exceptions.ProtocolError
+    ))
+
+
+def host_of(url):
+    return urlsplit(url).netloc or url
+
+
+class RetryPolicy:
+    """
+    Retries of one stage. Attempt n (from 0) is followed by a wait of half of
+    min(max_delay, base_delay * 2**n) plus a random share of the other half, so
+    retries of many images that failed together do not arrive together.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=8.0, timeout=60.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def backoff(self, attempt):
+        cap = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker. failure_threshold consecutive host failures open it; while open,
+    calls are refused at once. After reset_timeout one probe call is let through
+    (half-open): success closes the circuit, failure opens it for another reset_timeout.
+    """
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.times_opened = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpenError if the host should not be called right now"""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back is replaced after reset_timeout
+                if self.probe_started is None or now - self.probe_started >= self.reset_timeout:
+                    self.probe_started = now
+                    return
+            self.rejected += 1
+            raise CircuitOpenError(self.host, max(0.0, self.opened_at + self.reset_timeout - now))
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.host} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_started = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit for {self.host} opened after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_started = None
+
+    def as_dict(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
+
+
+_policies = {}
+_breakers = {}
+
+
+def get_retry_policy(stage):
+    """Stage retry policy; fields can be overridden under global.retry_policies in config.json"""
+    if stage not in _policies:
+        settings = dict(DEFAULT_RETRY_POLICIES.get(stage, DEFAULT_RETRY_POLICIES['download']))
+        settings.update(config_manager.config.get('global', {}).get('retry_policies', {}).get(stage, {}))
+        _policies[stage] = RetryPolicy(
+            int(settings['attempts']), float(settings['base_delay']), float(settings['max_delay']), float(settings['timeout'])
+        )
+    return _policies[stage]
+
+
+def get_breaker(host):
+    """Per-process breaker for a host; thresholds can be overridden under global.circuit_breaker in config.json"""
+    if host not in _breakers:
+        settings = dict(DEFAULT_BREAKER)
+        settings.update(config_manager.config.get('global', {}).get('circuit_breaker', {}))
+        _breakers[host] = CircuitBreaker(host, int(settings['failure_threshold']), float(settings['reset_timeout']))
+    return _breakers[host]
+
+
+def breaker_stats():
+    return {host: breaker.as_dict() for host, breaker in _breakers.items()}
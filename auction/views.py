@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, FileResponse, HttpResponse
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse
 from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.utils.encoding import smart_str
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from django.conf import settings
 import requests
 import logging
@@ -27,7 +29,7 @@ from auction.scripts.void_unpaid_on_bid import void_unpaid_main
 from auction.scripts.remove_duplicates_in_airtable import remove_duplicates_task
 from auction.scripts.auction_formatter import auction_formatter_task
 # from auction.scripts.upload_to_hibid import upload_to_hibid_main
-from auction.models import Event
+from auction.models import Event, AuctionFormattedData, CsvBlob
 from auction.utils.redis_utils import RedisTaskStatus
 from celery.result import AsyncResult
 from .tasks import auction_formatter_task, create_auction_task, remove_duplicates_task, void_unpaid_task
@@ -88,27 +90,72 @@ def get_auction_numbers(request):
         logger.exception("Full traceback:")
         return []
     
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip: listed (or covered by *) with a q-value above 0"""
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    for name in ('gzip', 'x-gzip', '*'):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
 @login_required
+@require_http_methods(["GET", "HEAD"])
 def download_formatted_csv(request, auction_id):
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    resources_dir = os.path.join(script_dir, 'resources', 'processed_csv')
-    csv_path = os.path.join(resources_dir, f'{auction_id}.csv')
-
-    logger.info(f"Attempting to download CSV from: {csv_path}")
-
-    if os.path.exists(csv_path):
-        logger.info(f"CSV file found at: {csv_path}")
-        try:
-            with open(csv_path, 'rb') as fh:
-                response = HttpResponse(fh.read(), content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="{smart_str(auction_id)}.csv"'
-                return response
-        except IOError:
-            logger.error(f"IOError when reading file: {csv_path}")
-            return HttpResponse("Error reading the CSV file", status=500)
+    """
+    Stream the latest formatted CSV stored for the event (?changes=1: the changes-only
+    CSV of the latest delta run). The content hash is the ETag, so a repeat download
+    gets a 304, and clients that accept gzip get the stored compressed bytes without
+    them being decompressed on the server.
+    """
+    changes_only = request.GET.get('changes') in ('1', 'true')
+    blob_field = 'changes' if changes_only else 'blob'
+    formatted = (
+        AuctionFormattedData.objects.filter(event__event_id=auction_id, **{f'{blob_field}__isnull': False})
+        .select_related(blob_field).defer(f'{blob_field}__data').order_by('-created_at').first()
+    )
+    if formatted is None:
+        logger.error(f"No {'changes-only' if changes_only else 'formatted'} CSV stored for event {auction_id}")
+        return HttpResponse(f"No formatted CSV found for event {auction_id}", status=404)
+
+    blob = getattr(formatted, blob_field)
+    # Weak: the gzip and identity encodings of the same CSV share one validator
+    etag = f'W/"{blob.sha256}"'
+    last_modified = int(formatted.created_at.timestamp())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        patch_vary_headers(not_modified, ('Accept-Encoding',))
+        return not_modified
+
+    # A full row fetch of just the blob, now that its data is actually needed
+    blob = CsvBlob.objects.get(pk=blob.pk)
+    use_gzip = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    response = StreamingHttpResponse(blob.iter_bytes(compressed=use_gzip), content_type='text/csv; charset=utf-8')
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = blob.compressed_size
     else:
-        logger.error(f"CSV file not found at: {csv_path}")
-        return HttpResponse(f"CSV file not found at {csv_path}", status=404)
+        response['Content-Length'] = blob.size
+    filename = f"{auction_id}_changes.csv" if changes_only else f"{auction_id}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{smart_str(filename)}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    logger.info(f"Streaming CSV {blob.sha256[:12]} for event {auction_id} ({'gzip' if use_gzip else 'identity'})")
+    return response
 
 @login_required
 def get_warehouse_events(request):
@@ -333,6 +380,9 @@ def auction_formatter_view(request):
             auction_id = request.POST.get('auction_id')
             selected_warehouse = request.POST.get('selected_warehouse')
             starting_price_str = request.POST.get('starting_price', '')
+            resume = request.POST.get('resume') in ('on', 'true', '1')
+            delta = request.POST.get('delta') in ('on', 'true', '1')
+            distributed = request.POST.get('distributed') in ('on', 'true', '1')
 
             if not all([auction_id, selected_warehouse]):
                 return JsonResponse({'error': 'Missing required fields'}, status=400)
@@ -347,7 +397,9 @@ def auction_formatter_view(request):
                 except ValueError:
                     return JsonResponse({'error': 'Invalid starting price format'}, status=400)
 
-            task = auction_formatter_task.delay(auction_id, selected_warehouse, starting_price)
+            task = auction_formatter_task.delay(
+                auction_id, selected_warehouse, starting_price, resume=resume, delta=delta, distributed=distributed
+            )
             
             logger.info(f"Auction formatter task started for auction {auction_id}")
             return JsonResponse({
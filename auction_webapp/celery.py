@@ -1,6 +1,7 @@
 import os
 import asyncio
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from django.conf import settings
 import ssl
 
@@ -32,6 +33,17 @@ if settings.REDIS_URL.startswith('rediss://'):
 # Set the default event loop policy to use
 asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
 
+# Each worker process keeps one browser for every Playwright task it runs
+@worker_process_init.connect
+def start_browser_pool(**kwargs):
+    from auction.utils.browser_pool import init_worker_browser_pool
+    init_worker_browser_pool()
+
+@worker_process_shutdown.connect
+def stop_browser_pool(**kwargs):
+    from auction.utils.browser_pool import shutdown_browser_pool
+    shutdown_browser_pool()
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file